@@ -0,0 +1,99 @@
+"""结果文件读写基准：分别测量 save / load / merge 三个阶段的耗时与峰值内存（RSS）。
+
+每个阶段在独立子进程中执行，峰值 RSS 互不干扰。用法（在仓库根目录执行）：
+
+    python -m bench.bench_excel_io --sizes 10000,100000,1000000 --sidecar csv
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _rows(n: int, prefix: str = "HT"):
+    from src.models import ResultRow, Status
+
+    for i in range(n):
+        yield ResultRow(
+            contract_number=f"{prefix}{i:08d}",
+            contract_id=f"7{i:018d}",
+            cooperation_id=f"c{i:012d}",
+            openChatId=f"oc_{i:032x}",
+            status=Status.SUCCESS,
+            error_code=None,
+            error_message=None,
+            search_retries=0,
+            search_ms=120 + i % 50,
+            info_retries=i % 3,
+            info_ms=80 + i % 40,
+            coop_retries=0,
+            coop_ms=60 + i % 30,
+            last_attempt_at=1700000000 + i,
+        )
+
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB，macOS 下为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _phase(name: str, path: str, n: int, sidecar: str) -> dict:
+    from src.io.reader import read_results
+    from src.io.writer import write_results
+    from src.orchestrator import _index_existing, _write_merged
+
+    start = time.perf_counter()
+    if name == "save":
+        write_results(path, _rows(n), sidecar or None)
+    elif name == "load":
+        order, _ = read_results(path, sidecar or None)
+        assert len(order) == n
+    elif name == "merge":
+        # 模拟重跑：流式读回历史结果，10% 合同更新、10% 新增，再写回
+        k = max(1, n // 10)
+        new_map = {r.contract_number: r for r in itertools.chain(_rows(k), _rows(k, prefix="NEW"))}
+        cfg = {"files": {"output_excel": path, "sidecar_format": sidecar}}
+        existing = _index_existing(cfg)
+        try:
+            _write_merged(cfg, list(new_map)[k:], existing, new_map)
+        finally:
+            existing.close()
+    return {"phase": name, "seconds": round(time.perf_counter() - start, 3), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_excel_io")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--sidecar", default="", choices=["", "csv", "parquet"])
+    parser.add_argument("--phase", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        print(json.dumps(_phase(args.phase, args.path, int(args.sizes), args.sidecar)))
+        return
+
+    print(f"{'rows':>9} {'phase':>6} {'seconds':>9} {'peak_rss_mb':>12}")
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "results.xlsx")
+            for phase in ("save", "load", "merge"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "bench.bench_excel_io", "--phase", phase, "--path", path,
+                     "--sizes", str(n), "--sidecar", args.sidecar],
+                    check=True, capture_output=True, text=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:>9} {r['phase']:>6} {r['seconds']:>9} {r['peak_rss_mb']:>12}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
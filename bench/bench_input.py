@@ -0,0 +1,85 @@
+"""输入读取基准：测量流式读取 + 去重 + 跳过过滤的首条耗时、总耗时与峰值内存（RSS）。
+
+每种去重方式在独立子进程中执行，峰值 RSS 互不干扰。用法（在仓库根目录执行）：
+
+    python -m bench.bench_input --lines 10000000 --dup-rate 0.1 --gzip
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .bench_excel_io import _peak_rss_mb
+
+
+def _generate(path: str, lines: int, dup_rate: float, seed: int) -> None:
+    rnd = random.Random(seed)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        for i in range(lines):
+            n = rnd.randrange(i) if i and rnd.random() < dup_rate else i
+            f.write(f"HT{n:010d}\n")
+
+
+def _phase(path: str, mode: str) -> dict:
+    from src.io.dedupe import InputDeduper
+    from src.io.reader import iter_contract_numbers
+
+    deduper = InputDeduper(mode)
+    start = time.perf_counter()
+    first_ms = None
+    pending = 0
+    for code in iter_contract_numbers(path):
+        if not deduper.add(code):
+            continue
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start) * 1000
+        pending += 1
+    elapsed = time.perf_counter() - start
+    deduper.close()
+    return {
+        "mode": mode,
+        "pending": pending,
+        "first_ms": round(first_ms or 0.0, 2),
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_input")
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--modes", default="memory,disk")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--phase", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        print(json.dumps(_phase(args.path, args.phase)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / ("contracts.txt.gz" if args.gzip else "contracts.txt"))
+        _generate(path, args.lines, args.dup_rate, args.seed)
+        print(f"{'lines':>10} {'mode':>7} {'pending':>10} {'first_ms':>9} {'seconds':>9} {'peak_rss_mb':>12}")
+        for mode in (m.strip() for m in args.modes.split(",") if m.strip()):
+            out = subprocess.run(
+                [sys.executable, "-m", "bench.bench_input", "--phase", mode, "--path", path],
+                check=True, capture_output=True, text=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{args.lines:>10} {r['mode']:>7} {r['pending']:>10} {r['first_ms']:>9} {r['seconds']:>9} {r['peak_rss_mb']:>12}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""结果合并基准：对比整体加载后合并（load）与流式合并（stream）的耗时与峰值内存（RSS）。
+
+历史结果为 CSV 旁路文件（stream 模式先转存为按偏移的临时索引），本次结果为结果日志（10% 合同更新、10% 新增）。合并结果只计数不写出，
+写出开销见 bench_excel_io。每种方式在独立子进程中执行，用法（在仓库根目录执行）：
+
+    python -m bench.bench_merge --sizes 10000,100000,1000000
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.bench_excel_io import _peak_rss_mb, _rows
+
+
+def _setup(tmp: str, n: int) -> None:
+    from src.io.journal import CheckpointJournal
+    from src.io.writer import RESULT_HEADERS, _values
+
+    with open(Path(tmp) / "existing.csv", "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(RESULT_HEADERS)
+        for r in _rows(n):
+            w.writerow(_values(r))
+    k = max(1, n // 10)
+    journal = CheckpointJournal(str(Path(tmp) / "journal.jsonl"), fsync_every=1 << 30, fsync_interval_s=1e9)
+    for r in itertools.chain(_rows(k), _rows(k, prefix="NEW")):
+        journal.append(r)
+    journal.close()
+
+
+def _load_merge(existing_path: str, journal_path: str, input_order):
+    # 旧实现：历史结果与结果日志全部读入内存后合并
+    from src.io.journal import replay_journal
+    from src.io.reader import read_results_csv
+
+    existing_order, existing_map = read_results_csv(existing_path)
+    new_order, new_map = replay_journal(journal_path)
+    for cn in existing_order:
+        yield new_map.get(cn) or existing_map[cn]
+    emitted = set()
+    for cn in input_order:
+        if cn in new_map and cn not in existing_map and cn not in emitted:
+            emitted.add(cn)
+            yield new_map[cn]
+    for cn in new_order:
+        if cn not in emitted and cn not in existing_map:
+            yield new_map[cn]
+
+
+def _phase(mode: str, tmp: str, n: int) -> dict:
+    from src.io.merge import JournalIndex, ResultIndex, ResultMerger
+    from src.io.reader import iter_results_csv
+
+    existing_path = str(Path(tmp) / "existing.csv")
+    journal_path = str(Path(tmp) / "journal.jsonl")
+    k = max(1, n // 10)
+    # 输入为全部历史合同加新增合同，与重跑时重新流式读取输入一致
+    input_order = (f"{p}{i:08d}" for p, m in (("HT", n), ("NEW", k)) for i in range(m))
+
+    start = time.perf_counter()
+    if mode == "load":
+        total = sum(1 for _ in _load_merge(existing_path, journal_path, input_order))
+    else:
+        journal = JournalIndex(journal_path)
+        existing = ResultIndex(iter_results_csv(existing_path), tmp)
+        try:
+            total = sum(1 for _ in ResultMerger(journal).merge(existing, input_order))
+        finally:
+            existing.close()
+            journal.close()
+    assert total == n + k, total
+    return {"mode": mode, "seconds": round(time.perf_counter() - start, 3), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_merge")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--tmp", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_phase(args.mode, args.tmp, int(args.sizes))))
+        return
+
+    print(f"{'rows':>9} {'mode':>6} {'seconds':>9} {'peak_rss_mb':>12}")
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        with tempfile.TemporaryDirectory() as tmp:
+            _setup(tmp, n)
+            for mode in ("load", "stream"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "bench.bench_merge", "--mode", mode, "--tmp", tmp,
+                     "--sizes", str(n)],
+                    check=True, capture_output=True, text=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:>9} {r['mode']:>6} {r['seconds']:>9} {r['peak_rss_mb']:>12}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
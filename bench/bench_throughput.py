@@ -0,0 +1,226 @@
+"""端到端吞吐基准：在本地模拟服务上执行 orchestrator.run，报告吞吐、各接口配额利用率与单合同耗时分位数。
+
+模拟服务默认以独立子进程启动，避免与被测进程争用 GIL；也可用 --base-url 指向已启动的模拟服务。
+用法（在仓库根目录执行）：
+
+    python -m bench.bench_throughput --contracts 2000 --engine staged --concurrency 32 \\
+        --qpm contract_search=1200 --qpm contract_info=3000 --qpm cooperation_info=3000 \\
+        --latency contract_search=lognormal:80,0.4 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .mock_server import ENDPOINTS, add_mock_arguments
+
+# 客户端 QPM 配置项与服务端接口名的对应关系
+_CLIENT_QPM_KEYS = {
+    "contract_search": "contract_search_qpm",
+    "contract_info": "contract_info_qpm",
+    "cooperation_info": "cooperation_info_qpm",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http_json(url: str, method: str = "GET") -> Any:
+    req = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def _start_mock(argv: List[str]) -> subprocess.Popen:
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "bench.mock_server", "--port", str(port)] + argv, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            _http_json(f"{base}/_stats")
+            proc.base_url = base  # type: ignore[attr-defined]
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("模拟服务启动超时")
+
+
+def _mock_argv(args: argparse.Namespace) -> List[str]:
+    argv: List[str] = []
+    for item in args.latency or []:
+        argv += ["--latency", item]
+    for item in args.qpm or []:
+        argv += ["--qpm", item]
+    for flag in ("burst", "error_rate", "timeout_rate", "timeout_s", "not_found_rate", "no_coop_rate", "no_chat_rate", "token_expire_s", "tenant_contracts", "seed"):
+        argv += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+    return argv
+
+
+def _deep_set(cfg: Dict[str, Any], dotted: str, value: Any) -> None:
+    keys = dotted.split(".")
+    cur = cfg
+    for k in keys[:-1]:
+        cur = cur.setdefault(k, {})
+    cur[keys[-1]] = value
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, math.ceil(p / 100.0 * len(values)) - 1))
+    return values[k]
+
+
+def _contract_latencies(log_file: str) -> List[float]:
+    # 单合同耗时：该合同首条日志到末条日志的时间差（含步骤间排队与限流等待，不含开始前的排队）
+    spans: Dict[str, List[float]] = {}
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            cn = rec.get("contract_number")
+            if not cn:
+                continue
+            ts = datetime.fromisoformat(rec["ts"]).timestamp()
+            span = spans.get(cn)
+            if span is None:
+                spans[cn] = [ts, ts]
+            else:
+                span[0] = min(span[0], ts)
+                span[1] = max(span[1], ts)
+    return [(end - start) * 1000.0 for start, end in spans.values()]
+
+
+def _server_qpm(args: argparse.Namespace) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for item in args.qpm or []:
+        name, _, value = item.partition("=")
+        out[name] = int(value)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_throughput")
+    parser.add_argument("--contracts", type=int, default=1000)
+    parser.add_argument("--engine", default="pool", choices=["pool", "staged", "async"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--client-qpm", type=int, default=0,
+                        help="客户端各接口 QPM；0 表示与服务端限额一致，服务端未限额的接口取 600000")
+    parser.add_argument("--base-url", help="使用已启动的模拟服务，不再自动拉起")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=YAML",
+                        help="覆盖任意配置项，如 --set http.warmup=true；可重复指定")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    from src.config import load_config
+    from src.orchestrator import run
+
+    proc: Optional[subprocess.Popen] = None
+    if args.base_url:
+        base = args.base_url.rstrip("/")
+        _http_json(f"{base}/_reset", "POST")
+    else:
+        proc = _start_mock(_mock_argv(args))
+        base = proc.base_url  # type: ignore[attr-defined]
+
+    server_qpm = _server_qpm(args)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            work = Path(tmp)
+            (work / "contracts.txt").write_text(
+                "\n".join(f"BENCH{i:08d}" for i in range(args.contracts)), encoding="utf-8")
+            raw: Dict[str, Any] = {
+                "files": {
+                    "input_txt": str(work / "contracts.txt"),
+                    "output_excel": str(work / "out.xlsx"),
+                    "log_file": str(work / "run.log"),
+                },
+                # 令牌缓存、解析缓存与合同索引都放在临时目录，不写入仓库，也不在多次运行间复用
+                "auth": {"app_id": "bench", "app_secret": "bench", "cookies": {"session": "bench"},
+                         "token_cache_file": str(work / "tenant_token.json")},
+                "endpoints": {"openapi_base": base, "clm_base": base},
+                "rate_limit": {"global_qpm": 600000, "concurrency": args.concurrency},
+                "pipeline": {"engine": args.engine},
+                "cache": {"enabled": False, "path": str(work / "resolution_cache.sqlite3")},
+                "prefetch": {"index_path": str(work / "contract_index.sqlite3")},
+                "checkpoint": {"enabled": False},
+                "log": {"level": "INFO", "async": True, "console": "off"},
+            }
+            for name, key in _CLIENT_QPM_KEYS.items():
+                raw["rate_limit"][key] = args.client_qpm or server_qpm.get(name) or 600000
+            for item in args.set:
+                key, _, value = item.partition("=")
+                _deep_set(raw, key, yaml.safe_load(value))
+            cfg_path = work / "config.yaml"
+            cfg_path.write_text(yaml.safe_dump(raw, allow_unicode=True), encoding="utf-8")
+            cfg = load_config(str(cfg_path))
+
+            start = time.perf_counter()
+            run(cfg)
+            elapsed = time.perf_counter() - start
+            stats = _http_json(f"{base}/_stats")
+            latencies = _contract_latencies(cfg["files"]["log_file"])
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    endpoints: Dict[str, Any] = {}
+    for name in ENDPOINTS:
+        c = stats["endpoints"][name]
+        accepted = c["requests"] - c["throttled"]
+        qpm = server_qpm.get(name)
+        endpoints[name] = {
+            **c,
+            "qpm": qpm,
+            # 配额利用率：服务端放行请求数 / 运行期内的可用配额
+            "utilization": round(accepted / (qpm * elapsed / 60.0), 3) if qpm else None,
+        }
+    report = {
+        "contracts": args.contracts,
+        "engine": args.engine,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "contracts_per_s": round(args.contracts / elapsed, 2) if elapsed > 0 else None,
+        "contract_latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+        },
+        "endpoints": endpoints,
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"engine={args.engine} concurrency={args.concurrency} contracts={args.contracts}")
+    print(f"elapsed={report['elapsed_s']}s  throughput={report['contracts_per_s']} contracts/s  "
+          f"latency p50={report['contract_latency_ms']['p50']}ms p99={report['contract_latency_ms']['p99']}ms")
+    print(f"{'endpoint':<18}{'requests':>9}{'ok':>8}{'throttled':>10}{'errors':>8}{'timeouts':>9}{'qpm':>8}{'util':>7}")
+    for name, e in endpoints.items():
+        util = f"{e['utilization']:.0%}" if e["utilization"] is not None else "-"
+        print(f"{name:<18}{e['requests']:>9}{e['ok']:>8}{e['throttled']:>10}{e['errors']:>8}{e['timeouts']:>9}"
+              f"{e['qpm'] or '-':>8}{util:>7}")
+
+
+if __name__ == "__main__":
+    main()
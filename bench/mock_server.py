@@ -0,0 +1,421 @@
+"""离线模拟飞书 OpenAPI / CLM 接口，用于吞吐压测，不访问生产环境。
+
+实现鉴权、合同搜索、合同详情、协同详情四个接口，支持：
+- 各接口独立的延迟分布：fixed:MS / uniform:LO,HI / normal:MEAN,SD / lognormal:MEDIAN,SIGMA / exp:MEAN（毫秒）
+- 服务端按接口 QPM 限流（令牌桶）：合同搜索返回 429 + code=99991400 与 x-ogw-ratelimit-reset，CLM 返回 429 + Retry-After
+- 按比例注入 5xx 与超时（挂起 timeout_s 后才响应）
+- 按合同号哈希稳定地产生未找到合同 / 无协同 / 无群聊三类业务结果
+- 合同搜索不带编号条件时分页列出租户合同（--tenant-contracts），支持 update_time_start 增量过滤
+- CLM 接口校验 Cookie 中的 session（--session，留空不校验），不符时返回 401
+- GET /_stats 返回各接口计数，POST /_reset 清零；POST /_fault 在运行中修改 error_rate / timeout_rate / session，用于模拟故障与 Cookie 失效
+
+用法（在仓库根目录执行）：
+
+    python -m bench.mock_server --port 18080 --qpm contract_search=1000 --latency contract_search=lognormal:80,0.4
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.auth import TOKEN_PATH
+
+MOCK_TOKEN = "t-mock-token"
+
+# 接口名与 rate_limit 中的桶名一致，便于对照配额利用率
+ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    "auth": ("POST", TOKEN_PATH),
+    "contract_search": ("POST", "/open-apis/contract/v1/contracts/search"),
+    "contract_info": ("GET", "/clm/api/workflow/composition/contractAndTask"),
+    "cooperation_info": ("GET", "/clm/api/cooperation/info"),
+}
+_ROUTES = {(method, path): name for name, (method, path) in ENDPOINTS.items()}
+
+
+class Latency:
+    """延迟分布，sample() 返回秒。"""
+
+    def __init__(self, kind: str, args: Tuple[float, ...]) -> None:
+        self.kind = kind
+        self.args = args
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, raw = spec.partition(":")
+        args = tuple(float(x) for x in raw.split(",") if x.strip())
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if kind not in arity or len(args) != arity[kind]:
+            raise ValueError(f"无效的延迟分布: {spec}")
+        return cls(kind, args)
+
+    def sample(self, rnd: random.Random) -> float:
+        a = self.args
+        if self.kind == "fixed":
+            ms = a[0]
+        elif self.kind == "uniform":
+            ms = rnd.uniform(a[0], a[1])
+        elif self.kind == "normal":
+            ms = rnd.gauss(a[0], a[1])
+        elif self.kind == "lognormal":
+            ms = a[0] * math.exp(rnd.gauss(0.0, a[1]))
+        else:
+            ms = rnd.expovariate(1.0 / a[0]) if a[0] > 0 else 0.0
+        return max(0.0, ms) / 1000.0
+
+
+class _Quota:
+    """服务端令牌桶：容量 burst，按 qpm/60 每秒补充。"""
+
+    def __init__(self, qpm: int, burst: int) -> None:
+        self.rate = qpm / 60.0
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        # 放行返回 None，否则返回距下一个令牌的秒数
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return None
+            return (1.0 - self.tokens) / self.rate
+
+
+@dataclass
+class MockConfig:
+    latency: Dict[str, Latency] = field(default_factory=dict)
+    qpm: Dict[str, int] = field(default_factory=dict)
+    burst: int = 0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_s: float = 30.0
+    not_found_rate: float = 0.05
+    no_coop_rate: float = 0.02
+    no_chat_rate: float = 0.05
+    token_expire_s: int = 7200
+    tenant_contracts: int = 0
+    session: str = ""
+    # 大于 0 时所有合同的协同 ID 落在该数量的分组内（模拟补充协议等多合同共用同一协同）
+    coop_groups: int = 0
+    # contractAndTask 带 withDocVersion=true 时附带约该 KB 数的文档版本列表（模拟大响应）
+    doc_version_kb: int = 0
+    # 客户端声明支持 gzip 时压缩响应体
+    gzip: bool = False
+    seed: int = 0
+
+
+def _fraction(key: str, salt: str) -> float:
+    # 按键稳定映射到 [0,1)，同一合同每次运行得到相同的业务结果
+    return zlib.crc32(f"{salt}:{key}".encode("utf-8")) / 2**32
+
+
+class MockState:
+    def __init__(self, cfg: MockConfig) -> None:
+        self.cfg = cfg
+        self.quotas = {
+            name: _Quota(qpm, cfg.burst or max(1, qpm // 60))
+            for name, qpm in cfg.qpm.items() if qpm > 0
+        }
+        self._rnd = random.Random(cfg.seed)
+        self._rnd_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.started_ms = int(time.time() * 1000)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self.counts = {
+                name: {"requests": 0, "ok": 0, "throttled": 0, "errors": 0, "timeouts": 0, "bytes": 0}
+                for name in ENDPOINTS
+            }
+
+    def count(self, name: str, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[name][key] += amount
+
+    def random(self) -> float:
+        with self._rnd_lock:
+            return self._rnd.random()
+
+    def latency(self, name: str) -> float:
+        spec = self.cfg.latency.get(name)
+        if spec is None:
+            return 0.0
+        with self._rnd_lock:
+            return spec.sample(self._rnd)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 3),
+                "qpm": dict(self.cfg.qpm),
+                "endpoints": {k: dict(v) for k, v in self.counts.items()},
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: MockState
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, obj: Any, headers: Optional[Dict[str, str]] = None, name: str = "") -> None:
+        body = json.dumps(obj).encode("utf-8")
+        headers = dict(headers or {})
+        if self.state.cfg.gzip and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        if name:
+            self.state.count(name, "bytes", len(body))
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已超时断开
+            self.close_connection = True
+
+    def do_HEAD(self) -> None:
+        # 连接预热请求：保持连接不关闭，便于验证预热后的连接复用
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _list(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        # 无编号条件时按 page_token 分页列出租户合同，支持 update_time_start 增量过滤
+        cfg = self.state.cfg
+        page_size = int(body.get("page_size") or 50)
+        since = int(body.get("update_time_start") or 0)
+        offset = int(body.get("page_token") or 0)
+        items = []
+        i = offset
+        while i < cfg.tenant_contracts and len(items) < page_size:
+            item = _tenant_contract(i, self.state.started_ms)
+            i += 1
+            if _fraction(item["contract_number"], "search") < cfg.not_found_rate or int(item["update_time"]) < since:
+                continue
+            items.append(item)
+        has_more = i < cfg.tenant_contracts
+        return {"code": 0, "data": {"items": items, "has_more": has_more, "page_token": str(i) if has_more else ""}}
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if parts.path == "/_stats":
+            return self._send(200, self.state.stats())
+        if parts.path == "/_reset" and method == "POST":
+            self.state.reset()
+            return self._send(200, {"ok": True})
+        if parts.path == "/_fault" and method == "POST":
+            changes = json.loads(raw or b"{}")
+            for key in ("error_rate", "timeout_rate", "session"):
+                if key in changes:
+                    setattr(self.state.cfg, key, changes[key])
+            return self._send(200, {"ok": True})
+        name = _ROUTES.get((method, parts.path))
+        if name is None:
+            return self._send(404, {"code": 404, "msg": "not found"})
+
+        state = self.state
+        state.count(name, "requests")
+        quota = state.quotas.get(name)
+        wait = quota.take() if quota is not None else None
+        if wait is not None:
+            state.count(name, "throttled")
+            reset = str(max(1, math.ceil(wait)))
+            if name == "contract_search":
+                return self._send(429, {"code": 99991400, "msg": "request trigger frequency limit"}, {"x-ogw-ratelimit-reset": reset})
+            return self._send(429, {"code": 429, "msg": "too many requests"}, {"Retry-After": reset})
+
+        time.sleep(state.latency(name))
+        r = state.random()
+        if r < state.cfg.timeout_rate:
+            state.count(name, "timeouts")
+            time.sleep(state.cfg.timeout_s)
+            return self._send(504, {"code": 504, "msg": "gateway timeout"})
+        if r < state.cfg.timeout_rate + state.cfg.error_rate:
+            state.count(name, "errors")
+            return self._send(503, {"code": 503, "msg": "service unavailable"})
+
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        status, obj = self._handle(name, raw, query)
+        state.count(name, "ok" if status < 400 else "errors")
+        self._send(status, obj, name=name)
+
+    def _handle(self, name: str, raw: bytes, query: Dict[str, str]) -> Tuple[int, Any]:
+        cfg = self.state.cfg
+        if name == "auth":
+            return 200, {"code": 0, "msg": "ok", "tenant_access_token": MOCK_TOKEN, "expire": cfg.token_expire_s}
+        if name == "contract_search":
+            if self.headers.get("Authorization") != f"Bearer {MOCK_TOKEN}":
+                return 401, {"code": 99991663, "msg": "invalid access token"}
+            body = json.loads(raw or b"{}")
+            if "contract_number" not in body and "contract_numbers" not in body:
+                return 200, self._list(body)
+            # 同时支持单号 contract_number 与批量 contract_numbers 两种过滤条件
+            numbers = [str(x) for x in body.get("contract_numbers") or [body.get("contract_number") or ""]]
+            items = [
+                {"contract_id": f"cid-{cn}", "contract_number": cn}
+                for cn in numbers if cn and _fraction(cn, "search") >= cfg.not_found_rate
+            ]
+            page_size = int(body.get("page_size") or 50)
+            return 200, {"code": 0, "data": {"items": items[:page_size], "has_more": len(items) > page_size}}
+        if name != "contract_search" and cfg.session and f"session={cfg.session}" not in (self.headers.get("Cookie") or ""):
+            return 401, {"code": 401, "msg": "session expired"}
+        if name == "contract_info":
+            cid = query.get("contractId") or ""
+            if _fraction(cid, "coop") < cfg.no_coop_rate:
+                return 200, {"code": 0, "data": {"contract": {"contractInfo": {}}}}
+            coid = f"co-g{int(_fraction(cid, 'group') * cfg.coop_groups)}" if cfg.coop_groups > 0 else f"co-{cid}"
+            contract: Dict[str, Any] = {"contractInfo": {"cooperationId": coid}}
+            if cfg.doc_version_kb > 0 and query.get("withDocVersion") == "true":
+                contract["docVersions"] = _doc_versions(cid, cfg.doc_version_kb)
+            return 200, {"code": 0, "data": {"contract": contract}}
+        coid = query.get("cooperationId") or ""
+        if _fraction(coid, "chat") < cfg.no_chat_rate:
+            return 200, {"code": 0, "data": {}}
+        return 200, {"code": 0, "data": {"openChatId": f"oc_{coid}"}}
+
+
+def _doc_versions(cid: str, kb: int) -> List[Dict[str, Any]]:
+    # 每项约 200 字节
+    return [
+        {"versionId": f"{cid}-v{i}", "fileName": f"合同正文-第{i}版.docx", "creator": "ou_" + "0" * 32,
+         "createTime": str(1700000000000 + i), "url": f"https://example.invalid/file/{cid}/{i}"}
+        for i in range(max(1, kb * 5))
+    ]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def _tenant_contract(i: int, started_ms: int) -> Dict[str, Any]:
+    # 租户合同列表：编号与压测输入一致，修改时间稳定分布在服务启动前 30 天内
+    cn = f"BENCH{i:08d}"
+    return {
+        "contract_id": f"cid-{cn}",
+        "contract_number": cn,
+        "update_time": str(started_ms - int(_fraction(cn, "mtime") * 30 * 86400 * 1000)),
+    }
+
+
+class MockServer:
+    def __init__(self, cfg: MockConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+        handler = type("Handler", (_Handler,), {"state": MockState(cfg)})
+        self.httpd = _Server((host, port), handler)
+        self.state: MockState = handler.state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _pairs(items, parse) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"未知接口: {name}，可选: {', '.join(ENDPOINTS)}")
+        out[name] = parse(value)
+    return out
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", action="append", metavar="NAME=SPEC",
+                        help="接口延迟分布，如 contract_search=lognormal:80,0.4；可重复指定")
+    parser.add_argument("--qpm", action="append", metavar="NAME=QPM", help="服务端接口 QPM 限额，如 contract_search=1000")
+    parser.add_argument("--burst", type=int, default=0, help="服务端令牌桶容量，0 表示 qpm/60")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入 503 的比例")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="注入超时的比例")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="超时故障的挂起时长（秒）")
+    parser.add_argument("--not-found-rate", type=float, default=0.05)
+    parser.add_argument("--no-coop-rate", type=float, default=0.02)
+    parser.add_argument("--no-chat-rate", type=float, default=0.05)
+    parser.add_argument("--token-expire-s", type=int, default=7200, help="鉴权接口返回的 token 有效期（秒）")
+    parser.add_argument("--tenant-contracts", type=int, default=0, help="分页列表接口返回的租户合同总数")
+    parser.add_argument("--session", default="", help="CLM 接口要求的 Cookie session 值，留空不校验")
+    parser.add_argument("--coop-groups", type=int, default=0, help="大于 0 时所有合同共用该数量的协同 ID，用于验证请求合并")
+    parser.add_argument("--doc-version-kb", type=int, default=0, help="合同详情带 withDocVersion=true 时附带约该 KB 数的文档版本列表")
+    parser.add_argument("--gzip", action="store_true", help="客户端声明支持 gzip 时压缩响应体")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def mock_config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency=_pairs(args.latency, Latency.parse),
+        qpm=_pairs(args.qpm, int),
+        burst=args.burst,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_s=args.timeout_s,
+        not_found_rate=args.not_found_rate,
+        no_coop_rate=args.no_coop_rate,
+        no_chat_rate=args.no_chat_rate,
+        token_expire_s=args.token_expire_s,
+        tenant_contracts=args.tenant_contracts,
+        session=args.session,
+        coop_groups=args.coop_groups,
+        doc_version_kb=args.doc_version_kb,
+        gzip=args.gzip,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="mock_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    server = MockServer(mock_config_from_args(args), args.host, args.port)
+    print(f"mock server listening on {server.base_url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
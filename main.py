@@ -6,8 +6,34 @@ from pathlib import Path
 def main() -> None:
     parser = argparse.ArgumentParser(prog="contract-chat-mapping")
     parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--export-only", action="store_true",
+                        help="不调用接口，仅将断点结果日志与历史 Excel 合并导出")
+    parser.add_argument("--invalidate-cache", action="append", default=[],
+                        choices=["search", "contract_info", "coop_info", "all"],
+                        help="启动时清空解析缓存的指定跳：search/contract_info/coop_info/all，可重复指定")
+    parser.add_argument("--shard", metavar="i/N",
+                        help="分片运行：只处理按合同编号稳定哈希落在第 i 片（共 N 片）的合同，输出与日志文件名带分片后缀")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="不调用接口，将 N 个分片的输出合并写入 files.output_excel")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="不调用接口，输出重跑计划：待处理/跳过/放弃的合同数、各步骤续跑数与预计接口调用次数")
+    parser.add_argument("--serve", action="store_true",
+                        help="常驻查询服务：在 serve.host:serve.port 提供按合同编号实时解析的 HTTP 接口，不读写输入与输出文件")
+    parser.add_argument("--profile", action="store_true",
+                        help="按阶段统计耗时（限流等待、重试退避、网络、JSON 解析、日志、读写文件），结束时输出耗时归因表")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="同时以 cProfile 采样全部线程并写出 pstats 文件（可用 snakeviz/flameprof 查看或生成火焰图），隐含 --profile")
     args = parser.parse_args()
 
+    shard = None
+    if args.shard:
+        from src.shard import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"参数错误: {e}")
+            sys.exit(2)
+
     config_path = Path(args.config)
     if not config_path.exists():
         print(f"配置文件不存在: {config_path}")
@@ -17,16 +43,45 @@ def main() -> None:
     try:
         from src.config import load_config
         cfg = load_config(str(config_path))
+        if args.invalidate_cache:
+            cache_cfg = cfg.setdefault("cache", {})
+            cache_cfg["invalidate"] = list(cache_cfg.get("invalidate") or []) + args.invalidate_cache
+        if shard is not None:
+            cfg["shard"] = {"index": shard[0], "count": shard[1]}
     except Exception as e:
         print(f"加载配置失败: {e}")
         cfg = {}
 
+    profiler = None
+    call_profile = None
+    if args.profile or args.profile_out:
+        from src import profiling
+        profiler = profiling.enable()
+        if args.profile_out:
+            call_profile = profiling.CallProfile()
+            call_profile.start()
+
     try:
-        from src.orchestrator import run
-        run(cfg)
+        from src.orchestrator import dry_run, export, merge_shards, run, serve
+        if args.serve:
+            serve(cfg, str(config_path))
+        elif args.merge_shards:
+            merge_shards(cfg, args.merge_shards)
+        elif args.dry_run:
+            dry_run(cfg)
+        elif args.export_only:
+            export(cfg)
+        else:
+            run(cfg, str(config_path))
     except Exception as e:
         print(f"运行失败: {e}")
         sys.exit(1)
+    finally:
+        if call_profile is not None:
+            call_profile.stop(args.profile_out)
+            print(f"cProfile 结果已写入: {args.profile_out}")
+        if profiler is not None:
+            print(profiler.format_table())
 
 
 if __name__ == "__main__":
@@ -1,33 +1,221 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import threading
 import time
-from typing import Optional
+from pathlib import Path
+from typing import Any, Optional, Tuple
 
 from .http.client import HttpClient
 
 
+OPENAPI_BASE = "https://open.feishu.cn"
+TOKEN_PATH = "/open-apis/auth/v3/tenant_access_token/internal"
+TOKEN_URL = OPENAPI_BASE + TOKEN_PATH
+
+# token 在到期前 120 秒即视为需要刷新；到期前 5 秒内不再使用
+_REFRESH_MARGIN_S = 120
+_EXPIRY_GUARD_S = 5
+# 后台刷新失败后的重试间隔
+_REFRESH_RETRY_S = 30
+
+
+def _parse_token(status: int, data: Any) -> Tuple[str, float]:
+    # 返回 (token, 过期时间戳)；失败抛出 RuntimeError
+    if status >= 200 and status < 300 and isinstance(data, dict):
+        token = data.get("tenant_access_token")
+        if not token:
+            raise RuntimeError("auth_failed: empty token")
+        expire = data.get("expire") or data.get("expires_in") or 3600
+        return token, time.time() + float(expire)
+    raise RuntimeError(f"auth_failed: {status}")
+
+
+def _load_token_cache(path: str, app_id: str, token_url: str) -> Tuple[Optional[str], float]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None, 0.0
+    if not isinstance(data, dict) or data.get("app_id") != app_id or data.get("token_url") != token_url:
+        return None, 0.0
+    return data.get("tenant_access_token") or None, float(data.get("expire_at") or 0.0)
+
+
+def _save_token_cache(path: str, app_id: str, token_url: str, token: str, expire_at: float) -> None:
+    # 仅当前用户可读写（0600），先写临时文件再原子替换
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"app_id": app_id, "token_url": token_url, "tenant_access_token": token, "expire_at": expire_at}, f)
+    os.replace(tmp, path)
+
+
 class AuthManager:
-    def __init__(self, app_id: str, app_secret: str, http: HttpClient) -> None:
+    """tenant_access_token 管理：线程安全、单飞刷新。
+
+    同一时刻只有一个线程发起刷新；旧 token 尚未过期时其余线程直接沿用旧 token，否则等待刷新结果。
+    配置 cache_file 时 token 跨进程复用；refresh_ahead_s > 0 时由后台线程在到期前提前刷新。
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        http: HttpClient,
+        base: str = OPENAPI_BASE,
+        cache_file: str = "",
+        refresh_ahead_s: float = 0.0,
+    ) -> None:
         self.app_id = app_id
         self.app_secret = app_secret
         self.http = http
+        self.token_url = base.rstrip("/") + TOKEN_PATH
+        self.cache_file = cache_file
+        self.refresh_ahead_s = refresh_ahead_s
         self._token: Optional[str] = None
         self._expire_at: float = 0.0
+        self._issued_at: float = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        if cache_file:
+            self._token, self._expire_at = _load_token_cache(cache_file, app_id, self.token_url)
 
-    def get_tenant_access_token(self) -> str:
-        now = time.time()
-        if self._token and now < self._expire_at - 120:
-            return self._token
-        url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
+    def _valid(self) -> bool:
+        return bool(self._token) and time.time() < self._expire_at - _REFRESH_MARGIN_S
+
+    def _usable(self) -> bool:
+        return bool(self._token) and time.time() < self._expire_at - _EXPIRY_GUARD_S
+
+    def _refresh_at(self) -> float:
+        # 提前刷新时刻；提前量不超过 token 有效期的一半，避免有效期较短时反复刷新
+        ahead = min(self.refresh_ahead_s, (self._expire_at - self._issued_at) / 2)
+        return self._expire_at - ahead
+
+    def _request_body(self) -> Tuple[dict, dict]:
         headers = {"Content-Type": "application/json"}
         body = {"app_id": self.app_id, "app_secret": self.app_secret}
-        status, data, _ = self.http.post_json("auth", url, headers, body)
-        if status >= 200 and status < 300 and isinstance(data, dict):
-            token = data.get("tenant_access_token")
-            if not token:
-                raise RuntimeError("auth_failed: empty token")
-            expire = data.get("expire") or data.get("expires_in") or 3600
-            self._token = token
-            self._expire_at = time.time() + float(expire)
-            return token
-        raise RuntimeError(f"auth_failed: {status}")
+        return headers, body
+
+    def _store(self, token: str, expire_at: float) -> None:
+        self._token = token
+        self._expire_at = expire_at
+        self._issued_at = time.time()
+        if self.cache_file:
+            try:
+                _save_token_cache(self.cache_file, self.app_id, self.token_url, token, expire_at)
+            except OSError:
+                pass
+
+    def _refresh(self) -> str:
+        headers, body = self._request_body()
+        status, data, _ = self.http.post_json("auth", self.token_url, headers, body)
+        token, expire_at = _parse_token(status, data)
+        self._store(token, expire_at)
+        return token
+
+    def get_tenant_access_token(self) -> str:
+        if self._valid():
+            return self._token  # type: ignore[return-value]
+        # 旧 token 仍可用且已有线程在刷新时不排队，直接返回旧 token
+        if not self._lock.acquire(blocking=not self._usable()):
+            return self._token  # type: ignore[return-value]
+        try:
+            # 等锁期间可能已由其他线程刷新
+            if self._valid():
+                return self._token  # type: ignore[return-value]
+            return self._refresh()
+        finally:
+            self._lock.release()
+
+    def invalidate(self, token: Optional[str]) -> None:
+        """接口返回 token 失效时调用；仅当失效的仍是当前 token 时作废，避免覆盖其他线程刚刷新的结果。"""
+        if token and token == self._token:
+            self._expire_at = 0.0
+
+    def start_refresher(self) -> None:
+        if self.refresh_ahead_s <= 0 or self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresher", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            due = self._refresh_at() - time.time()
+            if self._token and due > 0:
+                self._stop.wait(due)
+                continue
+            with self._lock:
+                try:
+                    if not self._token or time.time() >= self._refresh_at():
+                        self._refresh()
+                    ok = True
+                except Exception:
+                    ok = False
+            if not ok:
+                self._stop.wait(_REFRESH_RETRY_S)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=1)
+            self._refresher = None
+
+
+class AsyncAuthManager(AuthManager):
+    """AuthManager 的 asyncio 版本：http 为 AsyncHttpClient；同一事件循环内并发刷新只会发出一次请求。
+
+    refresh_ahead_s > 0 时，进入提前刷新窗口后的首次调用会在后台任务中刷新，调用方继续使用当前 token。
+    """
+
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        http: Any,
+        base: str = OPENAPI_BASE,
+        cache_file: str = "",
+        refresh_ahead_s: float = 0.0,
+    ) -> None:
+        super().__init__(app_id, app_secret, http, base, cache_file, refresh_ahead_s)
+        self._alock: Optional[asyncio.Lock] = None
+        self._bg: Optional[asyncio.Future] = None
+        self._bg_retry_at = 0.0
+
+    async def _refresh_async(self) -> str:
+        headers, body = self._request_body()
+        status, data, _ = await self.http.post_json("auth", self.token_url, headers, body)
+        token, expire_at = _parse_token(status, data)
+        self._store(token, expire_at)
+        return token
+
+    async def _refresh_ahead(self) -> None:
+        try:
+            async with self._alock:  # type: ignore[union-attr]
+                if time.time() >= self._refresh_at():
+                    await self._refresh_async()
+        except Exception:
+            # 提前刷新失败不影响当前 token，间隔后再试；到达刷新边界时会同步重试
+            self._bg_retry_at = time.time() + _REFRESH_RETRY_S
+        finally:
+            self._bg = None
+
+    async def get_tenant_access_token(self) -> str:  # type: ignore[override]
+        if self._alock is None:
+            self._alock = asyncio.Lock()
+        if self._valid():
+            now = time.time()
+            if self.refresh_ahead_s > 0 and self._bg is None and now >= max(self._refresh_at(), self._bg_retry_at):
+                self._bg = asyncio.ensure_future(self._refresh_ahead())
+            return self._token  # type: ignore[return-value]
+        if self._alock.locked() and self._usable():
+            return self._token  # type: ignore[return-value]
+        async with self._alock:
+            # 等锁期间可能已由其他协程刷新
+            if self._valid():
+                return self._token  # type: ignore[return-value]
+            return await self._refresh_async()
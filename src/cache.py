@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# 三段链路各自一张逻辑表（同一物理表按 hop 区分）
+HOP_SEARCH = "search"                # contract_number → contract_id
+HOP_CONTRACT_INFO = "contract_info"  # contract_id → cooperation_id
+HOP_COOP_INFO = "coop_info"          # cooperation_id → openChatId
+HOPS = (HOP_SEARCH, HOP_CONTRACT_INFO, HOP_COOP_INFO)
+
+
+class ResolutionCache:
+    """跨运行持久化的逐跳解析缓存（SQLite）。
+
+    每条记录带写入时间，按 hop 各自的 TTL 判定过期；value 为 NULL 表示负缓存（如合同不存在），
+    使用独立的 negative_ttl_s。连接在线程间共享，读写由一把锁串行化（本地 SQLite 操作为微秒级）。
+    """
+
+    def __init__(self, path: str, ttl_s: Dict[str, float], negative_ttl_s: float) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_s = dict(ttl_s)
+        self.negative_ttl_s = negative_ttl_s
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resolution ("
+            " hop TEXT NOT NULL, key TEXT NOT NULL, value TEXT, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (hop, key)) WITHOUT ROWID"
+        )
+        self._hits: Dict[str, int] = {h: 0 for h in HOPS}
+        self._misses: Dict[str, int] = {h: 0 for h in HOPS}
+
+    def get(self, hop: str, key: str) -> Tuple[bool, Optional[str]]:
+        """返回 (是否命中, 值)；命中且值为 None 表示负缓存。"""
+        with self._lock:
+            row = self._conn.execute("SELECT value, updated_at FROM resolution WHERE hop=? AND key=?", (hop, key)).fetchone()
+            if row is not None:
+                value, updated_at = row
+                ttl = self.ttl_s.get(hop, 0) if value is not None else self.negative_ttl_s
+                if ttl > 0 and time.time() - updated_at <= ttl:
+                    self._hits[hop] = self._hits.get(hop, 0) + 1
+                    return True, value
+            self._misses[hop] = self._misses.get(hop, 0) + 1
+            return False, None
+
+    def put(self, hop: str, key: str, value: Optional[str]) -> None:
+        if not key:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resolution (hop, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (hop, key, value, time.time()),
+            )
+
+    def put_negative(self, hop: str, key: str) -> None:
+        self.put(hop, key, None)
+
+    def invalidate(self, hops: Optional[Iterable[str]] = None, older_than_s: Optional[float] = None) -> int:
+        """删除指定 hop（缺省为全部）的记录；给定 older_than_s 时仅删除早于该时长的记录。返回删除条数。"""
+        targets = list(hops) if hops else list(HOPS)
+        cutoff = time.time() - older_than_s if older_than_s is not None else None
+        removed = 0
+        with self._lock:
+            for hop in targets:
+                if cutoff is None:
+                    cur = self._conn.execute("DELETE FROM resolution WHERE hop=?", (hop,))
+                else:
+                    cur = self._conn.execute("DELETE FROM resolution WHERE hop=? AND updated_at<?", (hop, cutoff))
+                removed += cur.rowcount or 0
+        return removed
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {h: {"hits": self._hits.get(h, 0), "misses": self._misses.get(h, 0)} for h in HOPS}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
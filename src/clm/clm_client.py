@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 
 from ..http.client import HttpClient
+from .cookie_guard import CookieGuard
 
+CLM_BASE = "https://contract.feishu.cn"
 
 def _dig(d: dict, path: str):
     cur = d
@@ -14,44 +16,93 @@ def _dig(d: dict, path: str):
     return cur
 
 
+def _parse(status: int, data: Any, path: str, empty_msg: str) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    # 同步与异步客户端共用的响应解析：返回 (目标值, 错误码, 错误信息)
+    if status >= 200 and status < 300 and isinstance(data, dict):
+        value = _dig(data, path)
+        if value:
+            return str(value), None, None
+        return None, None, empty_msg
+    if status in (401, 403):
+        return None, status, "AUTH_FAILED" if status == 401 else "PERMISSION_DENIED"
+    if status in (429,) or status >= 500:
+        return None, status, "RETRY_EXCEEDED"
+    return None, status, "UNKNOWN_ERROR"
+
+
 class CLMClient:
-    def __init__(self, http: HttpClient, session_cookie: str) -> None:
+    def __init__(self, http: HttpClient, session_cookie: str, base: str = CLM_BASE, guard: Optional[CookieGuard] = None, doc_version: bool = True) -> None:
         self.http = http
         self.session_cookie = session_cookie
-        self.base = "https://contract.feishu.cn"
+        self.base = base.rstrip("/")
+        # Cookie 失效策略；设置后以 guard 中的 Cookie 为准（暂停策略下可被重新加载）
+        self.guard = guard
+        # 合同详情是否附带文档版本列表；只取 cooperationId 时无需附带，响应体可小一个数量级
+        self.doc_version = doc_version
 
-    def _cookie_headers(self) -> dict:
+    def _cookie(self) -> str:
+        return self.guard.cookie if self.guard is not None else self.session_cookie
+
+    def _cookie_headers(self, cookie: Optional[str] = None) -> dict:
         return {
             "Accept": "application/json",
-            "Cookie": f"session={self.session_cookie}",
+            "Cookie": f"session={cookie if cookie is not None else self._cookie()}",
         }
 
+    def _contract_params(self, contract_id: str) -> dict:
+        return {"contractId": contract_id, "withDocVersion": "true" if self.doc_version else "false"}
+
+    def _get(self, name: str, url: str, params: dict) -> Tuple[int, Any, int]:
+        total = 0
+        while True:
+            if self.guard is not None and not self.guard.wait():
+                # 已按 Cookie 失效策略放弃：不再发请求，直接按 401 返回
+                return 401, None, total
+            cookie = self._cookie()
+            status, data, retries = self.http.get(name, url, self._cookie_headers(cookie), params)
+            total += retries
+            if status != 401 or self.guard is None or not self.guard.on_unauthorized(cookie):
+                return status, data, total
+
     def get_cooperation_id(self, contract_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:
         url = f"{self.base}/clm/api/workflow/composition/contractAndTask"
-        params = {"contractId": contract_id, "withDocVersion": "true"}
-        status, data, retries = self.http.get("contract_info", url, self._cookie_headers(), params)
-        if status >= 200 and status < 300 and isinstance(data, dict):
-            coop_id = _dig(data, "data.contract.contractInfo.cooperationId")
-            if coop_id:
-                return str(coop_id), retries, None, None
-            return None, retries, None, "NO_COOPERATION"
-        if status in (401, 403):
-            return None, retries, status, "AUTH_FAILED" if status == 401 else "PERMISSION_DENIED"
-        if status in (429,) or status >= 500:
-            return None, retries, status, "RETRY_EXCEEDED"
-        return None, retries, status, "UNKNOWN_ERROR"
+        params = self._contract_params(contract_id)
+        status, data, retries = self._get("contract_info", url, params)
+        coop_id, code, msg = _parse(status, data, "data.contract.contractInfo.cooperationId", "NO_COOPERATION")
+        return coop_id, retries, code, msg
 
     def get_open_chat_id(self, cooperation_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:
         url = f"{self.base}/clm/api/cooperation/info"
         params = {"cooperationId": cooperation_id}
-        status, data, retries = self.http.get("cooperation_info", url, self._cookie_headers(), params)
-        if status >= 200 and status < 300 and isinstance(data, dict):
-            chat_id = _dig(data, "data.openChatId")
-            if chat_id:
-                return str(chat_id), retries, None, None
-            return None, retries, None, "NO_CHAT_GROUP"
-        if status in (401, 403):
-            return None, retries, status, "AUTH_FAILED" if status == 401 else "PERMISSION_DENIED"
-        if status in (429,) or status >= 500:
-            return None, retries, status, "RETRY_EXCEEDED"
-        return None, retries, status, "UNKNOWN_ERROR"
+        status, data, retries = self._get("cooperation_info", url, params)
+        chat_id, code, msg = _parse(status, data, "data.openChatId", "NO_CHAT_GROUP")
+        return chat_id, retries, code, msg
+
+
+class AsyncCLMClient(CLMClient):
+    """CLMClient 的 asyncio 版本：http 为 AsyncHttpClient，接口与返回值保持一致。"""
+
+    async def _get(self, name: str, url: str, params: dict) -> Tuple[int, Any, int]:  # type: ignore[override]
+        total = 0
+        while True:
+            if self.guard is not None and not await self.guard.wait_async():
+                return 401, None, total
+            cookie = self._cookie()
+            status, data, retries = await self.http.get(name, url, self._cookie_headers(cookie), params)
+            total += retries
+            if status != 401 or self.guard is None or not await self.guard.on_unauthorized_async(cookie):
+                return status, data, total
+
+    async def get_cooperation_id(self, contract_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:  # type: ignore[override]
+        url = f"{self.base}/clm/api/workflow/composition/contractAndTask"
+        params = self._contract_params(contract_id)
+        status, data, retries = await self._get("contract_info", url, params)
+        coop_id, code, msg = _parse(status, data, "data.contract.contractInfo.cooperationId", "NO_COOPERATION")
+        return coop_id, retries, code, msg
+
+    async def get_open_chat_id(self, cooperation_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:  # type: ignore[override]
+        url = f"{self.base}/clm/api/cooperation/info"
+        params = {"cooperationId": cooperation_id}
+        status, data, retries = await self._get("cooperation_info", url, params)
+        chat_id, code, msg = _parse(status, data, "data.openChatId", "NO_CHAT_GROUP")
+        return chat_id, retries, code, msg
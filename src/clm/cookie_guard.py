@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from ..logger import JsonLogger
+
+COOKIE_POLICIES = ("abort", "pause", "continue")
+
+# 暂停期间等待方检查状态的间隔（秒）
+_WAIT_STEP_S = 0.5
+
+
+class CookieGuard:
+    """CLM session Cookie 失效（接口返回 401）时的全局处理策略，同步与异步客户端共用。
+
+    - abort：停止派发新合同，在途请求直接按 AUTH_FAILED 结束，已完成结果照常写出；
+    - pause：暂停所有 CLM 请求，每 poll_interval_s 重新读取配置，Cookie 更新后以新值重发并继续；
+      超过 pause_timeout_s 仍未更新则转为 abort；
+    - continue：逐个合同记为 AUTH_FAILED。
+    """
+
+    def __init__(
+        self,
+        policy: str,
+        cookie: str,
+        reload: Optional[Callable[[], Optional[str]]] = None,
+        poll_interval_s: float = 10.0,
+        pause_timeout_s: float = 1800.0,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self.policy = policy
+        self.cookie = cookie
+        self.reload = reload
+        self.poll_interval_s = poll_interval_s
+        self.pause_timeout_s = pause_timeout_s
+        self.logger = logger
+        self.aborted = False
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._paused_at = 0.0
+        self._last_poll = 0.0
+
+    def _abort(self, reason: str) -> None:
+        if not self.aborted:
+            self.aborted = True
+            if self.logger is not None:
+                self.logger.error("batch_abort", {"reason": reason, "policy": self.policy})
+        self._resumed.set()
+
+    def _check(self, cookie: str) -> Optional[str]:
+        """处理以 cookie 收到的 401：返回新 Cookie 表示可重发，"" 表示放弃，None 表示仍在暂停中。"""
+        now = time.monotonic()
+        with self._lock:
+            if self.aborted or self.policy == "continue":
+                return ""
+            if cookie != self.cookie:
+                # 其他请求已换上新 Cookie
+                return self.cookie
+            if self.policy == "abort" or self.reload is None:
+                self._abort("cookie_expired")
+                return ""
+            if self._resumed.is_set():
+                self._resumed.clear()
+                self._paused_at = now
+                self._last_poll = 0.0
+                if self.logger is not None:
+                    self.logger.warn("cookie_expired_pause", {"pollIntervalS": self.poll_interval_s, "pauseTimeoutS": self.pause_timeout_s})
+            if now - self._paused_at >= self.pause_timeout_s:
+                self._abort("cookie_pause_timeout")
+                return ""
+            if now - self._last_poll < self.poll_interval_s:
+                return None
+            # 同一时刻只有一个调用方读取配置
+            self._last_poll = now
+        try:
+            new = self.reload()
+        except Exception:
+            new = None
+        with self._lock:
+            if cookie != self.cookie:
+                return self.cookie
+            if not new or new == cookie:
+                return None
+            self.cookie = new
+            self.reloads += 1
+            self._resumed.set()
+            if self.logger is not None:
+                self.logger.info("cookie_reloaded", {"pausedS": round(time.monotonic() - self._paused_at, 1)})
+            return new
+
+    def on_unauthorized(self, cookie: str) -> bool:
+        """请求以 cookie 收到 401 后调用，返回是否应以新 Cookie 重发；暂停策略下阻塞至重新加载或放弃。"""
+        result = self._check(cookie)
+        while result is None:
+            self._resumed.wait(_WAIT_STEP_S)
+            result = self._check(cookie)
+        return bool(result)
+
+    async def on_unauthorized_async(self, cookie: str) -> bool:
+        result = self._check(cookie)
+        while result is None:
+            await asyncio.sleep(_WAIT_STEP_S)
+            result = self._check(cookie)
+        return bool(result)
+
+    def wait(self) -> bool:
+        """请求前调用：暂停期间阻塞，返回 False 表示已放弃（不应再发请求）。"""
+        self._resumed.wait()
+        return not self.aborted
+
+    async def wait_async(self) -> bool:
+        while not self._resumed.is_set():
+            await asyncio.sleep(_WAIT_STEP_S)
+        return not self.aborted
+
+    def stats(self) -> dict:
+        return {"policy": self.policy, "aborted": self.aborted, "reloads": self.reloads}
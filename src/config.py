@@ -3,6 +3,11 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict, List
 
+from .cache import HOPS
+from .clm.cookie_guard import COOKIE_POLICIES
+from .http.decode import JSON_DECODERS
+from .io.dedupe import DEDUPE_MODES
+from .logger import CONSOLE_MODES
 from .models import Status
 
 
@@ -38,6 +43,23 @@ def _validate(cfg: Dict[str, Any]) -> None:
         raise ValueError("rate_limit.* 必须为正整数")
     if not isinstance(rl.get("concurrency"), int) or rl.get("concurrency") < 1:
         raise ValueError("concurrency 必须为 >=1 的整数")
+    if not isinstance(rl.get("burst"), int) or rl.get("burst") < 1:
+        raise ValueError("rate_limit.burst 必须为 >=1 的整数")
+    if not isinstance(rl.get("shared_state_file"), str):
+        raise ValueError("rate_limit.shared_state_file 必须为字符串")
+    ad = rl.get("adaptive") or {}
+    if not isinstance(ad.get("enabled"), bool):
+        raise ValueError("rate_limit.adaptive.enabled 必须为 true/false")
+    if not isinstance(ad.get("decrease_factor"), (int, float)) or not (0 < float(ad.get("decrease_factor")) < 1):
+        raise ValueError("rate_limit.adaptive.decrease_factor 需在 (0,1) 范围内")
+    if not isinstance(ad.get("ceiling_factor"), (int, float)) or float(ad.get("ceiling_factor")) < 1:
+        raise ValueError("rate_limit.adaptive.ceiling_factor 需 >= 1")
+    for key in ("increase_step", "min_qpm"):
+        if not isinstance(ad.get(key), int) or ad.get(key) < 1:
+            raise ValueError(f"rate_limit.adaptive.{key} 必须为 >=1 的整数")
+    for key in ("increase_interval_s", "cooldown_s"):
+        if not isinstance(ad.get(key), (int, float)) or ad.get(key) < 0:
+            raise ValueError(f"rate_limit.adaptive.{key} 必须为非负数")
 
     rt = cfg.get("retry") or {}
     if not isinstance(rt.get("timeout_ms"), int) or rt.get("timeout_ms") <= 0:
@@ -50,29 +72,185 @@ def _validate(cfg: Dict[str, Any]) -> None:
     if not isinstance(rt.get("jitter"), (int, float)) or not (0 <= float(rt.get("jitter")) <= 1):
         raise ValueError("jitter 需在 [0,1] 范围内")
 
-    skip_statuses = rt.get("skip_result_statuses")
-    if not isinstance(skip_statuses, list):
-        raise ValueError("skip_result_statuses 必须为字符串列表")
-    invalid: List[str] = []
-    for item in skip_statuses:
-        if not isinstance(item, str):
-            raise ValueError("skip_result_statuses 中的元素必须为字符串")
-        try:
-            Status(item)
-        except ValueError:
-            invalid.append(item)
-    if invalid:
-        raise ValueError(f"skip_result_statuses 存在无效状态: {', '.join(invalid)}")
+    for key in ("skip_result_statuses", "give_up_statuses", "transient_statuses"):
+        statuses = rt.get(key)
+        if not isinstance(statuses, list):
+            raise ValueError(f"{key} 必须为字符串列表")
+        invalid: List[str] = []
+        for item in statuses:
+            if not isinstance(item, str):
+                raise ValueError(f"{key} 中的元素必须为字符串")
+            try:
+                Status(item)
+            except ValueError:
+                invalid.append(item)
+        if invalid:
+            raise ValueError(f"{key} 存在无效状态: {', '.join(invalid)}")
+    if not isinstance(rt.get("transient_cooldown_s"), (int, float)) or rt.get("transient_cooldown_s") < 0:
+        raise ValueError("transient_cooldown_s 必须为非负数")
+    if not isinstance(rt.get("resume_from_step"), bool):
+        raise ValueError("resume_from_step 必须为布尔值")
 
     files = cfg.get("files") or {}
-    for key in ("input_txt", "output_excel", "log_file"):
+    for key in ("output_excel", "log_file"):
         if not isinstance(files.get(key), str) or not files.get(key):
             raise ValueError(f"files.{key} 不能为空")
+    inp = files.get("input_txt")
+    if isinstance(inp, list):
+        if not inp or any(not isinstance(p, str) or not p for p in inp):
+            raise ValueError("files.input_txt 为列表时不能为空，且每项须为非空路径")
+    elif not isinstance(inp, str) or not inp:
+        raise ValueError("files.input_txt 不能为空")
+
+    sh = cfg.get("shard") or {}
+    if not isinstance(sh.get("count"), int) or sh.get("count") < 1:
+        raise ValueError("shard.count 必须为 >=1 的整数")
+    if not isinstance(sh.get("index"), int) or not (0 <= sh.get("index") < sh.get("count")):
+        raise ValueError("shard.index 需满足 0 <= index < count")
+
+    ic = cfg.get("input") or {}
+    if ic.get("dedupe") not in DEDUPE_MODES:
+        raise ValueError(f"input.dedupe 必须为 {'/'.join(DEDUPE_MODES)} 之一")
+    if not isinstance(ic.get("tmp_dir"), str):
+        raise ValueError("input.tmp_dir 必须为字符串")
+    if files.get("sidecar_format") not in ("", "csv", "parquet"):
+        raise ValueError("files.sidecar_format 必须为空或 csv/parquet 之一")
+
+    pl = cfg.get("pipeline") or {}
+    if pl.get("engine") not in ("pool", "staged", "async"):
+        raise ValueError("pipeline.engine 必须为 pool/staged/async 之一")
+    for key in ("queue_size", "stage_latency_ms", "max_stage_workers", "async_pool_size"):
+        if not isinstance(pl.get(key), int) or pl.get(key) < 1:
+            raise ValueError(f"pipeline.{key} 必须为 >=1 的整数")
+
+    sb = cfg.get("search_batch") or {}
+    if not isinstance(sb.get("enabled"), bool):
+        raise ValueError("search_batch.enabled 必须为 true/false")
+    if not isinstance(sb.get("batch_size"), int) or not (2 <= sb.get("batch_size") <= 50):
+        raise ValueError("search_batch.batch_size 需为 2~50 的整数")
+    if not isinstance(sb.get("max_wait_ms"), int) or sb.get("max_wait_ms") < 0:
+        raise ValueError("search_batch.max_wait_ms 必须为非负整数")
+    if not isinstance(sb.get("field"), str) or not sb.get("field"):
+        raise ValueError("search_batch.field 不能为空")
+
+    pf = cfg.get("prefetch") or {}
+    if not isinstance(pf.get("enabled"), bool):
+        raise ValueError("prefetch.enabled 必须为 true/false")
+    for key in ("index_path", "modified_since_field", "modified_field"):
+        if not isinstance(pf.get(key), str) or not pf.get(key):
+            raise ValueError(f"prefetch.{key} 不能为空")
+    if not isinstance(pf.get("page_size"), int) or not (1 <= pf.get("page_size") <= 50):
+        raise ValueError("prefetch.page_size 需为 1~50 的整数")
+    if not isinstance(pf.get("min_contracts"), int) or pf.get("min_contracts") < 0:
+        raise ValueError("prefetch.min_contracts 必须为非负整数")
+    if not isinstance(pf.get("overlap_s"), (int, float)) or pf.get("overlap_s") < 0:
+        raise ValueError("prefetch.overlap_s 必须为非负数")
+
+    mt = cfg.get("metrics") or {}
+    if not isinstance(mt.get("enabled"), bool):
+        raise ValueError("metrics.enabled 必须为 true/false")
+    if not isinstance(mt.get("host"), str) or not mt.get("host"):
+        raise ValueError("metrics.host 不能为空")
+    if not isinstance(mt.get("port"), int) or not (0 <= mt.get("port") <= 65535):
+        raise ValueError("metrics.port 需为 0~65535 的整数（0 表示不启动 /metrics 服务）")
+
+    co = cfg.get("coalesce") or {}
+    if not isinstance(co.get("enabled"), bool):
+        raise ValueError("coalesce.enabled 必须为 true/false")
+    if not isinstance(co.get("ttl_s"), (int, float)) or co.get("ttl_s") < 0:
+        raise ValueError("coalesce.ttl_s 必须为非负数")
+    if not isinstance(co.get("max_entries"), int) or co.get("max_entries") < 0:
+        raise ValueError("coalesce.max_entries 必须为非负整数")
+
+    sv = cfg.get("serve") or {}
+    if not isinstance(sv.get("host"), str) or not sv.get("host"):
+        raise ValueError("serve.host 不能为空")
+    if not isinstance(sv.get("port"), int) or not (1 <= sv.get("port") <= 65535):
+        raise ValueError("serve.port 需为 1~65535 的整数")
+    if not isinstance(sv.get("max_batch"), int) or sv.get("max_batch") < 1:
+        raise ValueError("serve.max_batch 必须为 >=1 的整数")
+    if not isinstance(sv.get("result_ttl_s"), (int, float)) or sv.get("result_ttl_s") < 0:
+        raise ValueError("serve.result_ttl_s 必须为非负数")
+    if not isinstance(sv.get("result_cache_size"), int) or sv.get("result_cache_size") < 0:
+        raise ValueError("serve.result_cache_size 必须为非负整数")
+
+    ck = cfg.get("checkpoint") or {}
+    if not isinstance(ck.get("enabled"), bool):
+        raise ValueError("checkpoint.enabled 必须为 true/false")
+    if not isinstance(ck.get("journal_file"), str):
+        raise ValueError("checkpoint.journal_file 必须为字符串")
+    for key in ("fsync_every", "fsync_interval_ms"):
+        if not isinstance(ck.get(key), int) or ck.get(key) < 1:
+            raise ValueError(f"checkpoint.{key} 必须为 >=1 的整数")
+
+    cc = cfg.get("cache") or {}
+    if not isinstance(cc.get("enabled"), bool):
+        raise ValueError("cache.enabled 必须为 true/false")
+    if cc.get("enabled") and (not isinstance(cc.get("path"), str) or not cc.get("path")):
+        raise ValueError("cache.path 不能为空")
+    ttl = cc.get("ttl_s")
+    if not isinstance(ttl, dict) or any(h not in HOPS for h in ttl):
+        raise ValueError(f"cache.ttl_s 的键必须为 {'/'.join(HOPS)} 之一")
+    if any(not isinstance(v, (int, float)) or v < 0 for v in ttl.values()) or not isinstance(cc.get("negative_ttl_s"), (int, float)) or cc.get("negative_ttl_s") < 0:
+        raise ValueError("cache 的 TTL 必须为非负数（秒，0 表示不使用缓存）")
+    inv = cc.get("invalidate")
+    if not isinstance(inv, list) or any(h not in HOPS + ("all",) for h in inv):
+        raise ValueError(f"cache.invalidate 的元素必须为 {'/'.join(HOPS)}/all 之一")
+
+    hc = cfg.get("http") or {}
+    for key in ("pool_maxsize", "warmup_connections"):
+        if not isinstance(hc.get(key), int) or hc.get(key) < 0:
+            raise ValueError(f"http.{key} 必须为非负整数")
+    if not isinstance(hc.get("idle_timeout_s"), (int, float)) or hc.get("idle_timeout_s") < 0:
+        raise ValueError("http.idle_timeout_s 必须为非负数")
+    for key in ("keep_alive", "warmup", "timing_log"):
+        if not isinstance(hc.get(key), bool):
+            raise ValueError(f"http.{key} 必须为 true/false")
+    if hc.get("json_decoder") not in JSON_DECODERS:
+        raise ValueError(f"http.json_decoder 仅支持: {', '.join(JSON_DECODERS)}")
+
+    au = cfg.get("auth") or {}
+    if not isinstance(au.get("token_cache_file"), str):
+        raise ValueError("auth.token_cache_file 必须为字符串")
+    if not isinstance(au.get("refresh_ahead_s"), (int, float)) or au.get("refresh_ahead_s") < 0:
+        raise ValueError("auth.refresh_ahead_s 必须为非负数")
+    if au.get("cookie_policy") not in COOKIE_POLICIES:
+        raise ValueError(f"auth.cookie_policy 仅支持: {', '.join(COOKIE_POLICIES)}")
+    for key in ("cookie_poll_interval_s", "cookie_pause_timeout_s"):
+        if not isinstance(au.get(key), (int, float)) or au.get(key) <= 0:
+            raise ValueError(f"auth.{key} 必须为正数")
+
+    cb = cfg.get("circuit_breaker") or {}
+    if not isinstance(cb.get("enabled"), bool):
+        raise ValueError("circuit_breaker.enabled 必须为 true/false")
+    if not isinstance(cb.get("failure_rate"), (int, float)) or not (0 < float(cb.get("failure_rate")) <= 1):
+        raise ValueError("circuit_breaker.failure_rate 需在 (0,1] 范围内")
+    for key in ("min_requests", "half_open_max"):
+        if not isinstance(cb.get(key), int) or cb.get(key) < 1:
+            raise ValueError(f"circuit_breaker.{key} 必须为 >=1 的整数")
+    for key in ("window_s", "open_s"):
+        if not isinstance(cb.get(key), (int, float)) or cb.get(key) <= 0:
+            raise ValueError(f"circuit_breaker.{key} 必须为正数")
+
+    ep = cfg.get("endpoints") or {}
+    for key in ("openapi_base", "clm_base"):
+        v = ep.get(key)
+        if not isinstance(v, str) or not v.startswith(("http://", "https://")):
+            raise ValueError(f"endpoints.{key} 必须为 http(s):// 开头的地址")
+    if not isinstance(ep.get("clm_doc_version"), bool):
+        raise ValueError("endpoints.clm_doc_version 必须为 true/false")
 
     log_cfg = cfg.get("log") or {}
     lvl = log_cfg.get("level") or "INFO"
     if not isinstance(lvl, str) or lvl.upper() not in ("DEBUG", "INFO", "WARN", "ERROR"):
         raise ValueError("log.level 必须为 DEBUG/INFO/WARN/ERROR 之一")
+    if not isinstance(log_cfg.get("async"), bool):
+        raise ValueError("log.async 必须为 true/false")
+    if log_cfg.get("console") not in CONSOLE_MODES:
+        raise ValueError("log.console 必须为 on/off/sample 之一")
+    for key in ("queue_size", "flush_interval_ms", "console_sample_every"):
+        if not isinstance(log_cfg.get(key), int) or log_cfg.get(key) < 1:
+            raise ValueError(f"log.{key} 必须为 >=1 的整数")
 
 
 def load_config(path: str) -> Dict[str, Any]:
@@ -93,11 +271,22 @@ def load_config(path: str) -> Dict[str, Any]:
             "input_txt": "./input/contracts.txt",
             "output_excel": "./output/contract_openChatId.xlsx",
             "log_file": "./logs/run.log",
+            "sidecar_format": "",
         },
         "auth": {
             "app_id": "",
             "app_secret": "",
             "cookies": {"session": ""},
+            "token_cache_file": "",
+            "refresh_ahead_s": 0,
+            "cookie_policy": "continue",
+            "cookie_poll_interval_s": 10,
+            "cookie_pause_timeout_s": 1800,
+        },
+        "endpoints": {
+            "openapi_base": "https://open.feishu.cn",
+            "clm_base": "https://contract.feishu.cn",
+            "clm_doc_version": True,
         },
         "rate_limit": {
             "global_qpm": 60,
@@ -105,6 +294,17 @@ def load_config(path: str) -> Dict[str, Any]:
             "contract_info_qpm": 60,
             "cooperation_info_qpm": 60,
             "concurrency": 1,
+            "burst": 1,
+            "shared_state_file": "",
+            "adaptive": {
+                "enabled": False,
+                "decrease_factor": 0.5,
+                "increase_step": 5,
+                "increase_interval_s": 10,
+                "cooldown_s": 5,
+                "ceiling_factor": 1.0,
+                "min_qpm": 1,
+            },
         },
         "retry": {
             "timeout_ms": 8000,
@@ -118,9 +318,99 @@ def load_config(path: str) -> Dict[str, Any]:
                 Status.NO_COOPERATION.value,
                 Status.NO_CHAT_GROUP.value,
             ],
+            "give_up_statuses": [],
+            "transient_statuses": [],
+            "transient_cooldown_s": 60,
+            "resume_from_step": True,
+        },
+        "pipeline": {
+            "engine": "pool",
+            "queue_size": 64,
+            "stage_latency_ms": 1000,
+            "max_stage_workers": 16,
+            "async_pool_size": 100,
+        },
+        "shard": {
+            "index": 0,
+            "count": 1,
+        },
+        "input": {
+            "dedupe": "memory",
+            "tmp_dir": "",
+        },
+        "search_batch": {
+            "enabled": False,
+            "batch_size": 20,
+            "max_wait_ms": 50,
+            "field": "contract_numbers",
+        },
+        "prefetch": {
+            "enabled": False,
+            "index_path": "./output/contract_index.sqlite3",
+            "min_contracts": 0,
+            "page_size": 50,
+            "modified_since_field": "update_time_start",
+            "modified_field": "update_time",
+            "overlap_s": 300,
+        },
+        "circuit_breaker": {
+            "enabled": False,
+            "failure_rate": 0.5,
+            "min_requests": 20,
+            "window_s": 30,
+            "open_s": 30,
+            "half_open_max": 1,
+        },
+        "metrics": {
+            "enabled": True,
+            "host": "127.0.0.1",
+            "port": 0,
+        },
+        "coalesce": {
+            "enabled": True,
+            "ttl_s": 600,
+            "max_entries": 100000,
+        },
+        "serve": {
+            "host": "127.0.0.1",
+            "port": 8787,
+            "max_batch": 1000,
+            "result_ttl_s": 300,
+            "result_cache_size": 100000,
+        },
+        "checkpoint": {
+            "enabled": False,
+            "journal_file": "",
+            "fsync_every": 100,
+            "fsync_interval_ms": 1000,
+        },
+        "cache": {
+            "enabled": False,
+            "path": "./output/resolution_cache.sqlite3",
+            "ttl_s": {
+                "search": 30 * 86400,
+                "contract_info": 30 * 86400,
+                "coop_info": 7 * 86400,
+            },
+            "negative_ttl_s": 86400,
+            "invalidate": [],
+        },
+        "http": {
+            "pool_maxsize": 0,
+            "keep_alive": True,
+            "idle_timeout_s": 50,
+            "warmup": False,
+            "warmup_connections": 4,
+            "timing_log": False,
+            "json_decoder": "auto",
         },
         "log": {
             "level": "DEBUG",
+            "async": False,
+            "queue_size": 10000,
+            "flush_interval_ms": 200,
+            "console": "on",
+            "console_sample_every": 100,
         },
     }
 
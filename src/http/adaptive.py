@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from ..logger import JsonLogger
+from .rate_limiter import RateLimiter
+
+
+# 飞书 OpenAPI 频控业务码
+THROTTLE_CODES = (99991400, 9499)
+
+
+def is_throttled(status: int, data: Any) -> bool:
+    if status == 429:
+        return True
+    if isinstance(data, dict):
+        try:
+            return data.get("code") in THROTTLE_CODES
+        except Exception:
+            return False
+    return False
+
+
+def retry_after_seconds(headers: Any) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期）与 x-ogw-ratelimit-reset（当前频控窗口剩余秒数）。"""
+    if not headers:
+        return None
+    for key in ("x-ogw-ratelimit-reset", "Retry-After"):
+        raw = headers.get(key)
+        if raw is None:
+            continue
+        raw = str(raw).strip()
+        try:
+            return max(0.0, float(raw))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(raw)
+        except (TypeError, ValueError):
+            continue
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    return None
+
+
+class AdaptiveRateController:
+    """AIMD 限速：命中频控时按 decrease_factor 乘性下调对应桶的 QPM，
+    此后每 increase_interval_s 无频控则加性上调 increase_step，直至 ceiling。
+
+    同一桶在 cooldown_s 内只下调一次，避免同一轮在途请求的多个 429 把速率连续减半。
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        ceilings: Dict[str, int],
+        decrease_factor: float = 0.5,
+        increase_step: int = 5,
+        increase_interval_s: float = 10.0,
+        cooldown_s: float = 5.0,
+        min_qpm: int = 1,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self.limiter = limiter
+        self.ceilings = dict(ceilings)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.increase_interval_s = increase_interval_s
+        self.cooldown_s = cooldown_s
+        self.min_qpm = max(1, min_qpm)
+        self.logger = logger
+        self._lock = threading.Lock()
+        # 启动后先以配置 QPM 运行满一个调整周期，再开始向上探测
+        started = time.monotonic()
+        self._last_change: Dict[str, float] = {name: started for name in self.ceilings}
+        self._last_decrease: Dict[str, float] = {}
+
+    def _set(self, name: str, old: int, new: int, reason: str) -> None:
+        self.limiter.set_qpm(name, new)
+        if self.logger:
+            self.logger.info("rate_adjust", {"bucket": name, "fromQpm": old, "toQpm": new, "reason": reason})
+
+    def on_throttle(self, name: str) -> None:
+        if name not in self.ceilings:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_decrease.get(name, -1e9) < self.cooldown_s:
+                return
+            old = self.limiter.get_qpm(name)
+            new = max(self.min_qpm, int(old * self.decrease_factor))
+            self._last_decrease[name] = now
+            self._last_change[name] = now
+            if new == old:
+                return
+        self._set(name, old, new, "throttled")
+
+    def on_success(self, name: str) -> None:
+        ceiling = self.ceilings.get(name)
+        if ceiling is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_change.get(name, 0.0) < self.increase_interval_s:
+                return
+            old = self.limiter.get_qpm(name)
+            self._last_change[name] = now
+            if old >= ceiling:
+                return
+            new = min(ceiling, old + self.increase_step)
+        self._set(name, old, new, "recover")
+
+
+def observe_response(limiter: RateLimiter, controller: Optional[AdaptiveRateController], name: str, status: int, data: Any, headers: Any) -> None:
+    """同步/异步客户端共用：频控响应推迟对应桶至服务端给出的重置时刻并通知自适应限速；成功响应用于逐步恢复速率。"""
+    if is_throttled(status, data):
+        wait = retry_after_seconds(headers)
+        if wait:
+            limiter.defer(name or "global", wait)
+        if controller:
+            controller.on_throttle(name)
+    elif controller and status >= 200 and status < 300:
+        controller.on_success(name)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .. import profiling
+from ..logger import JsonLogger
+from ..metrics import RunMetrics
+from .adaptive import AdaptiveRateController, observe_response
+from .breaker import CIRCUIT_OPEN_STATUS, CircuitBreakers
+from .decode import decode_body, json_loader
+from .rate_limiter import RateLimiter
+from .retry import Retryer
+
+
+class AsyncHttpClient:
+    """基于 aiohttp 的异步 HTTP 客户端，接口与 HttpClient 一致（get/post_json 返回 (status, data, retries)）。
+
+    单个事件循环即可维持数百个在途请求；连接池总量与单主机上限由 pool_size 约束。
+    会话在首次请求时于当前事件循环内创建，用毕需 await close()。
+    传入 logger 时与 HttpClient 一样逐请求输出 http_timing 日志（建连耗时取自 aiohttp 连接追踪，含 TLS，tlsMs 恒为空）。
+    """
+
+    def __init__(self, timeout_ms: int, limiter: RateLimiter, retryer: Retryer, pool_size: int = 100, keep_alive: bool = True, idle_timeout_s: float = 0.0, controller: Optional[AdaptiveRateController] = None, metrics: Optional[RunMetrics] = None, breakers: Optional[CircuitBreakers] = None, loads: Optional[Callable[[bytes], Any]] = None, logger: Optional[JsonLogger] = None) -> None:
+        try:
+            import aiohttp  # type: ignore
+        except Exception as e:  # pragma: no cover
+            raise RuntimeError("pipeline.engine: async 缺少依赖 aiohttp，请先安装: pip install aiohttp（或 pip install -r requirements.txt）") from e
+        self._aiohttp = aiohttp
+        self.timeout = timeout_ms / 1000.0
+        self.limiter = limiter
+        self.retryer = retryer
+        self.pool_size = max(1, pool_size)
+        self.keep_alive = keep_alive
+        self.idle_timeout_s = idle_timeout_s
+        self.controller = controller
+        self.metrics = metrics
+        self.breakers = breakers
+        self.loads = loads or json_loader("json")
+        self.logger = logger
+        self._session: Optional[Any] = None
+
+    def _trace_config(self) -> Any:
+        # 按请求记录新建连接的耗时，复用已有连接时不触发
+        async def on_create_start(session: Any, ctx: Any, params: Any) -> None:
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx["connect_started"] = time.perf_counter()
+
+        async def on_create_end(session: Any, ctx: Any, params: Any) -> None:
+            timing = ctx.trace_request_ctx
+            if timing is not None and "connect_started" in timing:
+                timing["connectMs"] = round((time.perf_counter() - timing["connect_started"]) * 1000, 2)
+
+        trace = self._aiohttp.TraceConfig()
+        trace.on_connection_create_start.append(on_create_start)
+        trace.on_connection_create_end.append(on_create_end)
+        return trace
+
+    def _get_session(self) -> Any:
+        if self._session is None:
+            aiohttp = self._aiohttp
+            if not self.keep_alive:
+                connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size, force_close=True)
+            else:
+                # 空闲连接超过 idle_timeout_s 即关闭；未配置时沿用 aiohttp 默认值
+                extra = {"keepalive_timeout": self.idle_timeout_s} if self.idle_timeout_s > 0 else {}
+                connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size, **extra)
+            traces = [self._trace_config()] if self.logger is not None else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout), trace_configs=traces)
+        return self._session
+
+    async def warm_up(self, base_urls: List[str], connections: int) -> None:
+        """预先建立到各主机的连接：并发请求根路径，不经过限流器，也不消耗接口配额；失败忽略。"""
+        session = self._get_session()
+
+        async def touch(url: str) -> None:
+            try:
+                async with session.head(url) as resp:
+                    await resp.read()
+            except (self._aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+
+        await asyncio.gather(*(touch(u) for u in base_urls for _ in range(max(1, connections))))
+
+    def _log_timing(self, name: str, method: str, status: int, timing: Dict[str, Any], started: float, finished: float, body: Optional[Dict[str, Any]] = None) -> None:
+        connect_ms = timing.get("connectMs")
+        headers_at = timing.get("headers_at")
+        self.logger.debug("http_timing", {  # type: ignore[union-attr]
+            "endpoint": name,
+            "method": method,
+            "httpStatus": status,
+            "reused": connect_ms is None,
+            "connectMs": connect_ms,
+            "tlsMs": None,
+            "ttfbMs": round((headers_at - started) * 1000, 2) if headers_at is not None else None,
+            "totalMs": round((finished - started) * 1000, 2),
+            **(body or {}),
+        })
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _retryable(self, status: int) -> bool:
+        # 熔断快速失败不重试
+        if status == CIRCUIT_OPEN_STATUS:
+            return False
+        return status in (429,) or status >= 500 or status == 0
+
+    async def _request(self, name: str, method: str, url: str, headers: Dict[str, str], body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, int]:
+        session = self._get_session()
+        m = self.metrics
+        breaker = self.breakers.get(name) if self.breakers is not None and name else None
+
+        async def call() -> Tuple[int, Any]:
+            if breaker is not None and not breaker.allow():
+                return CIRCUIT_OPEN_STATUS, None
+            waited = time.perf_counter()
+            await self.limiter.acquire_many_async(("global", name) if name else ("global",))
+            started = time.perf_counter()
+            if m is not None:
+                m.limiter_wait.observe(name, value=started - waited)
+                m.http_in_flight.inc(name)
+            timing: Optional[Dict[str, Any]] = {} if self.logger is not None else None
+            try:
+                async with session.request(method, url, headers=headers, json=body, params=params, trace_request_ctx=timing) as resp:
+                    if timing is not None:
+                        timing["headers_at"] = time.perf_counter()
+                    status = resp.status
+                    resp_headers = resp.headers
+                    content = await resp.read()
+                    # 压缩传输时为解压前的字节数（旧版本 aiohttp 无该计数，按解压后计）
+                    wire = getattr(resp.content, "total_raw_bytes", 0) or len(content)
+            except (self._aiohttp.ClientError, asyncio.TimeoutError):
+                status = 0
+            finally:
+                if m is not None:
+                    m.http_in_flight.dec(name)
+            finished = time.perf_counter()
+            if m is not None:
+                m.http_duration.observe(name, value=finished - started)
+                m.http_responses.inc(name, status)
+            if breaker is not None:
+                breaker.record(status)
+            if status == 0:
+                if timing is not None:
+                    self._log_timing(name, method, 0, timing, started, finished)
+                return 0, None
+            data = decode_body(content, status, self.loads)
+            parse_s = time.perf_counter() - finished
+            if m is not None:
+                m.observe_body(name, wire, len(content), parse_s)
+            if timing is not None:
+                self._log_timing(name, method, status, timing, started, finished, {
+                    "wireBytes": wire, "bytes": len(content), "parseMs": round(parse_s * 1000, 3),
+                })
+            p = profiling.active()
+            if p is not None:
+                p.add("http_io", finished - started)
+                p.add("json_parse", parse_s)
+            observe_response(self.limiter, self.controller, name, status, data, resp_headers)
+            return status, data
+
+        status, data, retries = await self.retryer.run_async(call, self._retryable)
+        if m is not None and retries:
+            m.http_retries.inc(name, amount=retries)
+        return status, data, retries
+
+    async def post_json(self, name: str, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any, int]:
+        return await self._request(name, "POST", url, headers, body=body, params=None)
+
+    async def get(self, name: str, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, int]:
+        return await self._request(name, "GET", url, headers, body=None, params=params)
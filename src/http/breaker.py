@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..logger import JsonLogger
+
+# 熔断打开时不发请求，直接返回该伪状态码；不参与重试，上层按 5xx 映射为 RETRY_EXCEEDED
+CIRCUIT_OPEN_STATUS = 599
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(status: int) -> bool:
+    # 只统计服务端故障（网络错误/超时与 5xx）；429 由限流器处理，4xx 为业务结果
+    return status == 0 or (status >= 500 and status != CIRCUIT_OPEN_STATUS)
+
+
+class CircuitBreaker:
+    """单个接口的熔断器。
+
+    closed：统计最近 window_s 内的请求，样本数不少于 min_requests 且失败率达到 failure_rate 时打开；
+    open：open_s 内的请求直接快速失败；到期后转为 half_open；
+    half_open：最多放行 half_open_max 个探测请求，探测成功则关闭，失败则重新打开。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_requests: int = 20,
+        window_s: float = 30.0,
+        open_s: float = 30.0,
+        half_open_max: int = 1,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = max(1, min_requests)
+        self.window_s = window_s
+        self.open_s = open_s
+        self.half_open_max = max(1, half_open_max)
+        self.logger = logger
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._events: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opens = 0
+        self.rejected = 0
+
+    def _transition(self, state: str, extra: Optional[Dict] = None) -> None:
+        self.state = state
+        if self.logger is not None:
+            log = self.logger.warn if state == OPEN else self.logger.info
+            log(f"circuit_{state}", dict({"endpoint": self.name}, **(extra or {})))
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now - self._opened_at >= self.open_s:
+                self._probes = 0
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_max:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, status: int) -> None:
+        failed = is_failure(status)
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now, {"probe": "failed"})
+                else:
+                    self._events.clear()
+                    self._failures = 0
+                    self._transition(CLOSED)
+                return
+            if self.state == OPEN:
+                # 打开前已发出的请求陆续返回，不再计入
+                return
+            self._events.append((now, failed))
+            self._failures += failed
+            while self._events and now - self._events[0][0] > self.window_s:
+                self._failures -= self._events.popleft()[1]
+            n = len(self._events)
+            if n >= self.min_requests and self._failures >= self.failure_rate * n:
+                self._open(now, {"requests": n, "failures": self._failures})
+
+    def _open(self, now: float, extra: Dict) -> None:
+        self._opened_at = now
+        self._events.clear()
+        self._failures = 0
+        self.opens += 1
+        self._transition(OPEN, dict(extra, openS=self.open_s))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"state": self.state, "opens": self.opens, "rejected": self.rejected}
+
+
+class CircuitBreakers:
+    """按接口名（与限流桶同名）惰性创建熔断器，同步与异步客户端共用。"""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_requests: int = 20,
+        window_s: float = 30.0,
+        open_s: float = 30.0,
+        half_open_max: int = 1,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self._params = (failure_rate, min_requests, window_s, open_s, half_open_max)
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        b = self._breakers.get(name)
+        if b is None:
+            with self._lock:
+                b = self._breakers.get(name)
+                if b is None:
+                    b = self._breakers[name] = CircuitBreaker(name, *self._params, logger=self.logger)
+        return b
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.name: b.stats() for b in breakers}
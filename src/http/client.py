@@ -1,45 +1,130 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 
+from .. import profiling
+from ..logger import JsonLogger
+from ..metrics import RunMetrics
+from .adaptive import AdaptiveRateController, observe_response
+from .breaker import CIRCUIT_OPEN_STATUS, CircuitBreakers
+from .decode import decode_body, json_loader
 from .rate_limiter import RateLimiter
 from .retry import Retryer
+from .transport import PooledAdapter, last_timing, reset_timing
 
 
 class HttpClient:
-    def __init__(self, timeout_ms: int, limiter: RateLimiter, retryer: Retryer) -> None:
+    def __init__(
+        self,
+        timeout_ms: int,
+        limiter: RateLimiter,
+        retryer: Retryer,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        idle_timeout_s: float = 0.0,
+        logger: Optional[JsonLogger] = None,
+        controller: Optional[AdaptiveRateController] = None,
+        metrics: Optional[RunMetrics] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        loads: Optional[Callable[[bytes], Any]] = None,
+    ) -> None:
         self.session = requests.Session()
+        # 每个主机独立一个连接池，容量为 pool_maxsize；并发度高于池容量时多出的连接用完即关，造成反复握手
+        adapter = PooledAdapter(pool_maxsize, idle_timeout_s)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
         self.timeout = timeout_ms / 1000.0
         self.limiter = limiter
         self.retryer = retryer
+        self.logger = logger
+        self.controller = controller
+        self.metrics = metrics
+        self.breakers = breakers
+        # 响应 JSON 解码函数（orjson 或标准库）
+        self.loads = loads or json_loader("json")
 
     def _retryable(self, status: int) -> bool:
+        # 熔断快速失败不重试
+        if status == CIRCUIT_OPEN_STATUS:
+            return False
         return status in (429,) or status >= 500 or status == 0
 
+    def _log_timing(self, name: str, method: str, status: int, resp: Optional[requests.Response], started: float, finished: float, body: Optional[Dict[str, Any]] = None) -> None:
+        timing = last_timing()
+        self.logger.debug("http_timing", {  # type: ignore[union-attr]
+            "endpoint": name,
+            "method": method,
+            "httpStatus": status,
+            "reused": timing["connectMs"] is None,
+            "connectMs": timing["connectMs"],
+            "tlsMs": timing["tlsMs"],
+            "ttfbMs": round(resp.elapsed.total_seconds() * 1000, 2) if resp is not None else None,
+            "totalMs": round((finished - started) * 1000, 2),
+            **(body or {}),
+        })
+
     def _request(self, name: str, method: str, url: str, headers: Dict[str, str], body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, int]:
+        m = self.metrics
+        breaker = self.breakers.get(name) if self.breakers is not None and name else None
+
         def call() -> Tuple[int, Any]:
-            self.limiter.acquire("global")
-            if name:
-                self.limiter.acquire(name)
+            if breaker is not None and not breaker.allow():
+                return CIRCUIT_OPEN_STATUS, None
+            waited = time.perf_counter()
+            self.limiter.acquire_many(("global", name) if name else ("global",))
+            reset_timing()
+            started = time.perf_counter()
+            if m is not None:
+                m.limiter_wait.observe(name, value=started - waited)
+                m.http_in_flight.inc(name)
             try:
                 resp = self.session.request(method=method, url=url, headers=headers, json=body, params=params, timeout=self.timeout)
             except requests.RequestException:
+                if m is not None:
+                    m.http_in_flight.dec(name)
+                    m.http_duration.observe(name, value=time.perf_counter() - started)
+                    m.http_responses.inc(name, 0)
+                if self.logger:
+                    self._log_timing(name, method, 0, None, started, time.perf_counter())
+                if breaker is not None:
+                    breaker.record(0)
                 return 0, None
+            finished = time.perf_counter()
             status = resp.status_code
-            if status >= 200 and status < 300:
-                try:
-                    return status, resp.json()
-                except ValueError:
-                    return status, None
-            else:
-                try:
-                    return status, resp.json()
-                except ValueError:
-                    return status, resp.text
+            if breaker is not None:
+                breaker.record(status)
+            content = resp.content
+            data = decode_body(content, status, self.loads)
+            parse_s = time.perf_counter() - finished
+            p = profiling.active()
+            if p is not None:
+                p.add("http_io", finished - started)
+                p.add("json_parse", parse_s)
+            try:
+                # 压缩传输时为解压前的字节数
+                wire = resp.raw.tell() or len(content)
+            except Exception:
+                wire = len(content)
+            if m is not None:
+                m.http_in_flight.dec(name)
+                m.http_duration.observe(name, value=finished - started)
+                m.http_responses.inc(name, status)
+                m.observe_body(name, wire, len(content), parse_s)
+            if self.logger:
+                self._log_timing(name, method, status, resp, started, finished, {
+                    "wireBytes": wire, "bytes": len(content), "parseMs": round(parse_s * 1000, 3),
+                })
+            observe_response(self.limiter, self.controller, name, status, data, resp.headers)
+            return status, data
         status, data, retries = self.retryer.run(call, self._retryable)
+        if m is not None and retries:
+            m.http_retries.inc(name, amount=retries)
         return status, data, retries
 
     def post_json(self, name: str, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any, int]:
@@ -47,3 +132,15 @@ class HttpClient:
 
     def get(self, name: str, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any, int]:
         return self._request(name, "GET", url, headers, body=None, params=params)
+
+    def warm_up(self, base_urls: List[str], connections: int) -> None:
+        """预先建立到各主机的连接：并发请求根路径，不经过限流器，也不消耗接口配额；失败忽略。"""
+        def touch(url: str) -> None:
+            try:
+                self.session.head(url, timeout=self.timeout)
+            except requests.RequestException:
+                pass
+
+        targets = [u for u in base_urls for _ in range(max(1, connections))]
+        with ThreadPoolExecutor(max_workers=max(1, min(len(targets), 64)), thread_name_prefix="warmup") as pool:
+            list(pool.map(touch, targets))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+JSON_DECODERS = ("auto", "orjson", "json")
+
+
+def json_loader(name: str = "auto") -> Callable[[bytes], Any]:
+    """返回 bytes → 对象的 JSON 解码函数：auto 在安装了 orjson 时使用 orjson，否则使用标准库。"""
+    if name == "json":
+        return json.loads
+    try:
+        import orjson  # type: ignore
+    except ImportError:
+        if name == "orjson":
+            raise RuntimeError("缺少依赖 orjson，请先安装: pip install orjson")
+        return json.loads
+    return orjson.loads
+
+
+def decode_body(body: bytes, status: int, loads: Callable[[bytes], Any]) -> Any:
+    """同步/异步客户端共用的响应解码：非 JSON 响应在 2xx 时为 None，其余为文本。"""
+    try:
+        return loads(body)
+    except ValueError:
+        return None if 200 <= status < 300 else body.decode("utf-8", "replace")
@@ -1,51 +1,231 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 import threading
 import time
-from typing import Dict
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .. import profiling
+
+
+# 每个桶保留的最近等待样本数（用于计算 p99）
+_WAIT_SAMPLES = 4096
 
 
 class _Bucket:
-    def __init__(self, qpm: int) -> None:
+    """令牌桶（GCRA 形式）：只记录“理论到达时间” tat，每次预约 O(1)，无需后台补充令牌。
+
+    burst 为桶容量：空闲一段时间后最多可立即放行 burst 个请求，之后按 60/qpm 的间隔匀速放行。
+    预约只在锁内做常数次运算，等待（sleep）一律在锁外进行。
+    """
+
+    def __init__(self, qpm: int, burst: int = 1) -> None:
         self.qpm = max(1, qpm)
         self.interval = 60.0 / float(self.qpm)
+        self.burst = max(1, burst)
         self._lock = threading.Lock()
-        self._next_time = 0.0
+        self._tat = 0.0
+        self.acquires = 0
+        self.blocked = 0
+        self.wait_total = 0.0
+        self._waits: "deque[float]" = deque(maxlen=_WAIT_SAMPLES)
 
-    def acquire(self) -> float:
-        with self._lock:
-            now = time.time()
-            if now < self._next_time:
-                to_sleep = self._next_time - now
-                self._next_time += self.interval
-                return to_sleep
-            self._next_time = now + self.interval
-            return 0.0
+    # _earliest/_reserve 需在持有 _lock 时调用
+
+    def _earliest(self, now: float) -> float:
+        return max(now, self._tat - (self.burst - 1) * self.interval)
+
+    def _reserve(self, now: float, wait: float) -> None:
+        # 在 now 时刻占用一个令牌；wait 为本次获取中由本桶造成的累计等待，仅用于统计
+        self._tat = max(self._tat, now) + self.interval
+        self.acquires += 1
+        if wait > 0:
+            self.blocked += 1
+            self.wait_total += wait
+        self._waits.append(wait)
 
     def update_qpm(self, qpm: int) -> None:
         with self._lock:
             self.qpm = max(1, qpm)
             self.interval = 60.0 / float(self.qpm)
 
+    def defer(self, seconds: float) -> None:
+        # 服务端要求暂停时（Retry-After 等），将最早可用时刻推迟到 now + seconds，且不保留突发额度
+        with self._lock:
+            self._tat = max(self._tat, time.monotonic() + seconds + (self.burst - 1) * self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            acquires, blocked, total = self.acquires, self.blocked, self.wait_total
+        p99 = waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0
+        return {
+            "qpm": self.qpm,
+            "burst": self.burst,
+            "acquires": acquires,
+            "blocked": blocked,
+            "wait_total_ms": round(total * 1000, 1),
+            "wait_p99_ms": round(p99 * 1000, 1),
+        }
+
 
 class RateLimiter:
-    def __init__(self, qpm_map: Dict[str, int]) -> None:
+    def __init__(self, qpm_map: Dict[str, int], burst: int = 1) -> None:
         self._lock = threading.Lock()
+        self.burst = max(1, burst)
         self._buckets: Dict[str, _Bucket] = {}
         for name, qpm in qpm_map.items():
-            self._buckets[name] = _Bucket(qpm)
+            self._buckets[name] = _Bucket(qpm, self.burst)
 
-    def acquire(self, name: str) -> None:
-        b = self._buckets.get(name)
-        if not b:
-            return
-        to_sleep = b.acquire()
-        if to_sleep > 0:
+    def reserve(self, names: Iterable[str], waited: Optional[Dict[str, float]] = None) -> float:
+        """所有桶当前都有令牌时原子地各占用一个并返回 0；否则不占用任何令牌，返回最慢的桶还需等待的秒数。
+
+        调用方等待后重新预约。各桶按名称顺序加锁；只在全部就绪时才占用，
+        因此慢接口的积压不会把 global 桶推到未来、拖慢其他接口，也不会白白占用已拿到的 global 令牌。
+        waited 按桶名累计本次获取中各桶造成的等待，用于统计。
+        """
+        names = sorted(n for n in set(names) if n in self._buckets)
+        if not names:
+            return 0.0
+        waited = waited if waited is not None else {}
+        buckets: List[_Bucket] = [self._buckets[n] for n in names]
+        for b in buckets:
+            b._lock.acquire()
+        try:
+            now = time.monotonic()
+            owns = [b._earliest(now) - now for b in buckets]
+            wait = max(owns)
+            if wait > 0:
+                for n, own in zip(names, owns):
+                    if own > 0:
+                        waited[n] = waited.get(n, 0.0) + own
+                return wait
+            for n, b in zip(names, buckets):
+                b._reserve(now, waited.get(n, 0.0))
+        finally:
+            for b in reversed(buckets):
+                b._lock.release()
+        return 0.0
+
+    def acquire_many(self, names: Iterable[str]) -> None:
+        names = tuple(names)
+        waited: Dict[str, float] = {}
+        slept = 0.0
+        while True:
+            to_sleep = self.reserve(names, waited)
+            if to_sleep <= 0:
+                break
             time.sleep(to_sleep)
+            slept += to_sleep
+        if slept > 0:
+            p = profiling.active()
+            if p is not None:
+                p.add("rate_limit_wait", slept)
+
+    def acquire(self, name: str) -> None:
+        self.acquire_many((name,))
+
+    async def acquire_many_async(self, names: Iterable[str]) -> None:
+        # 令牌预约本身不阻塞，仅将等待改为 asyncio.sleep，不占用事件循环
+        names = tuple(names)
+        waited: Dict[str, float] = {}
+        slept = 0.0
+        while True:
+            to_sleep = self.reserve(names, waited)
+            if to_sleep <= 0:
+                break
+            await asyncio.sleep(to_sleep)
+            slept += to_sleep
+        if slept > 0:
+            p = profiling.active()
+            if p is not None:
+                p.add("rate_limit_wait", slept)
+
+    async def acquire_async(self, name: str) -> None:
+        await self.acquire_many_async((name,))
 
     def set_qpm(self, name: str, qpm: int) -> None:
         with self._lock:
             if name not in self._buckets:
-                self._buckets[name] = _Bucket(qpm)
+                self._buckets[name] = _Bucket(qpm, self.burst)
             else:
                 self._buckets[name].update_qpm(qpm)
+
+    def get_qpm(self, name: str) -> int:
+        b = self._buckets.get(name)
+        return b.qpm if b else 0
+
+    def defer(self, name: str, seconds: float) -> None:
+        b = self._buckets.get(name)
+        if b and seconds > 0:
+            b.defer(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各桶的等待统计：acquires/blocked 次数、累计等待与 p99 等待（毫秒），用于判断哪个配额是瓶颈。"""
+        return {name: b.stats() for name, b in list(self._buckets.items())}
+
+    def close(self) -> None:
+        pass
+
+
+class SharedRateLimiter(RateLimiter):
+    """本机多进程共享配额的限流器：各桶的 tat 保存在共享状态文件中，预约时以 flock 串行化。
+
+    所有进程使用相同的 QPM 配置时，合计速率不超过配置值；状态文件中记录的是墙钟时间，
+    进程重启或机器重启后仍可继续使用。仅支持提供 fcntl 的平台（Linux/macOS）。
+    """
+
+    def __init__(self, qpm_map: Dict[str, int], burst: int, state_file: str) -> None:
+        try:
+            import fcntl  # type: ignore
+        except ImportError as e:  # pragma: no cover
+            raise RuntimeError("共享限流（rate_limit.shared_state_file）仅支持 Linux/macOS") from e
+        super().__init__(qpm_map, burst)
+        self._fcntl = fcntl
+        self.state_file = state_file
+        Path(state_file).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(state_file, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock 以打开的文件为单位互斥，同一进程内的线程另需一把锁
+        self._shared_lock = threading.Lock()
+
+    def _load(self) -> Dict[str, float]:
+        raw = os.pread(self._fd, 1 << 16, 0)
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self, state: Dict[str, float]) -> None:
+        raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        os.pwrite(self._fd, raw, 0)
+        os.ftruncate(self._fd, len(raw))
+
+    def reserve(self, names: Iterable[str], waited: Optional[Dict[str, float]] = None) -> float:
+        names = sorted(n for n in set(names) if n in self._buckets)
+        if not names:
+            return 0.0
+        with self._shared_lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                state = self._load()
+                # 墙钟与单调时钟的换算；本进程内的 defer 等修改取二者较大值后写回
+                offset = time.time() - time.monotonic()
+                for n in names:
+                    b = self._buckets[n]
+                    with b._lock:
+                        b._tat = max(b._tat, float(state.get(n, 0.0)) - offset)
+                wait = super().reserve(names, waited)
+                for n in names:
+                    state[n] = self._buckets[n]._tat + offset
+                self._save(state)
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        return wait
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import random
 import time
-from typing import Callable, Tuple, Any
+from typing import Any, Awaitable, Callable, Tuple
+
+from .. import profiling
 
 
 class Retryer:
@@ -26,5 +29,24 @@ class Retryer:
                 return status, result, retries
             if retries >= self.max_retries or not retryable(status):
                 return status, result, retries
-            time.sleep(self._delay(retries))
+            delay = self._delay(retries)
+            time.sleep(delay)
+            p = profiling.active()
+            if p is not None:
+                p.add("retry_backoff", delay)
+            retries += 1
+
+    async def run_async(self, func: Callable[[], Awaitable[Tuple[int, Any]]], retryable: Callable[[int], bool]) -> Tuple[int, Any, int]:
+        retries = 0
+        while True:
+            status, result = await func()
+            if status >= 200 and status < 300:
+                return status, result, retries
+            if retries >= self.max_retries or not retryable(status):
+                return status, result, retries
+            delay = self._delay(retries)
+            await asyncio.sleep(delay)
+            p = profiling.active()
+            if p is not None:
+                p.add("retry_backoff", delay)
             retries += 1
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# 每个线程最近一次请求的建连耗时；复用连接时保持为空
+_timing = threading.local()
+
+
+def reset_timing() -> None:
+    _timing.connect_ms = None
+    _timing.tls_ms = None
+
+
+def last_timing() -> Dict[str, Optional[float]]:
+    return {
+        "connectMs": getattr(_timing, "connect_ms", None),
+        "tlsMs": getattr(_timing, "tls_ms", None),
+    }
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self) -> Any:
+        t0 = time.perf_counter()
+        sock = super()._new_conn()
+        _timing.connect_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return sock
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self) -> Any:
+        t0 = time.perf_counter()
+        sock = super()._new_conn()
+        _timing.connect_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return sock
+
+    def connect(self) -> None:
+        t0 = time.perf_counter()
+        super().connect()
+        total = (time.perf_counter() - t0) * 1000
+        # connect() = TCP 建连（_new_conn）+ TLS 握手
+        _timing.tls_ms = round(max(0.0, total - (getattr(_timing, "connect_ms", None) or 0.0)), 2)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def _drain(q: Optional["queue.LifoQueue"]) -> None:
+    if q is None:
+        return
+    drained = 0
+    while True:
+        try:
+            conn = q.get(block=False)
+        except queue.Empty:
+            break
+        drained += 1
+        if conn is not None:
+            conn.close()
+    for _ in range(drained):
+        q.put(None)
+
+
+class PooledAdapter(HTTPAdapter):
+    """带建连计时与空闲回收的连接池适配器。
+
+    idle_timeout_s > 0 时，若某主机闲置超过该时长，则先关闭其池中全部空闲连接再发请求，
+    避免复用已被服务端/负载均衡静默断开的长连接（该请求会重新建连）。
+    """
+
+    def __init__(self, pool_maxsize: int, idle_timeout_s: float = 0.0, pool_block: bool = False) -> None:
+        self.idle_timeout_s = idle_timeout_s
+        self._last_used: Dict[str, float] = {}
+        self._idle_lock = threading.Lock()
+        super().__init__(pool_connections=4, pool_maxsize=max(1, pool_maxsize), pool_block=pool_block)
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def _evict_idle(self, url: str) -> None:
+        if self.idle_timeout_s <= 0:
+            return
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        now = time.monotonic()
+        with self._idle_lock:
+            last = self._last_used.get(key)
+            self._last_used[key] = now
+            if last is None or now - last <= self.idle_timeout_s:
+                return
+        # 仅关闭池中空闲连接并放回占位符，池本身与在途连接不受影响；
+        # requests 会按 TLS 参数区分连接池，因此按 scheme/host/port 匹配全部相关池
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        pools = self.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            if (pool_key.key_scheme, pool_key.key_host, pool_key.key_port) != (parts.scheme, parts.hostname, port):
+                continue
+            try:
+                pool = pools[pool_key]
+            except KeyError:
+                continue
+            _drain(pool.pool)
+
+    def send(self, request: Any, **kwargs: Any) -> Any:
+        self._evict_idle(request.url)
+        return super().send(request, **kwargs)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from ..models import STAT_FIELDS, ResultRow, Status
+
+
+def row_to_record(row: ResultRow) -> Dict[str, Any]:
+    cid, coid, chat, ecode, emsg = row.texts()
+    rec: Dict[str, Any] = {
+        "contract_number": row.contract_number,
+        "contract_id": cid,
+        "cooperation_id": coid,
+        "openChatId": chat,
+        "status": row.status.value if hasattr(row.status, "value") else str(row.status),
+        "error_code": ecode,
+        "error_message": emsg,
+    }
+    # 统计字段只写出已执行的步骤，旧版本写出的记录缺这些键时按 None 处理
+    for name, v in zip(STAT_FIELDS, row.stats()):
+        if v is not None:
+            rec[name] = v
+    return rec
+
+
+def row_from_record(rec: Dict[str, Any]) -> ResultRow:
+    try:
+        status = Status(rec.get("status"))
+    except ValueError:
+        status = Status.UNKNOWN_ERROR
+    return ResultRow(
+        contract_number=str(rec["contract_number"]),
+        contract_id=rec.get("contract_id"),
+        cooperation_id=rec.get("cooperation_id"),
+        openChatId=rec.get("openChatId"),
+        status=status,
+        error_code=rec.get("error_code"),
+        error_message=rec.get("error_message"),
+        **{name: rec.get(name) for name in STAT_FIELDS},
+    )
+
+
+def _drop_torn_tail(path: str) -> None:
+    # 写入中途崩溃会留下不以换行结尾的半行；截掉它，否则续写的第一条记录会拼在半行后一起丢失
+    if not Path(path).exists():
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 65536)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            if pos == end and chunk.endswith(b"\n"):
+                return
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                f.truncate(start + nl + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+class CheckpointJournal:
+    """追加写的结果日志（JSONL，一行一个 ResultRow）。
+
+    每条记录写入后立即 flush 到操作系统，进程崩溃或 Ctrl-C 不会丢失；
+    fsync 按条数（fsync_every）或时间（fsync_interval_s）批量执行，掉电时最多丢失一个批次。
+    打开已有日志时先截掉末尾未写完的半行，再继续追加。
+    """
+
+    def __init__(self, path: str, fsync_every: int = 100, fsync_interval_s: float = 1.0) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval_s = fsync_interval_s
+        self._lock = threading.Lock()
+        _drop_torn_tail(path)
+        self._f = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, row: ResultRow) -> None:
+        line = json.dumps(row_to_record(row), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.flush()
+            self._sync()
+            self._f.close()
+
+
+def replay_journal(path: str) -> Tuple[List[str], Dict[str, ResultRow]]:
+    """回放结果日志：同一合同以最后一条记录为准；顺序为首次出现的顺序。末尾被截断的半行会被忽略。"""
+    order: List[str] = []
+    mapping: Dict[str, ResultRow] = {}
+    if not Path(path).exists():
+        return order, mapping
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = row_from_record(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+            if row.contract_number not in mapping:
+                order.append(row.contract_number)
+            mapping[row.contract_number] = row
+    return order, mapping
+
+
+def reset_journal(path: str) -> None:
+    """导出完成后删除结果日志：其中的记录已全部并入 Excel。"""
+    p = Path(path)
+    if p.exists():
+        p.unlink()
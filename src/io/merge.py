@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Set
+
+from ..models import ResultRow
+from .journal import row_from_record
+
+
+# row_to_record 写出的记录以合同编号开头，扫描时直接截取，无需解析整行
+_KEY_PREFIX = b'{"contract_number":"'
+
+
+def _record_key(line: bytes) -> str:
+    # 崩溃截断的半行后接续写入的记录会拼在同一行，此类行交给 json 解析判定
+    if line.startswith(_KEY_PREFIX) and line.endswith(b"}\n") and line.find(_KEY_PREFIX, 1) < 0:
+        end = line.find(b'"', len(_KEY_PREFIX))
+        key = line[len(_KEY_PREFIX):end]
+        if b"\\" not in key:
+            return key.decode("utf-8")
+    try:
+        return str(json.loads(line)["contract_number"])
+    except (ValueError, KeyError, TypeError):
+        return ""
+
+
+class JournalIndex(Mapping):
+    """结果日志的只读索引：顺序扫描一次，每个合同只记录最后一条记录的字节偏移，按需 seek 解析。
+
+    与 replay_journal 语义一致（以最后一条为准，顺序为首次出现的顺序，截断的半行被忽略），
+    但常驻内存只有合同编号与偏移量，不随结果内容增长。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        self._f = None
+        if not Path(path).exists():
+            return
+        self._f = open(path, "rb")
+        offset = 0
+        for line in self._f:
+            cn = _record_key(line)
+            if cn:
+                self._offsets[cn] = offset
+            offset += len(line)
+
+    def __getitem__(self, cn: str) -> ResultRow:
+        offset = self._offsets[cn]
+        self._f.seek(offset)  # type: ignore[union-attr]
+        return row_from_record(json.loads(self._f.readline()))  # type: ignore[union-attr]
+
+    def __contains__(self, cn: object) -> bool:
+        return cn in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class ResultIndex(Mapping):
+    """历史结果的临时索引：流式读入一次，逐行转存到临时文件并记录字节偏移，按需 seek 读回。
+
+    同一合同出现多次时以最后一行为准、位置取首次出现处，与按字典合并（dict[cn] = row）一致；
+    常驻内存只有合同编号与偏移量，既供重跑计划按编号查找，也作为合并时的历史结果流。
+    临时文件只在本进程内使用，按打包后的槽位 pickle（比 JSON 编解码快约一倍），关闭时删除。
+    """
+
+    def __init__(self, rows: Iterable[ResultRow], tmp_dir: str = "") -> None:
+        if tmp_dir:
+            os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="existing-results-", suffix=".bin", dir=tmp_dir or None)
+        self.rows = 0
+        self._offsets: Dict[str, int] = {}
+        with os.fdopen(fd, "wb") as f:
+            for row in rows:
+                self._offsets[row.contract_number] = f.tell()
+                pickle.dump(row.state(), f, pickle.HIGHEST_PROTOCOL)
+                self.rows += 1
+        self._f: Optional[BinaryIO] = open(self.path, "rb")
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - len(self._offsets)
+
+    def __getitem__(self, cn: str) -> ResultRow:
+        offset = self._offsets[cn]
+        self._f.seek(offset)  # type: ignore[union-attr]
+        return ResultRow.from_state(pickle.load(self._f))  # type: ignore[arg-type]
+
+    def __contains__(self, cn: object) -> bool:
+        return cn in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class ResultMerger:
+    """将历史结果与本次结果按 contract_number 线性合并（upsert）。
+
+    - 历史结果按原顺序输出，本次有新结果的合同原位替换；
+    - 新合同按输入顺序追加，不在输入中的按本次结果顺序殿后；
+    - existing 与 new 均为按合同编号去重后的映射（dict、JournalIndex 或 ResultIndex），
+      遍历顺序即首次出现的顺序，重复的合同以最后一条为准。
+
+    除两个映射外只常驻已输出的新合同编号集合，输入只遍历一次。
+    """
+
+    def __init__(self, new: Mapping) -> None:
+        self.new = new
+        self.counts: Dict[str, int] = {"kept": 0, "replaced": 0, "appended": 0, "duplicates": 0}
+
+    def merge(self, existing: Mapping, input_order: Iterable[str] = ()) -> Iterator[ResultRow]:
+        new = self.new
+        done: Set[str] = set()
+        # 历史文件中被合并掉的重复行数（ResultIndex 提供）
+        self.counts["duplicates"] = getattr(existing, "duplicates", 0)
+        for cn in existing:
+            if cn in new:
+                self.counts["replaced"] += 1
+                yield new[cn]
+            else:
+                self.counts["kept"] += 1
+                yield existing[cn]
+        # input_order 可为重新流式读取的输入（含重复）
+        for cn in input_order:
+            if cn in new and cn not in existing and cn not in done:
+                done.add(cn)
+                self.counts["appended"] += 1
+                yield new[cn]
+        for cn in new:
+            if cn not in existing and cn not in done:
+                self.counts["appended"] += 1
+                yield new[cn]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
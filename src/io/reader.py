@@ -1,69 +1,218 @@
 from __future__ import annotations
 
-from typing import List, Dict
+import csv
+import glob
+import gzip
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from openpyxl import load_workbook
 
-from ..models import ResultRow, Status
+from .. import profiling
+from ..models import STAT_FIELDS, ResultRow, Status
 
 
-def read_contract_numbers(path: str) -> List[str]:
-    result: List[str] = []
-    seen = set()
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s or s.startswith("#"):
-                continue
-            if s in seen:
-                continue
-            seen.add(s)
-            result.append(s)
-    return result
+def input_paths(value: Union[str, Sequence[str]]) -> List[str]:
+    """files.input_txt 可为单个路径或路径列表；含通配符的条目按文件名排序展开。"""
+    items = [value] if isinstance(value, str) else list(value)
+    out: List[str] = []
+    for item in items:
+        if any(ch in item for ch in "*?["):
+            out.extend(sorted(glob.glob(item)))
+        else:
+            out.append(item)
+    return out
 
 
-def read_results_excel(path: str):
-    wb = load_workbook(filename=path)
-    ws = wb.active
+def _open_text(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_contract_numbers(paths: Union[str, Sequence[str]]) -> Iterable[str]:
+    """逐行流式读取一个或多个输入文件（.gz 自动解压），过滤空行与注释；不做去重。"""
+    return profiling.timed("input_read", _iter_contract_numbers(paths))
+
+
+def _iter_contract_numbers(paths: Union[str, Sequence[str]]) -> Iterator[str]:
+    for path in input_paths(paths):
+        with _open_text(path) as f:
+            for line in f:
+                s = line.strip()
+                if s and not s.startswith("#"):
+                    yield s
+
+
+def read_contract_numbers(path: Union[str, Sequence[str]]) -> List[str]:
+    return list(dict.fromkeys(iter_contract_numbers(path)))
+
+
+def count_lines(paths: Union[str, Sequence[str]]) -> int:
+    """按换行符快速统计输入行数（含空行、注释与重复），用于估算总量。"""
+    total = 0
+    for path in input_paths(paths):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            tail = b""
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                total += chunk.count(b"\n")
+                tail = chunk
+            if tail and not tail.endswith(b"\n"):
+                total += 1
+    return total
+
+
+BASE_HEADERS = [
+    "contract_number",
+    "contract_id",
+    "cooperation_id",
+    "openChatId",
+    "status",
+    "error_code",
+    "error_message",
+]
+# 统计列；retry_total / duration_ms 为各步骤之和，读取时由分步列重新计算，旧文件缺列时为空
+STAT_HEADERS = ["retry_total", "duration_ms"] + list(STAT_FIELDS)
+RESULT_HEADERS = BASE_HEADERS + STAT_HEADERS
+
+SIDECAR_FORMATS = ("csv", "parquet")
+
 
-    header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-    headers = [str(x).strip() if x is not None else "" for x in header_row]
-    idx = {name: i for i, name in enumerate(headers)}
+def sidecar_path(path: str, fmt: str) -> str:
+    return f"{path}.{fmt}"
 
-    def norm(x):
-        if x is None:
+
+def _norm(x) -> Optional[str]:
+    if x is None:
+        return None
+    s = str(x).strip()
+    return s if s != "" else None
+
+
+def _to_int(x) -> Optional[int]:
+    if x is None or x == "":
+        return None
+    try:
+        return int(x)
+    except (TypeError, ValueError):
+        try:
+            return int(float(x))
+        except (TypeError, ValueError):
             return None
-        s = str(x).strip()
-        return s if s != "" else None
 
-    order: List[str] = []
-    mapping: Dict[str, ResultRow] = {}
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        cn = norm(row[idx.get("contract_number", -1)]) if idx.get("contract_number") is not None else None
+def format_timestamp(ts: Optional[int]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).astimezone().isoformat(timespec="seconds") if ts is not None else None
+
+
+def _parse_timestamp(x) -> Optional[int]:
+    if x is None or x == "":
+        return None
+    if isinstance(x, datetime):
+        return int(x.timestamp())
+    try:
+        return int(datetime.fromisoformat(str(x).strip()).timestamp())
+    except ValueError:
+        return _to_int(x)
+
+
+def _parse_rows(headers, rows: Iterable) -> Iterator[ResultRow]:
+    idx = {str(name).strip() if name is not None else "": i for i, name in enumerate(headers)}
+    cols = [idx.get(name) for name in BASE_HEADERS]
+    stat_cols = [idx.get(name) for name in STAT_FIELDS]
+    # 旧文件只有前 7 列，跳过统计列解析
+    has_stats = any(i is not None for i in stat_cols)
+
+    for row in rows:
+        n = len(row)
+        cn, cid, coid, chat, s, ecode, emsg = (
+            _norm(row[i]) if i is not None and i < n else None for i in cols
+        )
         if not cn:
             continue
-        cid = norm(row[idx.get("contract_id", -1)]) if idx.get("contract_id") is not None else None
-        coid = norm(row[idx.get("cooperation_id", -1)]) if idx.get("cooperation_id") is not None else None
-        chat = norm(row[idx.get("openChatId", -1)]) if idx.get("openChatId") is not None else None
-        s = norm(row[idx.get("status", -1)]) if idx.get("status") is not None else None
         try:
             status = Status(s) if s else Status.UNKNOWN_ERROR
         except Exception:
             status = Status.UNKNOWN_ERROR
-        ecode = norm(row[idx.get("error_code", -1)]) if idx.get("error_code") is not None else None
-        emsg = norm(row[idx.get("error_message", -1)]) if idx.get("error_message") is not None else None
+        stats: List[Optional[int]] = []
+        if has_stats:
+            raw = [row[i] if i is not None and i < n else None for i in stat_cols]
+            stats = [_to_int(v) for v in raw[:-1]]
+            stats.append(_parse_timestamp(raw[-1]))
+        yield ResultRow(cn, cid, coid, chat, status, ecode, emsg, *stats)
 
+
+def _collect(rows: Iterable[ResultRow]) -> Tuple[List[str], Dict[str, ResultRow]]:
+    # 同一合同出现多次时以最后一行为准，顺序为首次出现的顺序
+    order: List[str] = []
+    mapping: Dict[str, ResultRow] = {}
+    for r in rows:
+        cn = r.contract_number
         if cn not in mapping:
             order.append(cn)
-        mapping[cn] = ResultRow(
-            contract_number=cn,
-            contract_id=cid,
-            cooperation_id=coid,
-            openChatId=chat,
-            status=status,
-            error_code=ecode,
-            error_message=emsg,
-        )
-
+        mapping[cn] = r
     return order, mapping
+
+
+def iter_results_excel(path: str) -> Iterator[ResultRow]:
+    # 只读模式按行流式解析，不在内存中构建整张工作表
+    wb = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is not None:
+            yield from _parse_rows(header_row, rows)
+    finally:
+        wb.close()
+
+
+def iter_results_csv(path: str) -> Iterator[ResultRow]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        header_row = next(rows, None)
+        if header_row is not None:
+            yield from _parse_rows(header_row, rows)
+
+
+def iter_results_parquet(path: str) -> Iterator[ResultRow]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("缺少依赖 pyarrow，请先安装: pip install pyarrow")
+    pf = pq.ParquetFile(path)
+    names = pf.schema_arrow.names
+
+    def rows():
+        for batch in pf.iter_batches(batch_size=65536):
+            yield from zip(*(batch.column(i).to_pylist() for i in range(len(names))))
+
+    yield from _parse_rows(names, rows())
+
+
+def read_results_excel(path: str):
+    return _collect(iter_results_excel(path))
+
+
+def read_results_csv(path: str):
+    return _collect(iter_results_csv(path))
+
+
+def read_results_parquet(path: str):
+    return _collect(iter_results_parquet(path))
+
+
+def iter_results(path: str, sidecar_format: Optional[str] = None) -> Iterable[ResultRow]:
+    """流式读取历史结果；旁路文件存在且不旧于 Excel 时优先读旁路文件（Excel 被手工修改过则以 Excel 为准）。"""
+    if sidecar_format in SIDECAR_FORMATS:
+        side = Path(sidecar_path(path, sidecar_format))
+        if side.exists() and side.stat().st_mtime >= Path(path).stat().st_mtime:
+            if sidecar_format == "csv":
+                return profiling.timed("result_read", iter_results_csv(str(side)))
+            return profiling.timed("result_read", iter_results_parquet(str(side)))
+    return profiling.timed("result_read", iter_results_excel(path))
+
+
+def read_results(path: str, sidecar_format: Optional[str] = None):
+    return _collect(iter_results(path, sidecar_format))
@@ -1,36 +1,106 @@
 from __future__ import annotations
 
+import csv
+import os
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, List, Optional
 
 from openpyxl import Workbook
 
+from .. import profiling
 from ..models import ResultRow
+from .reader import RESULT_HEADERS, SIDECAR_FORMATS, STAT_HEADERS, format_timestamp, sidecar_path
 
+_PARQUET_CHUNK = 65536
 
-def write_results(path: str, rows: Iterable[ResultRow]) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sheet1"
-    headers = [
-        "contract_number",
-        "contract_id",
-        "cooperation_id",
-        "openChatId",
-        "status",
-        "error_code",
-        "error_message",
+
+def _values(r: ResultRow) -> List[Any]:
+    cid, coid, chat, ecode, emsg = r.texts()
+    stats = r.stats()
+    return [
+        r.contract_number or "",
+        cid or "",
+        coid or "",
+        chat or "",
+        r.status.value if hasattr(r.status, 'value') else str(r.status),
+        ecode or "",
+        emsg or "",
+        r.retry_total,
+        r.duration_ms,
+        *stats[:6],
+        format_timestamp(stats[6]),
     ]
-    ws.append(headers)
-    for r in rows:
-        ws.append([
-            r.contract_number or "",
-            r.contract_id or "",
-            r.cooperation_id or "",
-            r.openChatId or "",
-            r.status.value if hasattr(r.status, 'value') else str(r.status),
-            r.error_code or "",
-            r.error_message or "",
-        ])
+
+
+class _ParquetSink:
+    """按块写出 Parquet，避免整表驻留内存。"""
+
+    def __init__(self, path: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("缺少依赖 pyarrow，请先安装: pip install pyarrow")
+        self._pa = pa
+        # 数值统计列用 int64，其余（含 last_attempt_at）为字符串
+        numeric = set(STAT_HEADERS[:-1])
+        self._schema = pa.schema([(name, pa.int64() if name in numeric else pa.string()) for name in RESULT_HEADERS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._buf: List[List[Any]] = []
+
+    def writerow(self, values: List[Any]) -> None:
+        self._buf.append(values)
+        if len(self._buf) >= _PARQUET_CHUNK:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buf:
+            return
+        cols = [self._pa.array(col, type=field.type) for col, field in zip(zip(*self._buf), self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(cols, schema=self._schema))
+        self._buf = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def write_results(path: str, rows: Iterable[ResultRow], sidecar_format: Optional[str] = None) -> None:
+    # write_only 模式逐行流式写出；rows 可为生成器，只遍历一次，同时写旁路文件
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(RESULT_HEADERS)
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    wb.save(path)
+
+    side = sidecar_path(path, sidecar_format) if sidecar_format in SIDECAR_FORMATS else None
+    side_tmp = f"{side}.tmp" if side else None
+    side_file = None
+    sink = None
+    if sidecar_format == "csv":
+        side_file = open(side_tmp, "w", encoding="utf-8", newline="")
+        sink = csv.writer(side_file)
+        sink.writerow(RESULT_HEADERS)
+    elif sidecar_format == "parquet":
+        sink = _ParquetSink(side_tmp)
+    try:
+        with profiling.phase("output_write"):
+            for r in rows:
+                values = _values(r)
+                ws.append(values)
+                if sink is not None:
+                    sink.writerow(values)
+    finally:
+        if side_file is not None:
+            side_file.close()
+        elif isinstance(sink, _ParquetSink):
+            sink.close()
+
+    # 先写临时文件再原子替换，写出过程中断不会损坏已有结果
+    tmp = f"{path}.tmp"
+    with profiling.phase("excel_save"):
+        wb.save(tmp)
+    os.replace(tmp, path)
+    if side:
+        # 旁路文件最后替换并刷新 mtime，保证不早于 Excel，读取时才会被采用
+        os.replace(side_tmp, side)
+        os.utime(side)
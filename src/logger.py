@@ -1,29 +1,192 @@
 from __future__ import annotations
 
+import atexit
+import itertools
 import json
+import queue
 import sys
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import profiling
+
+
+# 多个合同并发执行时共享同一日志文件，串行化单行输出避免行内交错
+_WRITE_LOCK = threading.Lock()
+
+CONSOLE_MODES = ("on", "off", "sample")
+
+_LEVEL_MAP = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+
+_MAX_BATCH = 1024
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).astimezone().isoformat(timespec="milliseconds")
 
 
+class LogSink:
+    """日志输出端：文件句柄常驻，同一文件的所有 JsonLogger 共享。
+
+    同步模式逐行写入并 flush；异步模式由后台线程从有界队列批量写入，队列满时调用方阻塞等待（不丢日志）。
+    异步模式下写文件失败（磁盘满、句柄失效等）时丢弃该批记录并计入 dropped，写线程继续消费队列，不会卡住调用方。
+    控制台可全量输出、关闭或按 1/N 采样，采样模式下 WARN/ERROR 始终输出。进程退出时自动关闭并刷盘；
+    关闭后写入的记录（如其他线程的收尾日志）直接追加到文件，不会丢失。
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        flush_interval_s: float = 0.2,
+        console: str = "on",
+        console_sample_every: int = 100,
+    ) -> None:
+        self.file_path = file_path
+        self.async_mode = async_mode
+        self.console = console
+        self.console_sample_every = max(1, int(console_sample_every))
+        self._flush_interval_s = flush_interval_s
+        self._seq = itertools.count()
+        self._closed = False
+        # 异步模式下因写入失败丢弃的记录数
+        self.dropped = 0
+        # 入队与关闭互斥：关闭标记之后不会再有记录进入队列（否则写线程退出后无人处理）
+        self._close_lock = threading.Lock()
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(file_path, "a", encoding="utf-8")
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if async_mode:
+            self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+            self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _to_console(self, level: str) -> bool:
+        if self.console == "off":
+            return False
+        if self.console == "sample" and _LEVEL_MAP.get(level, 20) < _LEVEL_MAP["WARN"]:
+            return next(self._seq) % self.console_sample_every == 0
+        return True
+
+    def write(self, level: str, line: str) -> None:
+        if self._queue is not None:
+            with self._close_lock:
+                if not self._closed:
+                    self._queue.put((line, self._to_console(level)))
+                    return
+            # 已关闭：等写线程落盘完队列中的记录后再直接写，保持顺序且不与其交错
+            if self._thread is not None:
+                self._thread.join()
+        with _WRITE_LOCK:
+            if self._to_console(level):
+                print(line)
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+            else:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def _drain(self) -> None:
+        assert self._queue is not None
+        stop = False
+        while not stop:
+            batch: List[Optional[Tuple[str, bool]]] = [self._queue.get()]
+            deadline = time.monotonic() + self._flush_interval_s
+            # 攒批：队列中已有的记录一次取完，空闲时最多等待 flush_interval 后落盘
+            while len(batch) < _MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or batch[-1] is None:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+            lines: List[str] = []
+            console: List[str] = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                lines.append(item[0])
+                if item[1]:
+                    console.append(item[0])
+            if console:
+                try:
+                    sys.stdout.write("\n".join(console) + "\n")
+                    sys.stdout.flush()
+                except Exception:
+                    # 控制台不可写（如管道已关闭）不影响文件输出
+                    pass
+            if lines:
+                try:
+                    self._file.write("\n".join(lines) + "\n")
+                    self._file.flush()
+                except Exception as e:
+                    if not self.dropped:
+                        sys.stderr.write(f"日志写入失败，后续失败的记录将被丢弃: {e}\n")
+                    self.dropped += len(lines)
+
+    def close(self) -> None:
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._queue is not None:
+                self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+        with _WRITE_LOCK:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        if self.dropped:
+            sys.stderr.write(f"日志写入失败，共丢弃 {self.dropped} 条记录: {self.file_path}\n")
+
+
+# 未显式注入 sink 时按文件路径复用同步 sink
+_DEFAULT_SINKS: Dict[str, LogSink] = {}
+
+
+def _default_sink(file_path: str) -> LogSink:
+    with _WRITE_LOCK:
+        sink = _DEFAULT_SINKS.get(file_path)
+        if sink is None:
+            sink = LogSink(file_path)
+            _DEFAULT_SINKS[file_path] = sink
+        return sink
+
+
 class JsonLogger:
     """简单的JSON日志器：同时输出到控制台与文件（逐行JSON）。"""
 
-    def __init__(self, file_path: str, module: str = "app", level: str = "INFO", context: Optional[Dict[str, Any]] = None) -> None:
+    def __init__(
+        self,
+        file_path: str,
+        module: str = "app",
+        level: str = "INFO",
+        context: Optional[Dict[str, Any]] = None,
+        sink: Optional[LogSink] = None,
+    ) -> None:
         self.file_path = file_path
         self.module = module
         self.level = (level or "INFO").upper()
-        self._level_map = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+        self._level_map = _LEVEL_MAP
         self._min_level = self._level_map.get(self.level, 20)
         self.context: Dict[str, Any] = dict(context or {})
-        # 确保日志目录存在
-        Path(self.file_path).parent.mkdir(parents=True, exist_ok=True)
+        # sink 负责创建日志目录并持有文件句柄
+        self.sink = sink or _default_sink(file_path)
 
     @staticmethod
     def new_trace_id() -> str:
@@ -32,7 +195,10 @@ class JsonLogger:
     def with_context(self, ctx: Dict[str, Any]) -> "JsonLogger":
         merged = dict(self.context)
         merged.update(ctx or {})
-        return JsonLogger(self.file_path, module=self.module, level=self.level, context=merged)
+        return JsonLogger(self.file_path, module=self.module, level=self.level, context=merged, sink=self.sink)
+
+    def close(self) -> None:
+        self.sink.close()
 
     def _should_log(self, msg_level: str) -> bool:
         lv = self._level_map.get((msg_level or "INFO").upper(), 20)
@@ -41,6 +207,14 @@ class JsonLogger:
     def _emit(self, level: str, msg: str, extra: Optional[Dict[str, Any]] = None) -> None:
         if not self._should_log(level):
             return
+        p = profiling.active()
+        if p is not None:
+            with p.phase("log_write"):
+                self._write(level, msg, extra)
+        else:
+            self._write(level, msg, extra)
+
+    def _write(self, level: str, msg: str, extra: Optional[Dict[str, Any]] = None) -> None:
         rec: Dict[str, Any] = {
             "ts": _now_iso(),
             "level": level,
@@ -52,11 +226,7 @@ class JsonLogger:
         if extra:
             rec.update(extra)
         line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
-        # 控制台
-        print(line)
-        # 文件落盘
-        with open(self.file_path, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        self.sink.write(level, line)
 
     def debug(self, msg: str, extra: Optional[Dict[str, Any]] = None) -> None:
         self._emit("DEBUG", msg, extra)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 秒；覆盖本地模拟服务到慢接口超时的范围
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 限流等待大多为 0 或接近一个令牌间隔，低端需更细的桶
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 响应解析多为亚毫秒级
+PARSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(k) or "total": int(v) if float(v).is_integer() else v for k, v in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues: Any, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: Any, value: float) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labelvalues: Any, value: float) -> None:
+        key = tuple(str(v) for v in labelvalues)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各桶计数（非累计，末位为 +Inf）, 总和, 总数, 最大值]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+            if value > state[3]:
+                state[3] = value
+
+    def _snapshot(self) -> List[Tuple[Tuple[str, ...], List[int], float, int, float]]:
+        with self._lock:
+            return [(k, list(s[0]), s[1], s[2], s[3]) for k, s in sorted(self._values.items())]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, counts, total, n, _ in self._snapshot():
+            acc = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+    def _quantile(self, counts: List[int], n: int, q: float, vmax: float) -> float:
+        # 在所在桶内线性插值，不超过实际最大值；落在 +Inf 桶时取最大值
+        rank = q * n
+        acc = 0
+        lower = 0.0
+        for bound, c in zip(self.buckets, counts):
+            if c and acc + c >= rank:
+                return min(vmax, lower + (bound - lower) * (rank - acc) / c)
+            acc += c
+            lower = bound
+        return vmax
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for key, counts, total, n, vmax in self._snapshot():
+            if not n:
+                continue
+            out[",".join(key) or "total"] = {
+                "count": n,
+                "avgMs": round(total / n * 1000, 1),
+                "p50Ms": round(self._quantile(counts, n, 0.5, vmax) * 1000, 1),
+                "p90Ms": round(self._quantile(counts, n, 0.9, vmax) * 1000, 1),
+                "p99Ms": round(self._quantile(counts, n, 0.99, vmax) * 1000, 1),
+                "maxMs": round(vmax * 1000, 1),
+            }
+        return out
+
+
+class MetricsRegistry:
+    """进程内指标注册表：按名称注册计数器、仪表与直方图，输出 Prometheus 文本格式或汇总字典。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._families: Dict[str, _Family] = {}
+
+    def _register(self, family: _Family) -> Any:
+        with self._lock:
+            return self._families.setdefault(family.name, family)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self._families.values())
+        lines: List[str] = []
+        for f in families:
+            lines.extend(f.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            families = list(self._families.values())
+        return {f.name: f.summary() for f in families}  # type: ignore[attr-defined]
+
+
+class RunMetrics:
+    """批处理运行使用的指标集合，各组件通过构造参数注入后直接记录。"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        r = registry or MetricsRegistry()
+        self.registry = r
+        self.http_duration = r.histogram("feishu_http_request_duration_seconds", "单次 HTTP 请求耗时（不含限流等待）", ("endpoint",))
+        self.http_responses = r.counter("feishu_http_responses_total", "HTTP 响应数（status=0 表示网络错误或超时）", ("endpoint", "status"))
+        self.http_retries = r.counter("feishu_http_retries_total", "HTTP 层重试次数", ("endpoint",))
+        self.http_in_flight = r.gauge("feishu_http_in_flight", "在途 HTTP 请求数", ("endpoint",))
+        self.limiter_wait = r.histogram("feishu_rate_limiter_wait_seconds", "请求前在限流器上的等待时长", ("endpoint",), WAIT_BUCKETS)
+        self.step_duration = r.histogram("feishu_step_duration_seconds", "步骤耗时（含重试与限流等待）", ("step", "outcome"))
+        self.contracts = r.counter("feishu_contracts_total", "已完成合同数", ("status",))
+        self.contracts_in_flight = r.gauge("feishu_contracts_in_flight", "处理中的合同数")
+        self.http_body_bytes = r.counter("feishu_http_response_bytes_total", "响应体字节数（wire 为传输字节，decoded 为解压后字节）", ("endpoint", "kind"))
+        self.http_parse = r.histogram("feishu_http_parse_seconds", "响应 JSON 解析耗时", ("endpoint",), PARSE_BUCKETS)
+
+    def observe_body(self, endpoint: str, wire: int, decoded: int, parse_s: float) -> None:
+        self.http_body_bytes.inc(endpoint, "wire", amount=wire)
+        self.http_body_bytes.inc(endpoint, "decoded", amount=decoded)
+        self.http_parse.observe(endpoint, value=parse_s)
+
+    def summary(self) -> Dict[str, Any]:
+        return self.registry.summary()
+
+
+def serve_metrics(registry: MetricsRegistry, host: str, port: int) -> ThreadingHTTPServer:
+    """在后台线程启动 /metrics HTTP 服务，返回 server（调用方负责 shutdown）。"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import struct
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 
 class Status(str, Enum):
@@ -16,12 +16,157 @@ class Status(str, Enum):
     UNKNOWN_ERROR = "UNKNOWN_ERROR"
 
 
-@dataclass
+# 各步骤重试次数、耗时（毫秒）与最后一次请求时间（Unix 秒），顺序即打包顺序
+STAT_FIELDS = (
+    "search_retries",
+    "search_ms",
+    "info_retries",
+    "info_ms",
+    "coop_retries",
+    "coop_ms",
+    "last_attempt_at",
+)
+_TEXT_FIELDS = ("contract_id", "cooperation_id", "openChatId", "error_code", "error_message")
+
+# 文本字段以单元分隔符拼成一个字符串；统计字段打包为定长字节串，-1 表示未执行
+_SEP = "\x1f"
+_STATS = struct.Struct("<6iq")
+_NO_STATS = (None,) * len(STAT_FIELDS)
+
+
+def _pack_text(values: Tuple[Optional[str], ...]) -> str:
+    text = _SEP.join([v or "" for v in values])
+    if text.count(_SEP) != len(values) - 1:
+        # 字段内含分隔符（极少见）时替换为空格
+        text = _SEP.join([(v or "").replace(_SEP, " ") for v in values])
+    return text
+
+
 class ResultRow:
-    contract_number: str
-    contract_id: Optional[str]
-    cooperation_id: Optional[str]
-    openChatId: Optional[str]
-    status: Status
-    error_code: Optional[str]
-    error_message: Optional[str]
+    """单个合同的结果行（只读）。
+
+    重跑时历史结果与本次结果会同时驻留百万级行，因此不用 dataclass：contract_number 与
+    字典键共用同一对象，其余文本字段合并为一个字符串，统计字段打包为定长字节串，
+    每行只有 4 个槽位、至多 3 个对象。空字符串与 None 不作区分（与结果文件一致）。
+    """
+
+    __slots__ = ("contract_number", "status", "_text", "_stats")
+
+    def __init__(
+        self,
+        contract_number: str,
+        contract_id: Optional[str],
+        cooperation_id: Optional[str],
+        openChatId: Optional[str],
+        status: Status,
+        error_code: Optional[str],
+        error_message: Optional[str],
+        search_retries: Optional[int] = None,
+        search_ms: Optional[int] = None,
+        info_retries: Optional[int] = None,
+        info_ms: Optional[int] = None,
+        coop_retries: Optional[int] = None,
+        coop_ms: Optional[int] = None,
+        last_attempt_at: Optional[int] = None,
+    ) -> None:
+        self.contract_number = contract_number
+        self.status = status
+        self._text = _pack_text((contract_id, cooperation_id, openChatId, error_code, error_message))
+        stats = (search_retries, search_ms, info_retries, info_ms, coop_retries, coop_ms, last_attempt_at)
+        if stats == _NO_STATS:
+            self._stats: Optional[bytes] = None
+        else:
+            self._stats = _STATS.pack(*[-1 if v is None else int(v) for v in stats])
+
+    def texts(self) -> Tuple[Optional[str], ...]:
+        """一次性解出 (contract_id, cooperation_id, openChatId, error_code, error_message)。"""
+        return tuple(v or None for v in self._text.split(_SEP))
+
+    def state(self) -> Tuple[Any, ...]:
+        """打包后的槽位，供 from_state 原样还原（历史结果临时索引转存用，无需重新打包）。"""
+        return (self.contract_number, self.status, self._text, self._stats)
+
+    @classmethod
+    def from_state(cls, state: Tuple[Any, ...]) -> "ResultRow":
+        row = cls.__new__(cls)
+        row.contract_number, row.status, row._text, row._stats = state
+        return row
+
+    def stats(self) -> Tuple[Optional[int], ...]:
+        """一次性解出 STAT_FIELDS 对应的统计值。"""
+        if self._stats is None:
+            return _NO_STATS
+        return tuple(None if v < 0 else v for v in _STATS.unpack(self._stats))
+
+    @property
+    def contract_id(self) -> Optional[str]:
+        return self.texts()[0]
+
+    @property
+    def cooperation_id(self) -> Optional[str]:
+        return self.texts()[1]
+
+    @property
+    def openChatId(self) -> Optional[str]:
+        return self.texts()[2]
+
+    @property
+    def error_code(self) -> Optional[str]:
+        return self.texts()[3]
+
+    @property
+    def error_message(self) -> Optional[str]:
+        return self.texts()[4]
+
+    @property
+    def search_retries(self) -> Optional[int]:
+        return self.stats()[0]
+
+    @property
+    def search_ms(self) -> Optional[int]:
+        return self.stats()[1]
+
+    @property
+    def info_retries(self) -> Optional[int]:
+        return self.stats()[2]
+
+    @property
+    def info_ms(self) -> Optional[int]:
+        return self.stats()[3]
+
+    @property
+    def coop_retries(self) -> Optional[int]:
+        return self.stats()[4]
+
+    @property
+    def coop_ms(self) -> Optional[int]:
+        return self.stats()[5]
+
+    @property
+    def last_attempt_at(self) -> Optional[int]:
+        return self.stats()[6]
+
+    @property
+    def retry_total(self) -> Optional[int]:
+        vals = [v for v in self.stats()[0:6:2] if v is not None]
+        return sum(vals) if vals else None
+
+    @property
+    def duration_ms(self) -> Optional[int]:
+        vals = [v for v in self.stats()[1:6:2] if v is not None]
+        return sum(vals) if vals else None
+
+    def _key(self) -> Tuple[Any, ...]:
+        return (self.contract_number, self.status, self._text, self._stats)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ResultRow):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        names = ("contract_number",) + _TEXT_FIELDS + ("status",) + STAT_FIELDS
+        values = (self.contract_number,) + self.texts() + (self.status,) + self.stats()
+        return "ResultRow(" + ", ".join(f"{n}={v!r}" for n, v in zip(names, values)) + ")"
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .contract_client import _THROTTLED, AsyncContractOpenAPIClient, ContractOpenAPIClient, _classify
+
+SearchResult = Tuple[Optional[str], int, Optional[int], Optional[str]]
+
+# 接口单页上限，批大小不超过该值
+MAX_BATCH_SIZE = 50
+
+_BATCH_ERRORS = ("AUTH_FAILED", "PERMISSION_DENIED", "RETRY_EXCEEDED", _THROTTLED)
+
+# 连续多批整批回退时认为接口不支持批量条件，停用微批直接单条查询
+_DISABLE_AFTER = 3
+
+
+def match_batch(numbers: List[str], status: int, data: Any, retries: int) -> Tuple[Dict[str, SearchResult], List[str]]:
+    """将批量搜索响应按合同编号回填，返回 (已确定结果, 需逐个回退查询的编号)。
+
+    响应中出现未请求的编号或缺少编号字段，视为接口未按批量条件过滤，整批回退；
+    同一编号对应多个不同 contract_id 时该编号回退；分页未取完（has_more）时未命中的编号回退，否则判为未找到。
+    """
+    _, code, msg = _classify(status, data)
+    if msg in _BATCH_ERRORS:
+        # 鉴权、权限、重试超限等整批级错误，与单条查询的结果一致
+        if msg == _THROTTLED:
+            msg = "RETRY_EXCEEDED"
+        return {cn: (None, retries, code, msg) for cn in numbers}, []
+    if msg not in (None, "NOT_FOUND_CONTRACT"):
+        # 其他业务错误（如接口不支持批量条件）整批回退
+        return {}, list(numbers)
+
+    payload = (data or {}).get("data") or {}
+    wanted = set(numbers)
+    found: Dict[str, set] = {}
+    for item in payload.get("items") or []:
+        cn = str((item or {}).get("contract_number") or "")
+        item_cid = (item or {}).get("contract_id")
+        if cn not in wanted or not item_cid:
+            return {}, list(numbers)
+        found.setdefault(cn, set()).add(str(item_cid))
+
+    resolved: Dict[str, SearchResult] = {}
+    fallback: List[str] = []
+    for cn in numbers:
+        ids = found.get(cn)
+        if ids is None:
+            if payload.get("has_more"):
+                fallback.append(cn)
+            else:
+                resolved[cn] = (None, retries, None, "NOT_FOUND_CONTRACT")
+        elif len(ids) > 1:
+            fallback.append(cn)
+        else:
+            resolved[cn] = (next(iter(ids)), retries, None, None)
+    return resolved, fallback
+
+
+class _Pending:
+    __slots__ = ("contract_number", "taken", "result", "done")
+
+    def __init__(self, contract_number: str) -> None:
+        self.contract_number = contract_number
+        self.taken = False
+        self.result: Optional[SearchResult] = None
+        self.done = threading.Event()
+
+
+class BatchSearcher:
+    """合同搜索微批：并发调用方的合同编号在 max_wait 内攒成一批，以一次请求解析。
+
+    接口与 ContractOpenAPIClient.search_contract_id 一致，可直接替换；无法从批量响应确定结果的编号回退为单条查询。
+    """
+
+    def __init__(self, client: ContractOpenAPIClient, batch_size: int, max_wait_s: float, field: str) -> None:
+        self.client = client
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_wait_s = max_wait_s
+        self.field = field
+        self.disabled = False
+        self._full_fallbacks = 0
+        self._pending: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._stats = {"batches": 0, "batched": 0, "fallbacks": 0}
+        self._stats_lock = threading.Lock()
+
+    def _body(self, numbers: List[str]) -> Dict[str, Any]:
+        return {"page_size": MAX_BATCH_SIZE, self.field: numbers}
+
+    def _take(self) -> List[_Pending]:
+        batch, self._pending = self._pending, []
+        for p in batch:
+            p.taken = True
+        return batch
+
+    def _record(self, batched: int, fallbacks: int) -> None:
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["batched"] += batched
+            self._stats["fallbacks"] += fallbacks
+            self._full_fallbacks = self._full_fallbacks + 1 if fallbacks == batched else 0
+            if self._full_fallbacks >= _DISABLE_AFTER:
+                self.disabled = True
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        numbers = list(dict.fromkeys(p.contract_number for p in batch))
+        try:
+            status, data, retries = self.client._request(self._body(numbers))
+            resolved, fallback = match_batch(numbers, status, data, retries)
+        except Exception:
+            resolved, fallback = {}, numbers
+        self._record(len(numbers), len(fallback))
+        for p in batch:
+            # 未确定结果的编号保持 None，由调用方线程各自回退单条查询
+            p.result = resolved.get(p.contract_number)
+            p.done.set()
+
+    def search_contract_id(self, contract_number: str) -> SearchResult:
+        if self.disabled:
+            return self.client.search_contract_id(contract_number)
+        me = _Pending(contract_number)
+        batch: Optional[List[_Pending]] = None
+        with self._cond:
+            self._pending.append(me)
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+                self._cond.notify_all()
+            else:
+                deadline = time.monotonic() + self.max_wait_s
+                while not me.taken:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        batch = self._take()
+                        break
+                    self._cond.wait(remaining)
+        if batch is not None:
+            self._flush(batch)
+        me.done.wait()
+        if me.result is not None:
+            return me.result
+        return self.client.search_contract_id(contract_number)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats, disabled=self.disabled)
+
+
+class AsyncBatchSearcher(BatchSearcher):
+    """BatchSearcher 的 asyncio 版本：同一事件循环内攒批，批满立即发送，否则 max_wait 后发送。"""
+
+    def __init__(self, client: AsyncContractOpenAPIClient, batch_size: int, max_wait_s: float, field: str) -> None:
+        super().__init__(client, batch_size, max_wait_s, field)  # type: ignore[arg-type]
+        self._waiters: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._waiters = self._waiters, []
+        if batch:
+            asyncio.ensure_future(self._flush_async(batch))
+
+    async def _flush_async(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        numbers = list(dict.fromkeys(cn for cn, _ in batch))
+        try:
+            status, data, retries = await self.client._request(self._body(numbers))  # type: ignore[misc]
+            resolved, fallback = match_batch(numbers, status, data, retries)
+        except Exception:
+            resolved, fallback = {}, numbers
+        self._record(len(numbers), len(fallback))
+        for cn, fut in batch:
+            if not fut.done():
+                fut.set_result(resolved.get(cn))
+
+    async def search_contract_id(self, contract_number: str) -> SearchResult:  # type: ignore[override]
+        if self.disabled:
+            return await self.client.search_contract_id(contract_number)  # type: ignore[misc]
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._waiters.append((contract_number, fut))
+        if len(self._waiters) >= self.batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._dispatch)
+        result = await fut
+        if result is not None:
+            return result
+        return await self.client.search_contract_id(contract_number)  # type: ignore[misc]
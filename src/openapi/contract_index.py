@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..logger import JsonLogger
+from .contract_client import ContractOpenAPIClient, _classify
+
+SearchResult = Tuple[Optional[str], int, Optional[int], Optional[str]]
+
+
+def _to_ts(value: Any) -> Optional[float]:
+    # 修改时间兼容秒/毫秒时间戳（数字或数字字符串）与 ISO 8601 字符串
+    if value is None or value == "":
+        return None
+    try:
+        ts = float(value)
+        return ts / 1000.0 if ts > 1e11 else ts
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class ContractIndex:
+    """本地 contract_number → contract_id 索引（SQLite）。
+
+    同一编号出现多个不同 contract_id 时记为歧义（contract_id 为 NULL），查询按未命中处理。
+    meta 表保存增量水位与未完成的分页进度，中断后可续传。
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS contracts ("
+            " contract_number TEXT PRIMARY KEY, contract_id TEXT, modified_at REAL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, contract_number: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT contract_id FROM contracts WHERE contract_number=?", (contract_number,)).fetchone()
+            if row is not None and row[0]:
+                self._hits += 1
+                return row[0]
+            self._misses += 1
+            return None
+
+    def upsert_page(self, items: Iterable[Tuple[str, str, Optional[float]]], meta: Dict[str, Optional[str]]) -> None:
+        """在同一事务内写入一页条目与分页进度，保证索引与续传位置一致。"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO contracts (contract_number, contract_id, modified_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT(contract_number) DO UPDATE SET"
+                    " contract_id = CASE WHEN contracts.contract_id = excluded.contract_id THEN excluded.contract_id ELSE NULL END,"
+                    " modified_at = excluded.modified_at",
+                    list(items),
+                )
+                for key, value in meta.items():
+                    if value is None:
+                        self._conn.execute("DELETE FROM meta WHERE key=?", (key,))
+                    else:
+                        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def size(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ContractIndexer:
+    """分页遍历合同搜索接口构建/刷新索引；请求走 contract_search 限流桶。
+
+    首次全量分页；之后仅拉取修改时间不早于水位（减去 overlap）的合同。每页提交后记录分页进度，中断后从断点续传。
+    """
+
+    def __init__(
+        self,
+        client: ContractOpenAPIClient,
+        index: ContractIndex,
+        modified_since_field: str,
+        modified_field: str,
+        page_size: int = 50,
+        overlap_s: float = 300.0,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self.client = client
+        self.index = index
+        self.modified_since_field = modified_since_field
+        self.modified_field = modified_field
+        self.page_size = page_size
+        self.overlap_s = overlap_s
+        self.logger = logger
+
+    def refresh(self) -> Dict[str, Any]:
+        started = time.time()
+        watermark = _to_ts(self.index.get_meta("watermark"))
+        resume_token = self.index.get_meta("sync_page_token")
+        if resume_token:
+            since = _to_ts(self.index.get_meta("sync_since"))
+        else:
+            since = watermark - self.overlap_s if watermark is not None else None
+        max_modified = _to_ts(self.index.get_meta("sync_max_modified")) or 0.0
+        token = resume_token
+        pages = 0
+        items_total = 0
+        while True:
+            body: Dict[str, Any] = {"page_size": self.page_size}
+            if token:
+                body["page_token"] = token
+            if since is not None:
+                body[self.modified_since_field] = str(int(since * 1000))
+            status, data, _ = self.client._request(body)
+            _, code, msg = _classify(status, data)
+            if msg not in (None, "NOT_FOUND_CONTRACT"):
+                raise RuntimeError(f"prefetch_failed: {code} {msg}")
+            payload = (data or {}).get("data") or {}
+            rows = []
+            for item in payload.get("items") or []:
+                cn = (item or {}).get("contract_number")
+                cid = (item or {}).get("contract_id")
+                if not cn or not cid:
+                    continue
+                modified = _to_ts(item.get(self.modified_field))
+                if modified is not None:
+                    max_modified = max(max_modified, modified)
+                rows.append((str(cn), str(cid), modified))
+            token = payload.get("page_token") if payload.get("has_more") else None
+            self.index.upsert_page(rows, {
+                "sync_page_token": token,
+                "sync_since": str(since) if token and since is not None else None,
+                "sync_max_modified": str(max_modified) if token else None,
+            })
+            pages += 1
+            items_total += len(rows)
+            if not token:
+                break
+        # 条目不带修改时间时以本次刷新开始时间为水位
+        self.index.upsert_page([], {"watermark": str(max_modified or started)})
+        result = {
+            "mode": "incremental" if since is not None else "full",
+            "resumed": bool(resume_token),
+            "pages": pages,
+            "items": items_total,
+            "index_size": self.index.size(),
+            "elapsedMs": int((time.time() - started) * 1000),
+        }
+        if self.logger is not None:
+            self.logger.info("prefetch_index", result)
+        return result
+
+
+class IndexedSearcher:
+    """先查本地索引，未命中再交给下游搜索（客户端或微批），接口与 search_contract_id 一致。"""
+
+    def __init__(self, index: ContractIndex, inner: Any) -> None:
+        self.index = index
+        self.inner = inner
+
+    def search_contract_id(self, contract_number: str) -> SearchResult:
+        cid = self.index.lookup(contract_number)
+        if cid:
+            return cid, 0, None, None
+        return self.inner.search_contract_id(contract_number)
+
+
+class AsyncIndexedSearcher(IndexedSearcher):
+    """IndexedSearcher 的 asyncio 版本：索引查询（sqlite）交给 executor 执行，不阻塞事件循环。"""
+
+    def __init__(self, index: ContractIndex, inner: Any, executor: Optional[Executor] = None) -> None:
+        super().__init__(index, inner)
+        self.executor = executor
+
+    async def search_contract_id(self, contract_number: str) -> SearchResult:  # type: ignore[override]
+        cid = await asyncio.get_running_loop().run_in_executor(self.executor, self.index.lookup, contract_number)
+        if cid:
+            return cid, 0, None, None
+        return await self.inner.search_contract_id(contract_number)
@@ -1,22 +1,72 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
+import signal
+import threading
 import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from pathlib import Path
-from .auth import AuthManager
+from urllib.parse import urlsplit
+from . import profiling
+from .auth import OPENAPI_BASE, AsyncAuthManager, AuthManager
+from .cache import ResolutionCache
+from .config import load_config
+from .http.async_client import AsyncHttpClient
+from .http.adaptive import AdaptiveRateController
+from .http.breaker import CircuitBreakers
 from .http.client import HttpClient
-from .http.rate_limiter import RateLimiter
+from .http.decode import json_loader
+from .http.rate_limiter import RateLimiter, SharedRateLimiter
 from .http.retry import Retryer
-from .io.reader import read_contract_numbers, read_results_excel
+from .io.dedupe import InputDeduper
+from .io.reader import count_lines, input_paths, iter_contract_numbers, iter_results
+from .io.journal import CheckpointJournal, reset_journal
+from .io.merge import JournalIndex, ResultIndex, ResultMerger
 from .io.writer import write_results
 from .models import ResultRow, Status
-from .openapi.contract_client import ContractOpenAPIClient
-from .clm.clm_client import CLMClient
-from .logger import JsonLogger
+from .openapi.batch_search import AsyncBatchSearcher, BatchSearcher
+from .openapi.contract_client import AsyncContractOpenAPIClient, ContractOpenAPIClient
+from .openapi.contract_index import AsyncIndexedSearcher, ContractIndex, ContractIndexer, IndexedSearcher
+from .clm.clm_client import CLM_BASE, AsyncCLMClient, CLMClient
+from .clm.cookie_guard import CookieGuard
+from .logger import JsonLogger, LogSink
+from .metrics import RunMetrics, serve_metrics
+from .pipeline.async_runner import run_async_pool
+from .pipeline.planner import PlanItem, RerunPlanner, estimate_calls, plan_task
+from .pipeline.pool import run_pool
+from .pipeline.progress import ProgressTracker
+from .pipeline.staged import Stage, run_staged, stage_workers
+from .service import LookupService, serve_lookup
+from .singleflight import AsyncCoalescingCLMClient, AsyncCoalescingSearcher, CoalescingCLMClient, CoalescingSearcher, SingleFlight, reusable_result
+from .shard import apply_shard, shard_of
+from .pipeline.steps import STEP_CONTRACT_INFO, STEP_COOP_INFO, STEP_SEARCH, AsyncStepRunner, ContractTask, StepRunner
 
+# async 引擎中承接阻塞调用（缓存、索引、日志、结果日志）的线程数；这些调用单次为亚毫秒级且各自加锁，少量线程即可
+_ASYNC_IO_WORKERS = 4
 
-def _build_http(cfg: Dict) -> HttpClient:
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_log_sink(cfg: Dict, log_file: str) -> LogSink:
+    log_cfg = cfg.get("log") or {}
+    return LogSink(
+        log_file,
+        async_mode=bool(log_cfg.get("async", False)),
+        queue_size=int(log_cfg.get("queue_size", 10000)),
+        flush_interval_s=float(log_cfg.get("flush_interval_ms", 200)) / 1000.0,
+        console=log_cfg.get("console", "on"),
+        console_sample_every=int(log_cfg.get("console_sample_every", 100)),
+    )
+
+
+def _build_limiter(cfg: Dict) -> RateLimiter:
     rl_cfg = cfg.get("rate_limit") or {}
     qpm = {
         "global": rl_cfg.get("global_qpm", 60),
@@ -24,235 +74,705 @@ def _build_http(cfg: Dict) -> HttpClient:
         "contract_info": rl_cfg.get("contract_info_qpm", 60),
         "cooperation_info": rl_cfg.get("cooperation_info_qpm", 60),
     }
-    limiter = RateLimiter(qpm)
+    if rl_cfg.get("shared_state_file"):
+        return SharedRateLimiter(qpm, int(rl_cfg.get("burst", 1)), rl_cfg["shared_state_file"])
+    return RateLimiter(qpm, burst=int(rl_cfg.get("burst", 1)))
+
+
+def _build_retryer(cfg: Dict) -> Retryer:
+    rt_cfg = cfg.get("retry") or {}
+    return Retryer(rt_cfg.get("max_retries", 3), rt_cfg.get("base_delay_ms", 500), rt_cfg.get("max_delay_ms", 10000), float(rt_cfg.get("jitter", 0.2)))
+
+
+def _stage_sizes(cfg: Dict) -> List[int]:
+    rl_cfg = cfg.get("rate_limit") or {}
+    pl_cfg = cfg.get("pipeline") or {}
+    latency_ms = int(pl_cfg.get("stage_latency_ms", 1000))
+    max_workers = int(pl_cfg.get("max_stage_workers", 16))
+    search_workers = stage_workers(rl_cfg.get("contract_search_qpm", 60), latency_ms, max_workers)
+    sb_cfg = cfg.get("search_batch") or {}
+    if sb_cfg.get("enabled"):
+        # 微批需要足够多的并发搜索方才能攒满一批
+        search_workers = max(search_workers, int(sb_cfg.get("batch_size", 20)))
+    return [
+        search_workers,
+        stage_workers(rl_cfg.get("contract_info_qpm", 60), latency_ms, max_workers),
+        stage_workers(rl_cfg.get("cooperation_info_qpm", 60), latency_ms, max_workers),
+    ]
+
+
+def _pool_maxsize(cfg: Dict) -> int:
+    # 单主机连接池容量：显式配置优先，否则取在途请求数上限（不小于 requests 默认的 10）
+    size = int((cfg.get("http") or {}).get("pool_maxsize", 0))
+    if size > 0:
+        return size
+    if (cfg.get("pipeline") or {}).get("engine") == "staged":
+        in_flight = sum(_stage_sizes(cfg))
+    else:
+        in_flight = int((cfg.get("rate_limit") or {}).get("concurrency", 1))
+    return max(10, in_flight)
+
+
+def _build_controller(cfg: Dict, limiter: RateLimiter, logger: JsonLogger) -> Optional[AdaptiveRateController]:
+    rl_cfg = cfg.get("rate_limit") or {}
+    ad_cfg = rl_cfg.get("adaptive") or {}
+    if not ad_cfg.get("enabled"):
+        return None
+    factor = float(ad_cfg.get("ceiling_factor", 1.0))
+    ceilings = {
+        "contract_search": int(rl_cfg.get("contract_search_qpm", 60) * factor),
+        "contract_info": int(rl_cfg.get("contract_info_qpm", 60) * factor),
+        "cooperation_info": int(rl_cfg.get("cooperation_info_qpm", 60) * factor),
+    }
+    return AdaptiveRateController(
+        limiter,
+        ceilings,
+        decrease_factor=float(ad_cfg.get("decrease_factor", 0.5)),
+        increase_step=int(ad_cfg.get("increase_step", 5)),
+        increase_interval_s=float(ad_cfg.get("increase_interval_s", 10)),
+        cooldown_s=float(ad_cfg.get("cooldown_s", 5)),
+        min_qpm=int(ad_cfg.get("min_qpm", 1)),
+        logger=logger,
+    )
+
+
+def _build_http(
+    cfg: Dict,
+    limiter: RateLimiter,
+    logger: Optional[JsonLogger] = None,
+    controller: Optional[AdaptiveRateController] = None,
+    metrics: Optional[RunMetrics] = None,
+    breakers: Optional[CircuitBreakers] = None,
+) -> HttpClient:
+    rt_cfg = cfg.get("retry") or {}
+    http_cfg = cfg.get("http") or {}
+    return HttpClient(
+        rt_cfg.get("timeout_ms", 8000),
+        limiter,
+        _build_retryer(cfg),
+        pool_maxsize=_pool_maxsize(cfg),
+        keep_alive=bool(http_cfg.get("keep_alive", True)),
+        idle_timeout_s=float(http_cfg.get("idle_timeout_s", 0)),
+        logger=logger if http_cfg.get("timing_log") else None,
+        controller=controller,
+        metrics=metrics,
+        breakers=breakers,
+        loads=json_loader(http_cfg.get("json_decoder") or "auto"),
+    )
+
+
+def _build_clients(cfg: Dict, http: HttpClient, guard: Optional[CookieGuard]) -> Tuple[AuthManager, CLMClient, ContractOpenAPIClient]:
+    auth_cfg = cfg.get("auth") or {}
+    ep_cfg = cfg.get("endpoints") or {}
+    auth = AuthManager(
+        auth_cfg.get("app_id") or "",
+        auth_cfg.get("app_secret") or "",
+        http,
+        ep_cfg.get("openapi_base") or OPENAPI_BASE,
+        cache_file=auth_cfg.get("token_cache_file") or "",
+        refresh_ahead_s=float(auth_cfg.get("refresh_ahead_s", 0)),
+    )
+    clm = CLMClient(http, (auth_cfg.get("cookies") or {}).get("session") or "", ep_cfg.get("clm_base") or CLM_BASE, guard, bool(ep_cfg.get("clm_doc_version")))
+    openapi = ContractOpenAPIClient(http, auth, ep_cfg.get("openapi_base") or OPENAPI_BASE)
+    return auth, clm, openapi
+
+
+def _build_breakers(cfg: Dict, logger: JsonLogger) -> Optional[CircuitBreakers]:
+    cb_cfg = cfg.get("circuit_breaker") or {}
+    if not cb_cfg.get("enabled"):
+        return None
+    return CircuitBreakers(
+        failure_rate=float(cb_cfg.get("failure_rate", 0.5)),
+        min_requests=int(cb_cfg.get("min_requests", 20)),
+        window_s=float(cb_cfg.get("window_s", 30)),
+        open_s=float(cb_cfg.get("open_s", 30)),
+        half_open_max=int(cb_cfg.get("half_open_max", 1)),
+        logger=logger,
+    )
+
+
+def _build_cookie_guard(cfg: Dict, logger: JsonLogger, config_path: Optional[str]) -> Optional[CookieGuard]:
+    auth_cfg = cfg.get("auth") or {}
+    policy = auth_cfg.get("cookie_policy") or "continue"
+    if policy == "continue":
+        return None
+
+    def reload() -> Optional[str]:
+        # 暂停期间由使用者更新配置文件中的 Cookie；配置加载失败（如编辑到一半）时继续等待
+        try:
+            return ((load_config(config_path).get("auth") or {}).get("cookies") or {}).get("session")  # type: ignore[arg-type]
+        except Exception:
+            return None
+
+    return CookieGuard(
+        policy,
+        (auth_cfg.get("cookies") or {}).get("session") or "",
+        reload if config_path else None,
+        poll_interval_s=float(auth_cfg.get("cookie_poll_interval_s", 10)),
+        pause_timeout_s=float(auth_cfg.get("cookie_pause_timeout_s", 1800)),
+        logger=logger,
+    )
+
+
+def _build_metrics(cfg: Dict, logger: JsonLogger) -> Tuple[Optional[RunMetrics], Optional[ThreadingHTTPServer]]:
+    """返回 (指标集合, /metrics 服务)；port 为 0 时只在 batch_end 输出汇总，不启动服务。"""
+    m_cfg = cfg.get("metrics") or {}
+    if not m_cfg.get("enabled"):
+        return None, None
+    metrics = RunMetrics()
+    port = int(m_cfg.get("port", 0))
+    if not port:
+        return metrics, None
+    host = m_cfg.get("host") or "127.0.0.1"
+    try:
+        server = serve_metrics(metrics.registry, host, port)
+    except OSError as e:
+        logger.warn("metrics_server_failed", {"host": host, "port": port, "error": str(e)})
+        return metrics, None
+    logger.info("metrics_server", {"url": f"http://{host}:{server.server_address[1]}/metrics"})
+    return metrics, server
+
+
+def _build_deduper(cfg: Dict) -> InputDeduper:
+    in_cfg = cfg.get("input") or {}
+    return InputDeduper(in_cfg.get("dedupe") or "memory", tmp_dir=in_cfg.get("tmp_dir") or "")
+
+
+def _estimate_total(inputs: List[str], tracker: ProgressTracker, shard_count: int = 1) -> None:
+    # 后台按行数估算总量，供流式读取期间的进度与 ETA 使用
+    try:
+        tracker.estimate_total(count_lines(inputs) // shard_count)
+    except OSError:
+        pass
+
+
+def _iter_tasks(items: Iterable[PlanItem], metrics: Optional[RunMetrics], guard: Optional[CookieGuard] = None) -> Iterator[ContractTask]:
+    for i, item in enumerate(items):
+        if guard is not None and guard.aborted:
+            # 放弃后不再派发新合同，未处理的合同下次运行时仍会执行
+            return
+        if metrics is not None:
+            metrics.contracts_in_flight.inc()
+        yield plan_task(i, item)
+
+
+def _build_planner(cfg: Dict, logger: Optional[JsonLogger] = None) -> RerunPlanner:
     rt_cfg = cfg.get("retry") or {}
-    retryer = Retryer(rt_cfg.get("max_retries", 3), rt_cfg.get("base_delay_ms", 500), rt_cfg.get("max_delay_ms", 10000), float(rt_cfg.get("jitter", 0.2)))
-    return HttpClient(rt_cfg.get("timeout_ms", 8000), limiter, retryer)
+    output_excel = (cfg.get("files") or {}).get("output_excel")
+    fallback = Path(output_excel).stat().st_mtime if output_excel and Path(output_excel).exists() else time.time()
+    return RerunPlanner(
+        {Status(name) for name in rt_cfg.get("skip_result_statuses") or []},
+        {Status(name) for name in rt_cfg.get("give_up_statuses") or []},
+        {Status(name) for name in rt_cfg.get("transient_statuses") or []},
+        cooldown_s=float(rt_cfg.get("transient_cooldown_s", 60)),
+        resume=bool(rt_cfg.get("resume_from_step", True)),
+        fallback_attempt_at=fallback,
+        logger=logger,
+    )
+
+
+def _pending_codes(inputs: List[str], shard_index: int, shard_count: int, deduper: InputDeduper) -> Iterator[str]:
+    # 边读边去重、过滤其他分片的合同，首个合同无需等待整个输入读完
+    for code in iter_contract_numbers(inputs):
+        if shard_count > 1 and shard_of(code, shard_count) != shard_index:
+            continue
+        if deduper.add(code):
+            yield code
+
+
+def _build_flight(cfg: Dict) -> Optional[SingleFlight]:
+    co_cfg = cfg.get("coalesce") or {}
+    if not co_cfg.get("enabled"):
+        return None
+    return SingleFlight(float(co_cfg.get("ttl_s", 0)), int(co_cfg.get("max_entries", 0)), reusable_result)
+
+
+def _coalesced(searcher: Any, clm: CLMClient, flight: Optional[SingleFlight]) -> Tuple[Any, Any]:
+    if flight is None:
+        return searcher, clm
+    if isinstance(clm, AsyncCLMClient):
+        return AsyncCoalescingSearcher(searcher, flight), AsyncCoalescingCLMClient(clm, flight)
+    return CoalescingSearcher(searcher, flight), CoalescingCLMClient(clm, flight)
+
+
+def _build_searcher(cfg: Dict, openapi: ContractOpenAPIClient):
+    sb_cfg = cfg.get("search_batch") or {}
+    if not sb_cfg.get("enabled"):
+        return openapi
+    cls = AsyncBatchSearcher if isinstance(openapi, AsyncContractOpenAPIClient) else BatchSearcher
+    return cls(
+        openapi,
+        int(sb_cfg.get("batch_size", 20)),
+        float(sb_cfg.get("max_wait_ms", 50)) / 1000.0,
+        sb_cfg.get("field") or "contract_numbers",
+    )
+
+
+def _prefetch_index(cfg: Dict, openapi: ContractOpenAPIClient, inputs: List[str], logger: JsonLogger) -> Tuple[Optional[ContractIndex], Optional[Dict]]:
+    """主循环前的预取阶段：按需刷新本地合同索引，返回 (索引, 刷新结果)。刷新失败时沿用已有索引。"""
+    pf_cfg = cfg.get("prefetch") or {}
+    if not pf_cfg.get("enabled"):
+        return None, None
+    index = ContractIndex(pf_cfg.get("index_path") or "./output/contract_index.sqlite3")
+    # 按输入行数估算合同量，避免为此完整去重一遍输入
+    min_contracts = int(pf_cfg.get("min_contracts", 0))
+    if min_contracts and count_lines(inputs) < min_contracts:
+        return index, None
+    indexer = ContractIndexer(
+        openapi,
+        index,
+        pf_cfg.get("modified_since_field") or "update_time_start",
+        pf_cfg.get("modified_field") or "update_time",
+        page_size=int(pf_cfg.get("page_size", 50)),
+        overlap_s=float(pf_cfg.get("overlap_s", 300)),
+        logger=logger,
+    )
+    try:
+        return index, indexer.refresh()
+    except Exception as e:
+        logger.warn("prefetch_failed", {"error": str(e), "index_size": index.size()})
+        return index, None
+
+
+async def _run_async_engine(
+    cfg: Dict,
+    limiter: RateLimiter,
+    controller: Optional[AdaptiveRateController],
+    cache: Optional[ResolutionCache],
+    tasks: Iterable[ContractTask],
+    logger: JsonLogger,
+    on_result: Callable[[ContractTask, ResultRow], None],
+    index: Optional[ContractIndex] = None,
+    metrics: Optional[RunMetrics] = None,
+    breakers: Optional[CircuitBreakers] = None,
+    guard: Optional[CookieGuard] = None,
+    flight: Optional[SingleFlight] = None,
+    warmup: bool = False,
+) -> Optional[Dict]:
+    """返回合同搜索微批统计（未启用时为 None）。warmup 为 True 时先按 http.warmup_connections 预热连接。"""
+    # aiohttp 会话需在事件循环内创建，因此异步客户端栈在此处而非 run() 中构建
+    concurrency = int((cfg.get("rate_limit") or {}).get("concurrency", 1))
+    pool_size = int((cfg.get("pipeline") or {}).get("async_pool_size", 100))
+    http_cfg = cfg.get("http") or {}
+    http = AsyncHttpClient(
+        int((cfg.get("retry") or {}).get("timeout_ms", 8000)),
+        limiter,
+        _build_retryer(cfg),
+        pool_size,
+        keep_alive=bool(http_cfg.get("keep_alive", True)),
+        idle_timeout_s=float(http_cfg.get("idle_timeout_s", 0)),
+        controller=controller,
+        metrics=metrics,
+        breakers=breakers,
+        loads=json_loader(http_cfg.get("json_decoder") or "auto"),
+        logger=logger if http_cfg.get("timing_log") else None,
+    )
+    auth_cfg = cfg.get("auth") or {}
+    ep_cfg = cfg.get("endpoints") or {}
+    auth = AsyncAuthManager(
+        auth_cfg.get("app_id") or "",
+        auth_cfg.get("app_secret") or "",
+        http,
+        ep_cfg.get("openapi_base") or OPENAPI_BASE,
+        cache_file=auth_cfg.get("token_cache_file") or "",
+        refresh_ahead_s=float(auth_cfg.get("refresh_ahead_s", 0)),
+    )
+    clm = AsyncCLMClient(http, (auth_cfg.get("cookies") or {}).get("session") or "", ep_cfg.get("clm_base") or CLM_BASE, guard, bool(ep_cfg.get("clm_doc_version")))
+    openapi = AsyncContractOpenAPIClient(http, auth, ep_cfg.get("openapi_base") or OPENAPI_BASE)
+    searcher = _build_searcher(cfg, openapi)
+    step_searcher, step_clm = _coalesced(searcher, clm, flight)
+    # 缓存、索引查询、日志与结果日志写入均为阻塞调用，交给独立线程池执行，事件循环只等待网络
+    io_pool = ThreadPoolExecutor(max_workers=_ASYNC_IO_WORKERS, thread_name_prefix="async-io")
+    runner = AsyncStepRunner(AsyncIndexedSearcher(index, step_searcher, io_pool) if index is not None else step_searcher, step_clm, logger, cache, metrics, io_pool)
+    try:
+        if warmup:
+            warm_start = time.perf_counter()
+            hosts = [_origin(openapi.url), clm.base]
+            await http.warm_up(hosts, min(pool_size, int(http_cfg.get("warmup_connections", 4))))
+            logger.info("http_warmup", {"hosts": hosts, "elapsedMs": int((time.perf_counter() - warm_start) * 1000)})
+        await run_async_pool(tasks, runner.process, concurrency, on_result, io_pool)
+    finally:
+        await http.close()
+        io_pool.shutdown(wait=True)
+    return searcher.stats() if isinstance(searcher, BatchSearcher) else None
+
 
+def _build_cache(cfg: Dict, logger: JsonLogger) -> Optional[ResolutionCache]:
+    cache_cfg = cfg.get("cache") or {}
+    if not cache_cfg.get("enabled"):
+        return None
+    cache = ResolutionCache(
+        cache_cfg.get("path") or "./output/resolution_cache.sqlite3",
+        {hop: float(v) for hop, v in (cache_cfg.get("ttl_s") or {}).items()},
+        float(cache_cfg.get("negative_ttl_s", 0)),
+    )
+    invalidate = cache_cfg.get("invalidate") or []
+    if invalidate:
+        hops = None if "all" in invalidate else invalidate
+        removed = cache.invalidate(hops)
+        logger.info("cache_invalidate", {"hops": invalidate, "removed": removed})
+    return cache
 
-def run(cfg: Dict) -> None:
+
+def _build_stages(cfg: Dict, runner: StepRunner) -> List[Stage]:
+    search_n, info_n, coop_n = _stage_sizes(cfg)
+    return [
+        Stage(STEP_SEARCH, runner.search, search_n),
+        Stage(STEP_CONTRACT_INFO, runner.contract_info, info_n),
+        Stage(STEP_COOP_INFO, runner.coop_info, coop_n),
+    ]
+
+
+def _journal_path(cfg: Dict) -> str:
+    ck_cfg = cfg.get("checkpoint") or {}
+    output_excel = (cfg.get("files") or {}).get("output_excel") or "./output/contract_openChatId.xlsx"
+    return ck_cfg.get("journal_file") or f"{output_excel}.journal.jsonl"
+
+
+def _write_merged(
+    cfg: Dict,
+    input_order: Iterable[str],
+    existing: Mapping[str, ResultRow],
+    new: Mapping[str, ResultRow],
+) -> Dict[str, int]:
+    # 历史结果按索引顺序逐行读出、逐行写出
+    files = cfg.get("files") or {}
+    merger = ResultMerger(new)
+    write_results(files.get("output_excel"), merger.merge(existing, input_order), files.get("sidecar_format") or None)
+    return merger.stats()
+
+
+def _iter_existing(cfg: Dict) -> Iterator[ResultRow]:
+    files = cfg.get("files") or {}
+    output_excel = files.get("output_excel")
+    if not Path(output_excel).exists():
+        return iter(())
+    return iter_results(output_excel, files.get("sidecar_format") or None)
+
+
+def _index_existing(cfg: Dict) -> ResultIndex:
+    # 历史结果只读一遍，转存到与输入去重相同的临时目录
+    return ResultIndex(_iter_existing(cfg), (cfg.get("input") or {}).get("tmp_dir") or "")
+
+
+def _input_order(cfg: Dict) -> Iterable[str]:
+    # 导出时用于排列新合同的输入顺序；输入文件已不存在时新合同按结果顺序写出
+    inputs = input_paths((cfg.get("files") or {}).get("input_txt") or [])
+    return iter_contract_numbers(inputs) if inputs and all(Path(p).exists() for p in inputs) else []
+
+
+def _shard(cfg: Dict) -> Tuple[int, int]:
+    sh = cfg.get("shard") or {}
+    return int(sh.get("index", 0)), int(sh.get("count", 1))
+
+
+def export(cfg: Dict) -> None:
+    """独立的导出步骤：将结果日志与历史 Excel 合并写出，随后清空结果日志。可在运行中断后单独执行。"""
+    cfg = apply_shard(cfg, *_shard(cfg))
+    output_excel = (cfg.get("files") or {}).get("output_excel")
+    journal_path = _journal_path(cfg)
+    journal = JournalIndex(journal_path)
+    existing = _index_existing(cfg)
+    try:
+        _write_merged(cfg, _input_order(cfg), existing, journal)
+    finally:
+        existing.close()
+        journal.close()
+    reset_journal(journal_path)
+    print(f"已导出 {len(journal)} 条新结果至 {output_excel}")
+
+
+def merge_shards(cfg: Dict, count: int) -> None:
+    """将 count 个分片的输出（含未导出的结果日志）合并写入主输出 Excel，upsert 语义与 run() 一致。
+
+    分片之间合同不重叠；主输出中的历史顺序保持不变，新合同按输入文件顺序追加。
+    """
+    output_excel = (cfg.get("files") or {}).get("output_excel")
+    # 字典保持首次插入的位置，后写入的同名记录只替换内容
+    new_map: Dict[str, ResultRow] = {}
+    for i in range(count):
+        scfg = apply_shard(cfg, i, count)
+        for row in _iter_existing(scfg):
+            new_map[row.contract_number] = row
+        # 结果日志比分片 Excel 更新
+        journal = JournalIndex(_journal_path(scfg))
+        try:
+            new_map.update(journal.items())
+        finally:
+            journal.close()
+    existing = _index_existing(cfg)
+    try:
+        _write_merged(cfg, _input_order(cfg), existing, new_map)
+    finally:
+        existing.close()
+    print(f"已合并 {count} 个分片共 {len(new_map)} 条结果至 {output_excel}")
+
+
+def dry_run(cfg: Dict) -> Dict:
+    """不调用接口，按重跑计划统计待处理合同与各接口调用次数上限，并按配额估算最短耗时。"""
+    shard_index, shard_count = _shard(cfg)
+    cfg = apply_shard(cfg, shard_index, shard_count)
+    inputs = input_paths((cfg.get("files") or {}).get("input_txt"))
+    existing = _index_existing(cfg)
+    journal_path = _journal_path(cfg)
+    journal_map: Mapping[str, ResultRow] = {}
+    if (cfg.get("checkpoint") or {}).get("enabled") and Path(journal_path).exists():
+        journal_map = JournalIndex(journal_path)
+
+    planner = _build_planner(cfg)
+    deduper = _build_deduper(cfg)
+    try:
+        for _ in planner.plan(_pending_codes(inputs, shard_index, shard_count, deduper), lambda c: journal_map.get(c) or existing.get(c)):
+            pass
+    finally:
+        deduper.close()
+        existing.close()
+        if isinstance(journal_map, JournalIndex):
+            journal_map.close()
+    calls = estimate_calls(planner.start_steps)
+    rl_cfg = cfg.get("rate_limit") or {}
+    # 各接口按自身 QPM、全部请求按 global_qpm 计算所需分钟数，取最大者
+    minutes = [calls[ep] / max(1, rl_cfg.get(f"{ep}_qpm", 60)) for ep in calls]
+    minutes.append(sum(calls.values()) / max(1, rl_cfg.get("global_qpm", 60)))
+    plan = dict(planner.stats(), input=deduper.stats(), calls=calls, total_calls=sum(calls.values()), min_minutes=round(max(minutes), 1))
+    counts = planner.counts
+    steps = planner.start_steps
+    print(
+        f"待处理 {counts['fresh'] + counts['rerun'] + counts['deferred']} 个合同（新合同 {counts['fresh']}，重跑 {counts['rerun']}，"
+        f"延后重试 {counts['deferred']}；其中从 CONTRACT_INFO 继续 {steps[STEP_CONTRACT_INFO]}、从 COOP_INFO 继续 {steps[STEP_COOP_INFO]}），"
+        f"跳过 {counts['skipped']}，放弃 {counts['given_up']}"
+    )
+    print(
+        f"预计接口调用至多 {plan['total_calls']} 次（contract_search {calls['contract_search']}、contract_info {calls['contract_info']}、"
+        f"cooperation_info {calls['cooperation_info']}，不含重试与缓存命中），按当前配额至少需要 {plan['min_minutes']} 分钟"
+    )
+    return plan
+
+
+def run(cfg: Dict, config_path: Optional[str] = None) -> None:
+    """执行一个批次；config_path 供 Cookie 失效暂停策略重新读取配置。"""
+    shard_index, shard_count = _shard(cfg)
+    cfg = apply_shard(cfg, shard_index, shard_count)
     files = cfg.get("files") or {}
     input_txt = files.get("input_txt")
     output_excel = files.get("output_excel")
     log_file = files.get("log_file") or "./logs/run.log"
 
-    http = _build_http(cfg)
-    auth_cfg = cfg.get("auth") or {}
-    auth = AuthManager(auth_cfg.get("app_id") or "", auth_cfg.get("app_secret") or "", http)
-    clm = CLMClient(http, (auth_cfg.get("cookies") or {}).get("session") or "")
-    openapi = ContractOpenAPIClient(http, auth)
-
     log_cfg = cfg.get("log") or {}
     log_level = (log_cfg.get("level") or "INFO")
-    logger = JsonLogger(log_file, module="orchestrator", level=log_level)
+    logger = JsonLogger(log_file, module="orchestrator", level=log_level, sink=_build_log_sink(cfg, log_file))
     trace_id = JsonLogger.new_trace_id()
     logger = logger.with_context({"traceId": trace_id})
 
-    nums = read_contract_numbers(input_txt)
-
-    existing_order: List[str] = []
-    existing_map: Dict[str, ResultRow] = {}
-    if Path(output_excel).exists():
-        existing_order, existing_map = read_results_excel(output_excel)
-
-    retry_cfg = cfg.get("retry") or {}
-    skip_status_names = retry_cfg.get("skip_result_statuses") or []
-    skip_statuses = {Status(name) for name in skip_status_names}
-
-    todo_nums: List[str] = []
-    for code in nums:
-        r = existing_map.get(code)
-        if r and r.status in skip_statuses:
-            logger.info("skip_existing", {
-                "contract_number": code,
-                "status": r.status.value,
-                "reason": "skip_result_statuses",
-            })
-            continue
-        todo_nums.append(code)
+    limiter = _build_limiter(cfg)
+    controller = _build_controller(cfg, limiter, logger)
+    metrics, metrics_server = _build_metrics(cfg, logger)
+    breakers = _build_breakers(cfg, logger)
+    guard = _build_cookie_guard(cfg, logger, config_path)
+    http = _build_http(cfg, limiter, logger, controller, metrics, breakers)
+    auth, clm, openapi = _build_clients(cfg, http, guard)
+
+    cache = _build_cache(cfg, logger)
+
+    inputs = input_paths(input_txt)
+
+    # 历史结果流式转存为按偏移的索引：重跑计划按编号查找，合并时按原顺序读出
+    existing = _index_existing(cfg)
+
+    # 结果日志中的记录来自上次中断的运行，比 Excel 更新；按偏移索引，记录按需读取
+    ck_cfg = cfg.get("checkpoint") or {}
+    journal_path = _journal_path(cfg) if ck_cfg.get("enabled") else None
+    journal_map: Mapping[str, ResultRow] = {}
+    if journal_path and Path(journal_path).exists():
+        journal_map = JournalIndex(journal_path)
+        logger.info("checkpoint_replay", {"journal": journal_path, "records": len(journal_map)})
+
+    deduper = _build_deduper(cfg)
+    tracker = ProgressTracker(logger, None)
 
-    total = len(todo_nums)
-    results: List[ResultRow] = []
+    planner = _build_planner(cfg, logger)
 
-    start = time.time()
-    succ = fail = 0
+    def lookup(code: str) -> Optional[ResultRow]:
+        return journal_map.get(code) or existing.get(code)
+
+    # 计划按输入流式产出，读完输入后回填准确总数，延后重试的合同排在最后
+    todo = planner.plan(_pending_codes(inputs, shard_index, shard_count, deduper), lookup, tracker.set_total)
+    first = next(todo, None)
+    todo_items: Iterable[PlanItem] = itertools.chain([first], todo) if first is not None else []
+    if first is not None:
+        threading.Thread(target=_estimate_total, args=(inputs, tracker, shard_count), name="input-count", daemon=True).start()
+    else:
+        tracker.set_total(0)
+
+    concurrency = (cfg.get("rate_limit") or {}).get("concurrency", 1)
+    # 未启用结果日志时按待处理序号回填内存，保证并发执行下输出顺序与输入一致；
+    # 启用时结果逐条落盘，导出阶段再按输入顺序排列
+    slots: Dict[int, ResultRow] = {}
+    journal = CheckpointJournal(journal_path, int(ck_cfg.get("fsync_every", 100)), float(ck_cfg.get("fsync_interval_ms", 1000)) / 1000.0) if journal_path else None
+    index, prefetch = _prefetch_index(cfg, openapi, inputs, logger)
+    searcher = _build_searcher(cfg, openapi)
+    flight = _build_flight(cfg)
+    step_searcher, step_clm = _coalesced(searcher, clm, flight)
+    runner = StepRunner(IndexedSearcher(index, step_searcher) if index is not None else step_searcher, step_clm, logger, cache, metrics)
+    search_batch_stats: Optional[Dict] = None
+    pl_cfg = cfg.get("pipeline") or {}
+
+    def on_result(task: ContractTask, row: ResultRow) -> None:
+        if journal is not None:
+            journal.append(row)
+        else:
+            slots[task.index] = row
+        tracker.record(row)
+        if metrics is not None:
+            metrics.contracts_in_flight.dec()
+            metrics.contracts.inc(row.status.value)
+
+    http_cfg = cfg.get("http") or {}
+    warmup = bool(http_cfg.get("warmup")) and first is not None
+    # async 引擎的连接池在事件循环内创建，预热在 _run_async_engine 中进行
+    if warmup and pl_cfg.get("engine") != "async":
+        warm_start = time.perf_counter()
+        hosts = [_origin(openapi.url), clm.base]
+        http.warm_up(hosts, min(_pool_maxsize(cfg), int(http_cfg.get("warmup_connections", 4))))
+        logger.info("http_warmup", {"hosts": hosts, "elapsedMs": int((time.perf_counter() - warm_start) * 1000)})
 
     logger.info("batch_start", {
-        "total": total,
-        "concurrency": (cfg.get("rate_limit") or {}).get("concurrency", 1),
+        "inputs": inputs,
+        "shard": f"{shard_index}/{shard_count}" if shard_count > 1 else None,
+        "concurrency": concurrency,
+        "engine": (cfg.get("pipeline") or {}).get("engine", "pool"),
     })
 
-    for i, code in enumerate(todo_nums):
-        c_id = coop_id = chat_id = None
-        status = Status.UNKNOWN_ERROR
-        err_code = None
-        err_msg = None
-
-        step_start = time.perf_counter()
-        logger.info("SEARCH start", {"step": "SEARCH", "contract_number": code})
-        c_id, r1, scode, smsg = openapi.search_contract_id(code)
-        elapsed = int((time.perf_counter() - step_start) * 1000)
-        if c_id is None:
-            # 先按业务码判断：110107 表示未查询到合同
-            if scode == 110107:
-                status = Status.NOT_FOUND_CONTRACT
-            elif smsg == "NOT_FOUND_CONTRACT":
-                status = Status.NOT_FOUND_CONTRACT
-            elif smsg == "AUTH_FAILED":
-                status = Status.AUTH_FAILED
-            elif smsg == "PERMISSION_DENIED":
-                status = Status.PERMISSION_DENIED
-            elif smsg == "RETRY_EXCEEDED":
-                status = Status.RETRY_EXCEEDED
-            else:
-                status = Status.UNKNOWN_ERROR
-            err_code = str(scode) if scode is not None else None
-            err_msg = smsg
-            logger.warn("SEARCH failed", {
-                "step": "SEARCH",
-                "contract_number": code,
-                "httpStatus": scode,
-                "retryCount": r1,
-                "elapsedMs": elapsed,
-                "status": status.value,
-                "errorMessage": smsg,
-            })
-        else:
-            logger.info("SEARCH success", {
-                "step": "SEARCH",
-                "contract_number": code,
-                "contract_id": c_id,
-                "httpStatus": 200,
-                "retryCount": r1,
-                "elapsedMs": elapsed,
-            })
-
-            step_start = time.perf_counter()
-            logger.info("CONTRACT_INFO start", {"step": "CONTRACT_INFO", "contract_number": code, "contract_id": c_id})
-            coop_id, r2, icode, imsg = clm.get_cooperation_id(c_id)
-            elapsed2 = int((time.perf_counter() - step_start) * 1000)
-            if coop_id is None:
-                if imsg == "NO_COOPERATION":
-                    status = Status.NO_COOPERATION
-                elif imsg == "AUTH_FAILED":
-                    status = Status.AUTH_FAILED
-                elif imsg == "PERMISSION_DENIED":
-                    status = Status.PERMISSION_DENIED
-                elif imsg == "RETRY_EXCEEDED":
-                    status = Status.RETRY_EXCEEDED
-                else:
-                    status = Status.UNKNOWN_ERROR
-                err_code = str(icode) if icode else None
-                err_msg = imsg
-                # 在 CONTRACT_INFO 失败时，将错误响应信息写入结果的 cooperation_id 列
-                logger.warn("CONTRACT_INFO failed", {
-                    "step": "CONTRACT_INFO",
-                    "contract_number": code,
-                    "contract_id": c_id,
-                    "httpStatus": icode,
-                    "retryCount": r2,
-                    "elapsedMs": elapsed2,
-                    "status": status.value,
-                    "errorMessage": imsg,
-                })
-            else:
-                logger.info("CONTRACT_INFO success", {
-                    "step": "CONTRACT_INFO",
-                    "contract_number": code,
-                    "contract_id": c_id,
-                    "cooperation_id": coop_id,
-                    "httpStatus": 200,
-                    "retryCount": r2,
-                    "elapsedMs": elapsed2,
-                })
-
-                step_start = time.perf_counter()
-                logger.info("COOP_INFO start", {"step": "COOP_INFO", "contract_number": code, "cooperation_id": coop_id})
-                chat_id, r3, ocode, omsg = clm.get_open_chat_id(coop_id)
-                elapsed3 = int((time.perf_counter() - step_start) * 1000)
-                if chat_id is None:
-                    if omsg == "NO_CHAT_GROUP":
-                        status = Status.NO_CHAT_GROUP
-                    elif omsg == "AUTH_FAILED":
-                        status = Status.AUTH_FAILED
-                    elif omsg == "PERMISSION_DENIED":
-                        status = Status.PERMISSION_DENIED
-                    elif omsg == "RETRY_EXCEEDED":
-                        status = Status.RETRY_EXCEEDED
-                    else:
-                        status = Status.UNKNOWN_ERROR
-                    err_code = str(ocode) if ocode else None
-                    err_msg = omsg
-                    # 在 COOP_INFO 失败时，将错误响应信息写入结果的 openChatId 列
-                    logger.warn("COOP_INFO failed", {
-                        "step": "COOP_INFO",
-                        "contract_number": code,
-                        "cooperation_id": coop_id,
-                        "httpStatus": ocode,
-                        "retryCount": r3,
-                        "elapsedMs": elapsed3,
-                        "status": status.value,
-                        "errorMessage": omsg,
-                    })
-                else:
-                    status = Status.SUCCESS
-                    err_code = None
-                    err_msg = None
-                    logger.info("COOP_INFO success", {
-                        "step": "COOP_INFO",
-                        "contract_number": code,
-                        "cooperation_id": coop_id,
-                        "openChatId": chat_id,
-                        "httpStatus": 200,
-                        "retryCount": r3,
-                        "elapsedMs": elapsed3,
-                    })
-
-        if status == Status.SUCCESS:
-            succ += 1
+    tasks = _iter_tasks(todo_items, metrics, guard)
+    if pl_cfg.get("engine") != "async":
+        auth.start_refresher()
+    try:
+        if pl_cfg.get("engine") == "staged":
+            run_staged(tasks, _build_stages(cfg, runner), int(pl_cfg.get("queue_size", 64)), on_result)
+        elif pl_cfg.get("engine") == "async":
+            search_batch_stats = asyncio.run(_run_async_engine(cfg, limiter, controller, cache, tasks, logger, on_result, index, metrics, breakers, guard, flight, warmup))
         else:
-            fail += 1
-
-        results.append(ResultRow(
-            contract_number=code,
-            contract_id=c_id,
-            cooperation_id=coop_id,
-            openChatId=chat_id,
-            status=status,
-            error_code=err_code,
-            error_message=err_msg,
-        ))
-
-        elapsed = time.time() - start
-        done = i + 1
-        avg = elapsed / max(1, done)
-        remain = total - done
-        eta = avg * remain
-        progress = round(done * 100.0 / max(1, total), 2)
-        logger.info("progress", {
-            "progressPercent": progress,
-            "success_count": succ,
-            "fail_count": fail,
-            "ETA_s": int(eta),
-            "done": done,
-            "total": total,
-        })
-
-    merged_map: Dict[str, ResultRow] = dict(existing_map)
-    for row in results:
-        merged_map[row.contract_number] = row
-
-    out_rows: List[ResultRow] = []
-    for cn in existing_order:
-        if cn in merged_map:
-            out_rows.append(merged_map[cn])
-
-    new_additions = [r.contract_number for r in results if r.contract_number not in existing_order]
-    for cn in new_additions:
-        out_rows.append(merged_map[cn])
-
-    if not existing_order and not results:
-        out_rows = []
-
-    write_results(output_excel, out_rows)
-    logger.info("batch_end", {"total": total, "success_count": succ, "fail_count": fail, "output": output_excel})
+            run_pool(tasks, runner.process, concurrency, on_result)
+        if isinstance(searcher, BatchSearcher) and pl_cfg.get("engine") != "async":
+            search_batch_stats = searcher.stats()
+    except BaseException:
+        # 中断时不再合并，删除历史结果的临时索引
+        existing.close()
+        raise
+    finally:
+        auth.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        if journal is not None:
+            journal.close()
+        deduper.close()
+    succ, fail = tracker.succ, tracker.fail
+
+    if isinstance(journal_map, JournalIndex):
+        journal_map.close()
+    new: Mapping[str, ResultRow]
+    if journal is not None:
+        new = JournalIndex(journal.path)
+    else:
+        new = {r.contract_number: r for r in (slots.pop(i) for i in sorted(slots))}
+    try:
+        merge_stats = _write_merged(cfg, iter_contract_numbers(inputs), existing, new)
+    finally:
+        existing.close()
+        if isinstance(new, JournalIndex):
+            new.close()
+    if journal is not None:
+        reset_journal(journal.path)
+    prof = profiling.active()
+    logger.info("batch_end", {
+        "total": tracker.done,
+        "input": deduper.stats(),
+        "plan": planner.stats(),
+        "merge": merge_stats,
+        "success_count": succ,
+        "fail_count": fail,
+        "output": output_excel,
+        "rate_limit": limiter.stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "search_batch": search_batch_stats,
+        "prefetch": dict(prefetch or {}, **index.stats()) if index is not None else None,
+        "metrics": metrics.summary() if metrics is not None else None,
+        "circuit": breakers.stats() if breakers is not None else None,
+        "cookie": guard.stats() if guard is not None else None,
+        "coalesce": flight.stats() if flight is not None else None,
+        "profile": prof.report() if prof is not None else None,
+    })
+    if cache is not None:
+        cache.close()
+    if index is not None:
+        index.close()
+    limiter.close()
+    logger.close()
+
+
+def _raise_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(cfg: Dict, config_path: Optional[str] = None) -> None:
+    """常驻查询服务：客户端、令牌、限流器与解析缓存常驻内存，通过本地 HTTP 接口按需解析合同，直到 Ctrl-C。"""
+    files = cfg.get("files") or {}
+    log_file = files.get("log_file") or "./logs/run.log"
+    log_cfg = cfg.get("log") or {}
+    logger = JsonLogger(log_file, module="service", level=log_cfg.get("level") or "INFO", sink=_build_log_sink(cfg, log_file))
+    logger = logger.with_context({"traceId": JsonLogger.new_trace_id()})
+
+    limiter = _build_limiter(cfg)
+    controller = _build_controller(cfg, limiter, logger)
+    metrics, metrics_server = _build_metrics(cfg, logger)
+    breakers = _build_breakers(cfg, logger)
+    guard = _build_cookie_guard(cfg, logger, config_path)
+    http = _build_http(cfg, limiter, logger, controller, metrics, breakers)
+    auth, clm, openapi = _build_clients(cfg, http, guard)
+    cache = _build_cache(cfg, logger)
+    flight = _build_flight(cfg)
+    runner = StepRunner(*_coalesced(_build_searcher(cfg, openapi), clm, flight), logger, cache, metrics)
+
+    sv_cfg = cfg.get("serve") or {}
+    rt_cfg = cfg.get("retry") or {}
+    service = LookupService(
+        runner,
+        int((cfg.get("rate_limit") or {}).get("concurrency", 1)),
+        float(sv_cfg.get("result_ttl_s", 300)),
+        int(sv_cfg.get("result_cache_size", 100000)),
+        {Status(s) for s in rt_cfg.get("transient_statuses") or []},
+    )
+
+    def extra() -> Dict:
+        return {
+            "rate_limit": limiter.stats(),
+            "cache": cache.stats() if cache is not None else None,
+            "circuit": breakers.stats() if breakers is not None else None,
+            "cookie": guard.stats() if guard is not None else None,
+            "coalesce": flight.stats() if flight is not None else None,
+        }
+
+    host, port = sv_cfg.get("host") or "127.0.0.1", int(sv_cfg.get("port", 8787))
+    server = serve_lookup(service, host, port, int(sv_cfg.get("max_batch", 1000)), extra, logger)
+    # 作为常驻进程时通常以 SIGTERM 停止，与 Ctrl-C 一样走正常退出流程
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    auth.start_refresher()
+    logger.info("serve_start", {"host": host, "port": port})
+    print(f"查询服务已启动: http://{host}:{port}/resolve?contract_number=...（Ctrl-C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        auth.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        logger.info("serve_stop", dict(service.stats(), **extra()))
+        if cache is not None:
+            cache.close()
+        limiter.close()
+        logger.close()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Iterable, Optional, Set
+
+from ..models import ResultRow
+from .steps import ContractTask
+
+
+async def run_async_pool(
+    tasks: Iterable[ContractTask],
+    process: Callable[[ContractTask], Awaitable[ResultRow]],
+    concurrency: int,
+    on_result: Callable[[ContractTask, ResultRow], None],
+    executor: Optional[Executor] = None,
+) -> None:
+    """在单个事件循环内保持最多 concurrency 个合同在途；协程按需创建，不会一次性展开全部任务。
+
+    未到 not_before 的任务在派发处等待，不占用并发名额。取下一个任务（读输入、重跑计划、去重）与 on_result
+    （结果日志、进度日志）会读写文件，均交给 executor（为 None 时用事件循环的默认线程池）执行，不阻塞事件循环；
+    两者都只由本协程依次等待，不会并发执行。
+    """
+    loop = asyncio.get_running_loop()
+    it = iter(tasks)
+    pending: Set["asyncio.Task[ResultRow]"] = set()
+    owners = {}
+    held: Optional[ContractTask] = None
+    exhausted = False
+    try:
+        while True:
+            delay = 0.0
+            while len(pending) < max(1, concurrency):
+                if held is None and not exhausted:
+                    held = await loop.run_in_executor(executor, next, it, None)
+                    exhausted = held is None
+                if held is None:
+                    break
+                delay = held.ready_in()
+                if delay > 0:
+                    break
+                fut = asyncio.ensure_future(process(held))
+                owners[fut] = held
+                pending.add(fut)
+                held = None
+            if not pending:
+                if held is None:
+                    break
+                await asyncio.sleep(delay)
+                continue
+            done, pending = await asyncio.wait(pending, timeout=delay or None, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                await loop.run_in_executor(executor, on_result, owners.pop(fut), fut.result())
+    finally:
+        for fut in pending:
+            fut.cancel()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..logger import JsonLogger
+from ..models import ResultRow, Status
+from .steps import STEP_CONTRACT_INFO, STEP_COOP_INFO, STEP_SEARCH, ContractTask
+
+# 各步骤对应的限流接口，用于估算调用量
+STEP_ENDPOINTS = (
+    (STEP_SEARCH, "contract_search"),
+    (STEP_CONTRACT_INFO, "contract_info"),
+    (STEP_COOP_INFO, "cooperation_info"),
+)
+_STEP_ORDER = [step for step, _ in STEP_ENDPOINTS]
+
+# 计划项：(合同编号, 历史结果, 起始步骤, 最早开始时间)
+PlanItem = Tuple[str, Optional[ResultRow], str, float]
+
+
+class RerunPlanner:
+    """重跑计划：根据历史结果决定每个合同跳过、放弃、立即执行还是延后重试，以及从哪一步继续。
+
+    - 状态属于 skip_statuses（已完成）或 give_up_statuses（永久错误，如 PERMISSION_DENIED）的合同不再执行；
+    - 属于 transient_statuses 的合同放到最后执行，且距上次请求不少于 cooldown_s；
+    - resume 开启时按历史结果中已有的 contract_id / cooperation_id 从首个未解析的步骤继续。
+    """
+
+    def __init__(
+        self,
+        skip_statuses: Set[Status],
+        give_up_statuses: Set[Status],
+        transient_statuses: Set[Status],
+        cooldown_s: float = 60.0,
+        resume: bool = True,
+        fallback_attempt_at: float = 0.0,
+        logger: Optional[JsonLogger] = None,
+    ) -> None:
+        self.skip_statuses = skip_statuses
+        self.give_up_statuses = give_up_statuses
+        self.transient_statuses = transient_statuses
+        self.cooldown_s = cooldown_s
+        self.resume = resume
+        # 历史结果没有 last_attempt_at（旧版本文件）时用于计算冷却的时间，一般取结果文件修改时间
+        self.fallback_attempt_at = fallback_attempt_at
+        self.logger = logger
+        self.counts: Dict[str, int] = {"fresh": 0, "rerun": 0, "deferred": 0, "skipped": 0, "given_up": 0}
+        self.start_steps: Dict[str, int] = {step: 0 for step in _STEP_ORDER}
+
+    def start_step(self, row: Optional[ResultRow]) -> str:
+        if row is None or not self.resume:
+            return STEP_SEARCH
+        if row.cooperation_id:
+            return STEP_COOP_INFO
+        if row.contract_id:
+            return STEP_CONTRACT_INFO
+        return STEP_SEARCH
+
+    def _skip(self, code: str, row: ResultRow, reason: str) -> None:
+        if self.logger is not None:
+            self.logger.info("skip_existing", {"contract_number": code, "status": row.status.value, "reason": reason})
+
+    def plan(
+        self,
+        codes: Iterable[str],
+        lookup: Callable[[str], Optional[ResultRow]],
+        on_total: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[PlanItem]:
+        """按输入顺序流式产出计划项，瞬时失败的合同在输入读完后按可开始时间依次产出。"""
+        deferred: List[PlanItem] = []
+        n = 0
+        for code in codes:
+            row = lookup(code)
+            if row is not None and row.status in self.skip_statuses:
+                self.counts["skipped"] += 1
+                self._skip(code, row, "skip_result_statuses")
+                continue
+            if row is not None and row.status in self.give_up_statuses:
+                self.counts["given_up"] += 1
+                self._skip(code, row, "give_up_statuses")
+                continue
+            step = self.start_step(row)
+            self.start_steps[step] += 1
+            n += 1
+            if row is not None and row.status in self.transient_statuses:
+                self.counts["deferred"] += 1
+                last = row.last_attempt_at or self.fallback_attempt_at
+                deferred.append((code, row, step, last + self.cooldown_s))
+                continue
+            self.counts["fresh" if row is None else "rerun"] += 1
+            yield code, row, step, 0.0
+        if on_total is not None:
+            on_total(n)
+        deferred.sort(key=lambda item: item[3])
+        yield from deferred
+
+    def stats(self) -> Dict[str, object]:
+        return dict(self.counts, start_step=dict(self.start_steps))
+
+
+def plan_task(index: int, item: PlanItem) -> ContractTask:
+    """按计划项构造任务：续跑时预填已解析的 ID，并沿用对应步骤的历史统计。"""
+    code, row, step, not_before = item
+    task = ContractTask(index=index, contract_number=code, not_before=not_before)
+    if row is None or step == STEP_SEARCH:
+        return task
+    task.contract_id = row.contract_id
+    task.search_retries, task.search_ms = row.search_retries, row.search_ms
+    if step == STEP_COOP_INFO:
+        task.cooperation_id = row.cooperation_id
+        task.info_retries, task.info_ms = row.info_retries, row.info_ms
+    return task
+
+
+def estimate_calls(start_steps: Dict[str, int]) -> Dict[str, int]:
+    """各接口调用次数上限：假设每步都成功，不含重试、缓存、预取索引命中与搜索微批合并。"""
+    calls: Dict[str, int] = {}
+    remaining = 0
+    for step, endpoint in STEP_ENDPOINTS:
+        remaining += start_steps.get(step, 0)
+        calls[endpoint] = remaining
+    return calls
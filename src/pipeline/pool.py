@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Optional
+
+from ..models import ResultRow
+from .steps import ContractTask
+
+
+def run_pool(
+    tasks: Iterable[ContractTask],
+    process: Callable[[ContractTask], ResultRow],
+    concurrency: int,
+    on_result: Callable[[ContractTask, ResultRow], None],
+) -> None:
+    """按合同粒度并发执行：同时最多 concurrency 个合同在途，单合同内部仍串行。
+
+    on_result 在调用线程（而非工作线程）中按完成顺序回调，调用方可据 task.index 还原输入顺序。
+    未到 not_before 的任务由调用线程等待后再提交，不占用工作线程。
+    工作线程抛出的异常会在取消未开始的任务后原样向上抛出。
+    """
+    if concurrency <= 1:
+        for task in tasks:
+            delay = task.ready_in()
+            if delay > 0:
+                time.sleep(delay)
+            on_result(task, process(task))
+        return
+
+    it = iter(tasks)
+    pending: Dict[Future, ContractTask] = {}
+    held: Optional[ContractTask] = None
+    # 提交窗口为并发度的两倍：保证工作线程不空转，同时避免一次性展开全部任务
+    window = concurrency * 2
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="contract") as pool:
+        exhausted = False
+        try:
+            while True:
+                delay = 0.0
+                while len(pending) < window:
+                    if held is None and not exhausted:
+                        held = next(it, None)
+                        exhausted = held is None
+                    if held is None:
+                        break
+                    delay = held.ready_in()
+                    if delay > 0:
+                        break
+                    pending[pool.submit(process, held)] = held
+                    held = None
+                if not pending:
+                    if held is None:
+                        break
+                    time.sleep(delay)
+                    continue
+                done, _ = wait(list(pending), timeout=delay or None, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    task = pending.pop(fut)
+                    on_result(task, fut.result())
+        finally:
+            for fut in pending:
+                fut.cancel()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from ..logger import JsonLogger
+from ..models import ResultRow, Status
+
+
+class ProgressTracker:
+    """线程安全的成功/失败计数与进度、ETA 上报。
+
+    流式读取输入时总量未知（total 为 None），可先用估算值，输入读完后再回填准确值。
+    """
+
+    def __init__(self, logger: JsonLogger, total: Optional[int]) -> None:
+        self.logger = logger
+        self.total = total
+        self.total_exact = total is not None
+        self.succ = 0
+        self.fail = 0
+        self.done = 0
+        self._start = time.time()
+        self._lock = threading.Lock()
+
+    def set_total(self, total: int) -> None:
+        with self._lock:
+            self.total = total
+            self.total_exact = True
+
+    def estimate_total(self, total: int) -> None:
+        with self._lock:
+            if not self.total_exact:
+                self.total = total
+
+    def record(self, row: ResultRow) -> None:
+        with self._lock:
+            if row.status == Status.SUCCESS:
+                self.succ += 1
+            else:
+                self.fail += 1
+            self.done += 1
+            done, succ, fail = self.done, self.succ, self.fail
+            total, exact = self.total, self.total_exact
+            elapsed = time.time() - self._start
+        progress = eta = None
+        if total is not None:
+            # 估算总量按输入行数计，含重复与跳过的行，偏大
+            avg = elapsed / max(1, done)
+            eta = int(avg * (total - done))
+            progress = round(done * 100.0 / max(1, total), 2)
+        self.logger.info("progress", {
+            "progressPercent": progress,
+            "success_count": succ,
+            "fail_count": fail,
+            "ETA_s": eta,
+            "done": done,
+            "total": total,
+            "totalExact": exact,
+        })
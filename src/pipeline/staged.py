@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import math
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from ..models import ResultRow
+from .steps import ContractTask
+
+
+_SENTINEL = object()
+
+
+@dataclass
+class Stage:
+    """流水线中的一个 API 步骤：fn 返回 True 表示进入下一阶段，False 表示该合同已得出最终状态。"""
+
+    name: str
+    fn: Callable[[ContractTask], bool]
+    workers: int
+
+
+def stage_workers(qpm: int, latency_ms: int, max_workers: int) -> int:
+    # Little 定律：在途请求数 ≈ 到达速率 × 单次耗时；按该接口 QPM 估算打满配额所需的工作线程数
+    need = math.ceil(qpm / 60.0 * latency_ms / 1000.0)
+    return max(1, min(max_workers, need))
+
+
+class _Aborted(Exception):
+    pass
+
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> None:
+    # 有界队列的阻塞写入即为反压；周期性检查 stop，避免异常退出时工作线程永久阻塞
+    while True:
+        if stop.is_set():
+            raise _Aborted()
+        try:
+            q.put(item, timeout=0.2)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: "queue.Queue", stop: threading.Event):
+    while True:
+        if stop.is_set():
+            raise _Aborted()
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+
+
+def run_staged(
+    tasks: Iterable[ContractTask],
+    stages: List[Stage],
+    queue_size: int,
+    on_result: Callable[[ContractTask, ResultRow], None],
+) -> None:
+    """分阶段流水线：每个步骤拥有独立的有界队列与工作线程池，各接口配额可同时被打满。
+
+    某步骤失败的合同直接短路进入结果流；on_result 在调用线程中按完成顺序回调。
+    任一线程抛出的异常会终止整条流水线并在调用线程中重新抛出。
+    """
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    results: "queue.Queue" = queue.Queue()
+    inputs = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+
+    def fail(e: BaseException) -> None:
+        errors.append(e)
+        stop.set()
+        results.put(_SENTINEL)
+
+    def feed() -> None:
+        try:
+            for task in tasks:
+                # 延后的合同在投递线程中等待，不占用工作线程
+                delay = task.ready_in()
+                if delay > 0 and stop.wait(delay):
+                    raise _Aborted()
+                _put(inputs[0], task, stop)
+            for _ in range(stages[0].workers):
+                _put(inputs[0], _SENTINEL, stop)
+        except _Aborted:
+            pass
+        except BaseException as e:  # 输入迭代器异常同样中止流水线
+            fail(e)
+
+    remaining = [s.workers for s in stages]
+    remaining_lock = threading.Lock()
+
+    def work(i: int) -> None:
+        stage = stages[i]
+        nxt: Optional["queue.Queue"] = inputs[i + 1] if i + 1 < len(stages) else None
+        try:
+            while True:
+                task = _get(inputs[i], stop)
+                if task is _SENTINEL:
+                    break
+                if stage.fn(task) and nxt is not None:
+                    _put(nxt, task, stop)
+                else:
+                    results.put(task)
+            with remaining_lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            # 本阶段最后一个退出的线程负责通知下游收尾
+            if last:
+                if nxt is not None:
+                    for _ in range(stages[i + 1].workers):
+                        _put(nxt, _SENTINEL, stop)
+                else:
+                    results.put(_SENTINEL)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            fail(e)
+
+    threads = [threading.Thread(target=feed, name="stage-feed", daemon=True)]
+    for i, stage in enumerate(stages):
+        for n in range(stage.workers):
+            threads.append(threading.Thread(target=work, args=(i,), name=f"stage-{stage.name}-{n}", daemon=True))
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = results.get()
+            if item is _SENTINEL:
+                break
+            on_result(item, item.to_row())
+    except BaseException:
+        stop.set()
+        raise
+    if errors:
+        raise errors[0]
+    for t in threads:
+        t.join()
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from ..cache import HOP_CONTRACT_INFO, HOP_COOP_INFO, HOP_SEARCH, ResolutionCache
+from ..logger import JsonLogger
+from ..metrics import RunMetrics
+from ..models import ResultRow, Status
+
+
+STEP_SEARCH = "SEARCH"
+STEP_CONTRACT_INFO = "CONTRACT_INFO"
+STEP_COOP_INFO = "COOP_INFO"
+
+# 客户端单步返回值：(目标值, 重试次数, 错误码, 错误信息)
+StepResult = Tuple[Optional[str], int, Optional[int], Optional[str]]
+
+T = TypeVar("T")
+
+
+def search_status(scode: Optional[int], smsg: Optional[str]) -> Status:
+    # 先按业务码判断：110107 表示未查询到合同
+    if scode == 110107:
+        return Status.NOT_FOUND_CONTRACT
+    if smsg == "NOT_FOUND_CONTRACT":
+        return Status.NOT_FOUND_CONTRACT
+    if smsg == "AUTH_FAILED":
+        return Status.AUTH_FAILED
+    if smsg == "PERMISSION_DENIED":
+        return Status.PERMISSION_DENIED
+    if smsg == "RETRY_EXCEEDED":
+        return Status.RETRY_EXCEEDED
+    return Status.UNKNOWN_ERROR
+
+
+def clm_status(msg: Optional[str], empty_status: Status) -> Status:
+    # empty_status：接口成功但目标字段为空时的业务状态（NO_COOPERATION / NO_CHAT_GROUP）
+    if msg == empty_status.value:
+        return empty_status
+    if msg == "AUTH_FAILED":
+        return Status.AUTH_FAILED
+    if msg == "PERMISSION_DENIED":
+        return Status.PERMISSION_DENIED
+    if msg == "RETRY_EXCEEDED":
+        return Status.RETRY_EXCEEDED
+    return Status.UNKNOWN_ERROR
+
+
+@dataclass
+class ContractTask:
+    """单个合同在三步链路中的中间状态；index 为其在待处理列表中的序号，用于稳定输出顺序。"""
+
+    index: int
+    contract_number: str
+    contract_id: Optional[str] = None
+    cooperation_id: Optional[str] = None
+    openChatId: Optional[str] = None
+    status: Status = Status.UNKNOWN_ERROR
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+    # 各步骤实际请求接口时的重试次数与耗时（毫秒），命中缓存或未执行为 None
+    search_retries: Optional[int] = None
+    search_ms: Optional[int] = None
+    info_retries: Optional[int] = None
+    info_ms: Optional[int] = None
+    coop_retries: Optional[int] = None
+    coop_ms: Optional[int] = None
+    last_attempt_at: Optional[int] = None
+    # 重跑计划中延后的合同在该时刻（Unix 秒）之前不派发，由各引擎的派发方等待
+    not_before: float = 0.0
+
+    def ready_in(self) -> float:
+        """距可派发还需等待的秒数，已可派发时为 0。"""
+        return max(0.0, self.not_before - time.time()) if self.not_before else 0.0
+
+    def to_row(self) -> ResultRow:
+        return ResultRow(
+            contract_number=self.contract_number,
+            contract_id=self.contract_id,
+            cooperation_id=self.cooperation_id,
+            openChatId=self.openChatId,
+            status=self.status,
+            error_code=self.error_code,
+            error_message=self.error_message,
+            search_retries=self.search_retries,
+            search_ms=self.search_ms,
+            info_retries=self.info_retries,
+            info_ms=self.info_ms,
+            coop_retries=self.coop_retries,
+            coop_ms=self.coop_ms,
+            last_attempt_at=self.last_attempt_at,
+        )
+
+
+class StepRunner:
+    """执行 SEARCH → CONTRACT_INFO → COOP_INFO 三个步骤；每个步骤返回是否继续下一步。"""
+
+    def __init__(self, openapi: Any, clm: Any, logger: JsonLogger, cache: Optional[ResolutionCache] = None, metrics: Optional[RunMetrics] = None) -> None:
+        self.openapi = openapi
+        self.clm = clm
+        self.logger = logger
+        self.cache = cache
+        self.metrics = metrics
+
+    def _observe_step(self, step: str, outcome: str, seconds: float) -> None:
+        if self.metrics is not None:
+            self.metrics.step_duration.observe(step, outcome, value=seconds)
+
+    # _cached_*：重跑时已预填该步结果，或命中持久化缓存时直接推进任务并返回是否继续，未命中返回 None 交由接口查询
+
+    def _cached_search(self, task: ContractTask) -> Optional[bool]:
+        if task.contract_id is not None:
+            return True
+        if self.cache is None:
+            return None
+        hit, c_id = self.cache.get(HOP_SEARCH, task.contract_number)
+        if not hit:
+            return None
+        if c_id is None:
+            task.status = Status.NOT_FOUND_CONTRACT
+            task.error_code = None
+            task.error_message = Status.NOT_FOUND_CONTRACT.value
+        else:
+            task.contract_id = c_id
+        self.logger.info("SEARCH cached", {
+            "step": STEP_SEARCH,
+            "contract_number": task.contract_number,
+            "contract_id": c_id,
+            "negative": c_id is None,
+        })
+        return c_id is not None
+
+    def _cached_contract_info(self, task: ContractTask) -> Optional[bool]:
+        if task.cooperation_id is not None:
+            return True
+        if self.cache is None:
+            return None
+        hit, coop_id = self.cache.get(HOP_CONTRACT_INFO, task.contract_id or "")
+        if not hit or coop_id is None:
+            return None
+        task.cooperation_id = coop_id
+        self.logger.info("CONTRACT_INFO cached", {
+            "step": STEP_CONTRACT_INFO,
+            "contract_number": task.contract_number,
+            "contract_id": task.contract_id,
+            "cooperation_id": coop_id,
+        })
+        return True
+
+    def _cached_coop_info(self, task: ContractTask) -> Optional[bool]:
+        if self.cache is None:
+            return None
+        hit, chat_id = self.cache.get(HOP_COOP_INFO, task.cooperation_id or "")
+        if not hit or chat_id is None:
+            return None
+        task.openChatId = chat_id
+        task.status = Status.SUCCESS
+        task.error_code = None
+        task.error_message = None
+        self.logger.info("COOP_INFO cached", {
+            "step": STEP_COOP_INFO,
+            "contract_number": task.contract_number,
+            "cooperation_id": task.cooperation_id,
+            "openChatId": chat_id,
+        })
+        return True
+
+    # 每个步骤拆为 _begin_*（记录开始）与 _finish_*（状态映射与日志），调用接口的部分由同步/异步实现各自完成
+
+    def _begin_search(self, task: ContractTask) -> float:
+        self.logger.info("SEARCH start", {"step": STEP_SEARCH, "contract_number": task.contract_number})
+        return time.perf_counter()
+
+    def _finish_search(self, task: ContractTask, res: StepResult, step_start: float) -> bool:
+        code = task.contract_number
+        c_id, r1, scode, smsg = res
+        seconds = time.perf_counter() - step_start
+        elapsed = int(seconds * 1000)
+        task.search_retries, task.search_ms = r1, elapsed
+        task.last_attempt_at = int(time.time())
+        if c_id is None:
+            task.status = search_status(scode, smsg)
+            task.error_code = str(scode) if scode is not None else None
+            task.error_message = smsg
+            self._observe_step(STEP_SEARCH, task.status.value, seconds)
+            self.logger.warn("SEARCH failed", {
+                "step": STEP_SEARCH,
+                "contract_number": code,
+                "httpStatus": scode,
+                "retryCount": r1,
+                "elapsedMs": elapsed,
+                "status": task.status.value,
+                "errorMessage": smsg,
+            })
+            if self.cache is not None and task.status == Status.NOT_FOUND_CONTRACT:
+                self.cache.put_negative(HOP_SEARCH, code)
+            return False
+        task.contract_id = c_id
+        if self.cache is not None:
+            self.cache.put(HOP_SEARCH, code, c_id)
+        self._observe_step(STEP_SEARCH, Status.SUCCESS.value, seconds)
+        self.logger.info("SEARCH success", {
+            "step": STEP_SEARCH,
+            "contract_number": code,
+            "contract_id": c_id,
+            "httpStatus": 200,
+            "retryCount": r1,
+            "elapsedMs": elapsed,
+        })
+        return True
+
+    def _begin_contract_info(self, task: ContractTask) -> float:
+        self.logger.info("CONTRACT_INFO start", {"step": STEP_CONTRACT_INFO, "contract_number": task.contract_number, "contract_id": task.contract_id or ""})
+        return time.perf_counter()
+
+    def _finish_contract_info(self, task: ContractTask, res: StepResult, step_start: float) -> bool:
+        code = task.contract_number
+        c_id = task.contract_id or ""
+        coop_id, r2, icode, imsg = res
+        seconds = time.perf_counter() - step_start
+        elapsed = int(seconds * 1000)
+        task.info_retries, task.info_ms = r2, elapsed
+        task.last_attempt_at = int(time.time())
+        if coop_id is None:
+            task.status = clm_status(imsg, Status.NO_COOPERATION)
+            task.error_code = str(icode) if icode else None
+            task.error_message = imsg
+            self._observe_step(STEP_CONTRACT_INFO, task.status.value, seconds)
+            self.logger.warn("CONTRACT_INFO failed", {
+                "step": STEP_CONTRACT_INFO,
+                "contract_number": code,
+                "contract_id": c_id,
+                "httpStatus": icode,
+                "retryCount": r2,
+                "elapsedMs": elapsed,
+                "status": task.status.value,
+                "errorMessage": imsg,
+            })
+            return False
+        task.cooperation_id = coop_id
+        if self.cache is not None:
+            self.cache.put(HOP_CONTRACT_INFO, c_id, coop_id)
+        self._observe_step(STEP_CONTRACT_INFO, Status.SUCCESS.value, seconds)
+        self.logger.info("CONTRACT_INFO success", {
+            "step": STEP_CONTRACT_INFO,
+            "contract_number": code,
+            "contract_id": c_id,
+            "cooperation_id": coop_id,
+            "httpStatus": 200,
+            "retryCount": r2,
+            "elapsedMs": elapsed,
+        })
+        return True
+
+    def _begin_coop_info(self, task: ContractTask) -> float:
+        self.logger.info("COOP_INFO start", {"step": STEP_COOP_INFO, "contract_number": task.contract_number, "cooperation_id": task.cooperation_id or ""})
+        return time.perf_counter()
+
+    def _finish_coop_info(self, task: ContractTask, res: StepResult, step_start: float) -> bool:
+        code = task.contract_number
+        coop_id = task.cooperation_id or ""
+        chat_id, r3, ocode, omsg = res
+        seconds = time.perf_counter() - step_start
+        elapsed = int(seconds * 1000)
+        task.coop_retries, task.coop_ms = r3, elapsed
+        task.last_attempt_at = int(time.time())
+        if chat_id is None:
+            task.status = clm_status(omsg, Status.NO_CHAT_GROUP)
+            task.error_code = str(ocode) if ocode else None
+            task.error_message = omsg
+            self._observe_step(STEP_COOP_INFO, task.status.value, seconds)
+            self.logger.warn("COOP_INFO failed", {
+                "step": STEP_COOP_INFO,
+                "contract_number": code,
+                "cooperation_id": coop_id,
+                "httpStatus": ocode,
+                "retryCount": r3,
+                "elapsedMs": elapsed,
+                "status": task.status.value,
+                "errorMessage": omsg,
+            })
+            return False
+        task.openChatId = chat_id
+        task.status = Status.SUCCESS
+        task.error_code = None
+        task.error_message = None
+        if self.cache is not None:
+            self.cache.put(HOP_COOP_INFO, coop_id, chat_id)
+        self._observe_step(STEP_COOP_INFO, Status.SUCCESS.value, seconds)
+        self.logger.info("COOP_INFO success", {
+            "step": STEP_COOP_INFO,
+            "contract_number": code,
+            "cooperation_id": coop_id,
+            "openChatId": chat_id,
+            "httpStatus": 200,
+            "retryCount": r3,
+            "elapsedMs": elapsed,
+        })
+        return True
+
+    def search(self, task: ContractTask) -> bool:
+        cached = self._cached_search(task)
+        if cached is not None:
+            return cached
+        start = self._begin_search(task)
+        return self._finish_search(task, self.openapi.search_contract_id(task.contract_number), start)
+
+    def contract_info(self, task: ContractTask) -> bool:
+        cached = self._cached_contract_info(task)
+        if cached is not None:
+            return cached
+        start = self._begin_contract_info(task)
+        return self._finish_contract_info(task, self.clm.get_cooperation_id(task.contract_id or ""), start)
+
+    def coop_info(self, task: ContractTask) -> bool:
+        cached = self._cached_coop_info(task)
+        if cached is not None:
+            return cached
+        start = self._begin_coop_info(task)
+        return self._finish_coop_info(task, self.clm.get_open_chat_id(task.cooperation_id or ""), start)
+
+    def process(self, task: ContractTask) -> ResultRow:
+        # 单合同内严格串行：任一步失败即短路
+        if self.search(task) and self.contract_info(task):
+            self.coop_info(task)
+        return task.to_row()
+
+
+class AsyncStepRunner(StepRunner):
+    """StepRunner 的 asyncio 版本：openapi/clm 为异步客户端，日志与状态映射与同步版本一致。
+
+    缓存读写（sqlite）与步骤日志会阻塞，_cached_* / _begin_* / _finish_* 交给 executor 执行（为 None 时用事件循环的默认线程池），
+    事件循环只负责等待接口响应。
+    """
+
+    def __init__(self, openapi: Any, clm: Any, logger: JsonLogger, cache: Optional[ResolutionCache] = None, metrics: Optional[RunMetrics] = None, executor: Optional[Executor] = None) -> None:
+        super().__init__(openapi, clm, logger, cache, metrics)
+        self.executor = executor
+
+    def _offload(self, fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def search(self, task: ContractTask) -> bool:  # type: ignore[override]
+        cached = await self._offload(self._cached_search, task)
+        if cached is not None:
+            return cached
+        start = await self._offload(self._begin_search, task)
+        res = await self.openapi.search_contract_id(task.contract_number)
+        return await self._offload(self._finish_search, task, res, start)
+
+    async def contract_info(self, task: ContractTask) -> bool:  # type: ignore[override]
+        cached = await self._offload(self._cached_contract_info, task)
+        if cached is not None:
+            return cached
+        start = await self._offload(self._begin_contract_info, task)
+        res = await self.clm.get_cooperation_id(task.contract_id or "")
+        return await self._offload(self._finish_contract_info, task, res, start)
+
+    async def coop_info(self, task: ContractTask) -> bool:  # type: ignore[override]
+        cached = await self._offload(self._cached_coop_info, task)
+        if cached is not None:
+            return cached
+        start = await self._offload(self._begin_coop_info, task)
+        res = await self.clm.get_open_chat_id(task.cooperation_id or "")
+        return await self._offload(self._finish_coop_info, task, res, start)
+
+    async def process(self, task: ContractTask) -> ResultRow:  # type: ignore[override]
+        if await self.search(task) and await self.contract_info(task):
+            await self.coop_info(task)
+        return task.to_row()
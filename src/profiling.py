@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import pstats
+import sys
+import threading
+import time
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 耗时归因表的行顺序；未列出的阶段排在最后
+PHASES = (
+    "rate_limit_wait",
+    "retry_backoff",
+    "http_io",
+    "json_parse",
+    "log_write",
+    "input_read",
+    "result_read",
+    "output_write",
+    "excel_save",
+)
+
+_PHASE_LABELS = {
+    "rate_limit_wait": "限流等待",
+    "retry_backoff": "重试退避",
+    "http_io": "网络请求",
+    "json_parse": "JSON 解析",
+    "log_write": "日志写出",
+    "input_read": "读取输入",
+    "result_read": "读取历史结果",
+    "output_write": "写出结果行",
+    "excel_save": "Excel 保存",
+}
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started", "child")
+
+    def __init__(self, profiler: "PhaseProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+        self.child = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.profiler._stack().append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.profiler._stack().pop()
+        self.profiler.add(self.name, elapsed, self_s=elapsed - self.child)
+
+
+_WIDTHS = (14, 10, 12, 12, 10, 8)
+
+
+def _width(text: str) -> int:
+    # 中文字符在终端中占两列
+    return sum(2 if ord(ch) > 127 else 1 for ch in text)
+
+
+def _cells(values: Tuple[str, ...]) -> str:
+    # 首列左对齐，其余右对齐
+    out = values[0] + " " * max(1, _WIDTHS[0] - _width(values[0]))
+    for value, width in zip(values[1:], _WIDTHS[1:]):
+        out += " " * max(1, width - _width(value)) + value
+    return out
+
+
+class PhaseProfiler:
+    """按阶段累计耗时（各线程、各协程的耗时相加），用于定位慢在限流、重试、网络、解析、日志还是读写文件。
+
+    嵌套阶段按独占时间计：外层阶段扣除内层阶段耗时，各行相加不重复计算。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # 阶段 → [次数, 独占秒数]
+        self._phases: Dict[str, List[float]] = {}
+        self._threads: set = set()
+        self.started = time.perf_counter()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add(self, name: str, seconds: float, self_s: Optional[float] = None) -> None:
+        """记录一段已结束的耗时；处于其他阶段内时同时从外层阶段中扣除。"""
+        stack = self._stack()
+        if stack:
+            stack[-1].child += seconds
+        with self._lock:
+            entry = self._phases.get(name)
+            if entry is None:
+                entry = self._phases[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds if self_s is None else self_s
+            self._threads.add(threading.get_ident())
+
+    def phase(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """逐项计时的迭代器：只统计取下一项的耗时，不含调用方处理该项的时间。"""
+        it = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def report(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            phases = {k: list(v) for k, v in self._phases.items()}
+            threads = len(self._threads)
+        order = {name: i for i, name in enumerate(PHASES)}
+        total = sum(v[1] for v in phases.values())
+        rows = []
+        for name in sorted(phases, key=lambda n: (order.get(n, len(PHASES)), n)):
+            calls, seconds = phases[name]
+            rows.append({
+                "phase": name,
+                "calls": int(calls),
+                "seconds": round(seconds, 4),
+                "avgMs": round(seconds / calls * 1000, 3) if calls else 0.0,
+                "pctOfWall": round(seconds / wall * 100, 1) if wall > 0 else 0.0,
+                "share": round(seconds / total * 100, 1) if total > 0 else 0.0,
+            })
+        return {"wallS": round(wall, 3), "threads": threads, "phases": rows}
+
+    def format_table(self) -> str:
+        rep = self.report()
+        lines = [
+            f"耗时归因（墙钟 {rep['wallS']:.3f}s，{rep['threads']} 个线程参与计时；并发时各线程耗时累加，占墙钟比例可超过 100%）",
+            _cells(("阶段", "次数", "累计(s)", "平均(ms)", "占墙钟%", "占比%")),
+        ]
+        for row in rep["phases"]:
+            lines.append(_cells((
+                _PHASE_LABELS.get(row["phase"], row["phase"]),
+                str(row["calls"]),
+                f"{row['seconds']:.3f}",
+                f"{row['avgMs']:.3f}",
+                f"{row['pctOfWall']:.1f}",
+                f"{row['share']:.1f}",
+            )))
+        return "\n".join(lines)
+
+
+# 未开启 --profile 时为 None，各埋点只做一次判空
+_active: Optional[PhaseProfiler] = None
+
+
+def active() -> Optional[PhaseProfiler]:
+    return _active
+
+
+def enable() -> PhaseProfiler:
+    global _active
+    _active = PhaseProfiler()
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def phase(name: str) -> ContextManager[Any]:
+    """开启时对 with 块计时，未开启时为空操作；用于非热点的整段阶段。"""
+    p = _active
+    return contextlib.nullcontext() if p is None else p.phase(name)
+
+
+def timed(name: str, items: Iterable[T]) -> Iterable[T]:
+    """开启时逐项计时，未开启时原样返回。"""
+    p = _active
+    return items if p is None else p.iterate(name, items)
+
+
+# Python 3.12 起 cProfile 基于 sys.monitoring：同一进程只能启用一个 profiler，且它已覆盖所有线程
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+class CallProfile:
+    """cProfile 采样，覆盖主线程与开启后新建的线程，结束时合并写出 pstats 文件
+    （可用 snakeviz、flameprof、gprof2dot 等查看或生成火焰图）。
+
+    Python 3.12 以下 cProfile 只采样启用它的线程，因此为每个新线程单独启用一个并在结束时合并。
+    """
+
+    def __init__(self) -> None:
+        self._main = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._threads: List[Any] = []
+
+    def _start_thread(self, *args: Any) -> None:
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except Exception:
+            # 采样失败只丢失该线程的数据，不能影响线程本身的执行
+            return
+        with self._lock:
+            self._threads.append(prof)
+
+    def start(self) -> None:
+        if _PER_THREAD:
+            threading.setprofile(self._start_thread)
+        self._main.enable()
+
+    def stop(self, path: str) -> None:
+        self._main.disable()
+        if _PER_THREAD:
+            threading.setprofile(None)
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            threads = list(self._threads)
+        for prof in threads:
+            stats.add(prof)
+        stats.dump_stats(path)
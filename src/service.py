@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .io.journal import row_to_record
+from .logger import JsonLogger
+from .models import ResultRow, Status
+from .pipeline.steps import ContractTask, StepRunner
+from .singleflight import SingleFlight
+
+
+# 无论重跑策略如何配置都不缓存的结果
+_UNCACHED_STATUSES = {Status.AUTH_FAILED, Status.RETRY_EXCEEDED, Status.UNKNOWN_ERROR}
+
+
+class LookupService:
+    """常驻查询服务：复用同一组 HTTP 客户端、令牌、限流器与解析缓存，按合同编号实时解析。
+
+    - 同一合同的并发查询合并为一次解析；
+    - 终态结果（不含 transient_statuses 与鉴权失败、重试超限等瞬时失败）在内存中保留 result_ttl_s，
+      超过 result_cache_size 条时淘汰最久未用的；逐跳的持久化缓存仍由 StepRunner 负责；
+    - 批量查询按 concurrency 并发解析，结果顺序与请求一致。
+    """
+
+    def __init__(
+        self,
+        runner: StepRunner,
+        concurrency: int = 1,
+        result_ttl_s: float = 300.0,
+        result_cache_size: int = 100000,
+        transient_statuses: Optional[Set[Status]] = None,
+    ) -> None:
+        self.runner = runner
+        self.result_ttl_s = result_ttl_s
+        self.result_cache_size = result_cache_size
+        self.uncached_statuses = set(transient_statuses or ()) | _UNCACHED_STATUSES
+        self._flight = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="lookup")
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, Tuple[float, ResultRow]]" = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+
+    def _cached(self, code: str) -> Optional[ResultRow]:
+        with self._lock:
+            self.lookups += 1
+            entry = self._results.get(code)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._results[code]
+                return None
+            self._results.move_to_end(code)
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, row: ResultRow) -> None:
+        if self.result_ttl_s <= 0 or self.result_cache_size <= 0 or row.status in self.uncached_statuses:
+            return
+        with self._lock:
+            self._results[row.contract_number] = (time.monotonic() + self.result_ttl_s, row)
+            self._results.move_to_end(row.contract_number)
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+
+    def _resolve(self, code: str) -> ResultRow:
+        row = self.runner.process(ContractTask(index=0, contract_number=code))
+        self._store(row)
+        return row
+
+    def resolve(self, code: str) -> ResultRow:
+        row = self._cached(code)
+        if row is not None:
+            return row
+        return self._flight.do(("lookup", code), lambda: self._resolve(code))[0]
+
+    def resolve_many(self, codes: Iterable[str]) -> List[ResultRow]:
+        unique = list(dict.fromkeys(codes))
+        futures = {code: self._pool.submit(self.resolve, code) for code in unique}
+        return [futures[code].result() for code in unique]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._results)
+        return {
+            "lookups": self.lookups,
+            "result_cache_hits": self.hits,
+            "result_cache_size": size,
+            "coalesced": self._flight.stats().get("lookup", {}).get("shared", 0),
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def _codes(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list) or any(not isinstance(v, str) for v in value):
+        return None
+    return [s for s in (v.strip() for v in value) if s]
+
+
+def serve_lookup(
+    service: LookupService,
+    host: str,
+    port: int,
+    max_batch: int = 1000,
+    extra: Optional[Callable[[], Dict]] = None,
+    logger: Optional[JsonLogger] = None,
+) -> ThreadingHTTPServer:
+    """构造查询 HTTP 服务（调用方负责 serve_forever 与关闭）。extra 返回 /stats 中附加的运行状态。
+
+    GET  /resolve?contract_number=X            单个合同，返回结果记录
+    POST /resolve  {"contract_numbers": [...]} 批量查询，返回 {"results": [...]}，顺序与去重后的请求一致
+    GET  /stats、/healthz
+
+    请求参数或请求体不合法时返回 400；处理过程中的异常记入 logger（message=serve_error）并返回 500，
+    不会中断连接或输出到 stderr。
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _dispatch(self, handle: Callable[[], None]) -> None:
+            self._sent = False
+            try:
+                handle()
+            except Exception as e:
+                if logger is not None:
+                    logger.error("serve_error", {
+                        "method": self.command,
+                        "path": self.path,
+                        "errorType": type(e).__name__,
+                        "error": str(e),
+                    })
+                # 响应已开始写出（如客户端断开）时无法再返回 500
+                if not self._sent:
+                    try:
+                        self._send(500, {"error": f"内部错误: {type(e).__name__}"})
+                    except OSError:
+                        pass
+
+        def _send(self, code: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._sent = True
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            self._dispatch(self._get)
+
+        def do_POST(self) -> None:
+            self._dispatch(self._post)
+
+        def _get(self) -> None:
+            parts = urlsplit(self.path)
+            if parts.path == "/healthz":
+                self._send(200, {"status": "ok"})
+            elif parts.path == "/stats":
+                self._send(200, dict(service.stats(), **(extra() if extra is not None else {})))
+            elif parts.path == "/resolve":
+                code = (parse_qs(parts.query).get("contract_number") or [""])[0].strip()
+                if not code:
+                    self._send(400, {"error": "缺少参数 contract_number"})
+                    return
+                self._send(200, row_to_record(service.resolve(code)))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _post(self) -> None:
+            if urlsplit(self.path).path != "/resolve":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = max(0, int(self.headers.get("Content-Length") or 0))
+                codes = _codes(json.loads(self.rfile.read(length) or b"{}").get("contract_numbers"))
+            except (ValueError, AttributeError):
+                codes = None
+            if codes is None:
+                self._send(400, {"error": "请求体须为 {\"contract_numbers\": [字符串, ...]}"})
+                return
+            if len(codes) > max_batch:
+                self._send(413, {"error": f"单次最多查询 {max_batch} 个合同"})
+                return
+            self._send(200, {"results": [row_to_record(r) for r in service.resolve_many(codes)]})
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """解析 "i/N"（0 <= i < N）。"""
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard 格式应为 i/N，如 0/4: {spec}")
+    if n < 1 or not (0 <= i < n):
+        raise ValueError(f"--shard 需满足 0 <= i < N: {spec}")
+    return i, n
+
+
+def shard_of(contract_number: str, count: int) -> int:
+    # 稳定哈希：与进程、机器无关（内置 hash() 对字符串按进程加盐）
+    digest = hashlib.blake2b(contract_number.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def shard_path(path: str, index: int, count: int) -> str:
+    p = Path(path)
+    return str(p.with_name(f"{p.stem}.shard-{index}-of-{count}{p.suffix}"))
+
+
+def apply_shard(cfg: Dict[str, Any], index: int, count: int) -> Dict[str, Any]:
+    """返回分片专用配置：输出 Excel、结果日志、运行日志按分片加后缀，/metrics 端口按分片序号错开。"""
+    if count <= 1:
+        return cfg
+    out = copy.deepcopy(cfg)
+    out["shard"] = {"index": index, "count": count}
+    files = out.setdefault("files", {})
+    for key in ("output_excel", "log_file"):
+        if files.get(key):
+            files[key] = shard_path(files[key], index, count)
+    ck = out.setdefault("checkpoint", {})
+    if ck.get("journal_file"):
+        ck["journal_file"] = shard_path(ck["journal_file"], index, count)
+    mt = out.setdefault("metrics", {})
+    if mt.get("port"):
+        mt["port"] = int(mt["port"]) + index
+    return out
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_HIT, _WAIT, _LEAD = 0, 1, 2
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self, done: Any) -> None:
+        # 同步调用为 threading.Event，异步调用为 asyncio.Future
+        self.done = done
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """请求合并：同一键的并发调用只执行一次，其余调用方等待并共享结果（异常同样共享）。
+
+    ttl_s > 0 时，reusable(结果) 为真的结果另保留 ttl_s 秒（至多 max_entries 条，淘汰最久未用的），
+    期间同键调用直接复用。键为 (类别, ...) 元组时按类别分别计数。同步与异步调用方共用。
+    """
+
+    def __init__(self, ttl_s: float = 0.0, max_entries: int = 0, reusable: Optional[Callable[[Any], bool]] = None) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.reusable = reusable
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._memo: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # 类别 → [调用数, 合并到在途调用数, 复用近期结果数]
+        self._counts: Dict[str, List[int]] = {}
+
+    def _begin(self, key: Hashable, make_done: Callable[[], Any]) -> Tuple[int, Any]:
+        kind = str(key[0]) if isinstance(key, tuple) else ""
+        with self._lock:
+            counts = self._counts.setdefault(kind, [0, 0, 0])
+            counts[0] += 1
+            entry = self._memo.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._memo.move_to_end(key)
+                    counts[2] += 1
+                    return _HIT, entry[1]
+                del self._memo[key]
+            call = self._calls.get(key)
+            if call is not None:
+                counts[1] += 1
+                return _WAIT, call
+            call = self._calls[key] = _Call(make_done())
+            return _LEAD, call
+
+    def _finish(self, key: Hashable, call: _Call, value: Any, error: Optional[BaseException]) -> None:
+        call.value, call.error = value, error
+        with self._lock:
+            del self._calls[key]
+            if error is None and self.ttl_s > 0 and self.max_entries > 0 and (self.reusable is None or self.reusable(value)):
+                self._memo[key] = (time.monotonic() + self.ttl_s, value)
+                self._memo.move_to_end(key)
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """返回 (结果, 是否来自其他调用)。"""
+        state, obj = self._begin(key, threading.Event)
+        if state == _HIT:
+            return obj, True
+        if state == _WAIT:
+            obj.done.wait()
+            if obj.error is not None:
+                raise obj.error
+            return obj.value, True
+        try:
+            value = fn()
+        except BaseException as e:
+            self._finish(key, obj, None, e)
+            obj.done.set()
+            raise
+        self._finish(key, obj, value, None)
+        obj.done.set()
+        return value, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        state, obj = self._begin(key, lambda: asyncio.get_running_loop().create_future())
+        if state == _HIT:
+            return obj, True
+        if state == _WAIT:
+            # shield：等待方被取消不影响发起方
+            await asyncio.shield(obj.done)
+            if obj.error is not None:
+                raise obj.error
+            return obj.value, True
+        try:
+            value = await fn()
+        except BaseException as e:
+            self._finish(key, obj, None, e)
+            obj.done.set_result(None)
+            raise
+        self._finish(key, obj, value, None)
+        obj.done.set_result(None)
+        return value, False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts = {kind: list(c) for kind, c in self._counts.items()}
+        out: Dict[str, Dict[str, Any]] = {}
+        for kind, (calls, shared, reused) in counts.items():
+            out[kind] = {"calls": calls, "shared": shared, "reused": reused, "hit_rate": round((shared + reused) / calls, 4) if calls else 0.0}
+        return out
+
+
+# 接口结果为 (值, 重试次数, 错误码, 错误信息)：成功与业务终态可在本次运行内复用，鉴权、限流、重试超限等不复用
+_REUSABLE_MESSAGES = (None, "NOT_FOUND_CONTRACT", "NO_COOPERATION", "NO_CHAT_GROUP")
+
+
+def reusable_result(result: Tuple[Any, int, Optional[int], Optional[str]]) -> bool:
+    return result[3] in _REUSABLE_MESSAGES
+
+
+def _own(result: Tuple[Any, int, Optional[int], Optional[str]], shared: bool) -> Tuple[Any, int, Optional[int], Optional[str]]:
+    # 共享来的结果本合同未发请求，重试次数记 0
+    return (result[0], 0, result[2], result[3]) if shared else result
+
+
+class CoalescingSearcher:
+    """合同搜索的请求合并包装：同一合同编号的并发或近期重复搜索只调用一次被包装的搜索器。"""
+
+    def __init__(self, searcher: Any, flight: SingleFlight) -> None:
+        self.searcher = searcher
+        self.flight = flight
+
+    def search_contract_id(self, contract_number: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:
+        return _own(*self.flight.do(("contract_search", contract_number), lambda: self.searcher.search_contract_id(contract_number)))
+
+
+class AsyncCoalescingSearcher(CoalescingSearcher):
+    async def search_contract_id(self, contract_number: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:  # type: ignore[override]
+        return _own(*await self.flight.do_async(("contract_search", contract_number), lambda: self.searcher.search_contract_id(contract_number)))
+
+
+class CoalescingCLMClient:
+    """CLM 客户端的请求合并包装：补充协议等不同合同常指向同一 contract_id / cooperation_id，
+    同一 ID 的并发或近期重复查询只发一次请求。"""
+
+    def __init__(self, clm: Any, flight: SingleFlight) -> None:
+        self.clm = clm
+        self.flight = flight
+        self.base = clm.base
+
+    def get_cooperation_id(self, contract_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:
+        return _own(*self.flight.do(("contract_info", contract_id), lambda: self.clm.get_cooperation_id(contract_id)))
+
+    def get_open_chat_id(self, cooperation_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:
+        return _own(*self.flight.do(("cooperation_info", cooperation_id), lambda: self.clm.get_open_chat_id(cooperation_id)))
+
+
+class AsyncCoalescingCLMClient(CoalescingCLMClient):
+    async def get_cooperation_id(self, contract_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:  # type: ignore[override]
+        return _own(*await self.flight.do_async(("contract_info", contract_id), lambda: self.clm.get_cooperation_id(contract_id)))
+
+    async def get_open_chat_id(self, cooperation_id: str) -> Tuple[Optional[str], int, Optional[int], Optional[str]]:  # type: ignore[override]
+        return _own(*await self.flight.do_async(("cooperation_info", cooperation_id), lambda: self.clm.get_open_chat_id(cooperation_id)))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 测试直接以 src.* 导入，与 main.py 的运行方式一致
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,48 @@
+from src.http.adaptive import AdaptiveRateController, is_throttled, observe_response, retry_after_seconds
+from src.http.rate_limiter import RateLimiter
+
+
+def test_throttle_signals():
+    assert is_throttled(429, None)
+    assert is_throttled(200, {"code": 99991400})
+    assert is_throttled(200, {"code": 9499})
+    assert not is_throttled(200, {"code": 0})
+    assert not is_throttled(500, "bad gateway")
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds({"x-ogw-ratelimit-reset": "3"}) == 3.0
+    assert retry_after_seconds({"Retry-After": "1.5"}) == 1.5
+    assert retry_after_seconds({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert retry_after_seconds({"Retry-After": "soon"}) is None
+    assert retry_after_seconds({}) is None
+
+
+def test_multiplicative_decrease_once_per_cooldown():
+    limiter = RateLimiter({"global": 6000, "contract_info": 100})
+    ctl = AdaptiveRateController(limiter, {"contract_info": 200}, cooldown_s=60, min_qpm=30)
+    ctl.on_throttle("contract_info")
+    assert limiter.get_qpm("contract_info") == 50
+    # 同一轮在途请求的后续 429 不再下调
+    ctl.on_throttle("contract_info")
+    assert limiter.get_qpm("contract_info") == 50
+    # 不受控的桶不调整
+    ctl.on_throttle("global")
+    assert limiter.get_qpm("global") == 6000
+
+
+def test_additive_increase_up_to_ceiling():
+    limiter = RateLimiter({"global": 6000, "contract_info": 100})
+    ctl = AdaptiveRateController(limiter, {"contract_info": 108}, increase_step=5, increase_interval_s=0)
+    ctl.on_success("contract_info")
+    assert limiter.get_qpm("contract_info") == 105
+    ctl.on_success("contract_info")
+    ctl.on_success("contract_info")
+    assert limiter.get_qpm("contract_info") == 108
+
+
+def test_observe_response_defers_bucket():
+    limiter = RateLimiter({"global": 6000, "contract_info": 6000})
+    observe_response(limiter, None, "contract_info", 429, None, {"Retry-After": "2"})
+    wait = limiter.reserve(("global", "contract_info"))
+    assert 1.5 < wait <= 2.0
@@ -0,0 +1,75 @@
+import threading
+
+from src.openapi.batch_search import BatchSearcher, match_batch
+
+
+def _resp(*items, has_more=False):
+    return {"code": 0, "data": {"items": [{"contract_number": cn, "contract_id": cid} for cn, cid in items], "has_more": has_more}}
+
+
+def test_match_by_number_and_not_found():
+    resolved, fallback = match_batch(["A", "B", "C"], 200, _resp(("B", "2"), ("A", "1")), 1)
+    assert resolved == {"A": ("1", 1, None, None), "B": ("2", 1, None, None), "C": (None, 1, None, "NOT_FOUND_CONTRACT")}
+    assert fallback == []
+
+
+def test_ambiguous_and_truncated_numbers_fall_back():
+    resolved, fallback = match_batch(["A", "B", "C"], 200, _resp(("A", "1"), ("A", "9"), ("B", "2"), has_more=True), 0)
+    assert resolved == {"B": ("2", 0, None, None)}
+    assert fallback == ["A", "C"]
+
+
+def test_unfiltered_response_falls_back_whole_batch():
+    # 出现未请求的编号：接口忽略了批量条件
+    assert match_batch(["A", "B"], 200, _resp(("A", "1"), ("X", "7")), 0) == ({}, ["A", "B"])
+    assert match_batch(["A"], 200, {"code": 0, "data": {"items": [{"contract_id": "1"}]}}, 0) == ({}, ["A"])
+
+
+def test_batch_level_errors_apply_to_every_number():
+    resolved, fallback = match_batch(["A", "B"], 200, {"code": 99991400}, 2)
+    assert resolved == {"A": (None, 2, 99991400, "RETRY_EXCEEDED"), "B": (None, 2, 99991400, "RETRY_EXCEEDED")}
+    assert fallback == []
+    resolved, _ = match_batch(["A"], 401, None, 0)
+    assert resolved["A"][3] == "AUTH_FAILED"
+
+
+class _Client:
+    def __init__(self):
+        self.bodies = []
+        self.singles = []
+        self.lock = threading.Lock()
+
+    def _request(self, body):
+        with self.lock:
+            self.bodies.append(body)
+        numbers = body["contract_numbers"]
+        # 最后一个编号对应两个合同，需单条回退
+        items = [(cn, "id-" + cn) for cn in numbers] + [(numbers[-1], "other")]
+        return 200, _resp(*items), 0
+
+    def search_contract_id(self, contract_number):
+        with self.lock:
+            self.singles.append(contract_number)
+        return "single-" + contract_number, 0, None, None
+
+
+def test_batch_searcher_coalesces_concurrent_callers():
+    client = _Client()
+    searcher = BatchSearcher(client, batch_size=4, max_wait_s=5.0, field="contract_numbers")
+    numbers = ["N1", "N2", "N3", "N4"]
+    results = {}
+
+    def call(cn):
+        results[cn] = searcher.search_contract_id(cn)
+
+    threads = [threading.Thread(target=call, args=(cn,)) for cn in numbers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(client.bodies) == 1 and sorted(client.bodies[0]["contract_numbers"]) == numbers
+    fallback = client.bodies[0]["contract_numbers"][-1]
+    assert client.singles == [fallback]
+    assert results[fallback][0] == "single-" + fallback
+    assert all(results[cn][0] == "id-" + cn for cn in numbers if cn != fallback)
+    assert searcher.stats() == {"batches": 1, "batched": 4, "fallbacks": 1, "disabled": False}
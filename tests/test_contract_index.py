@@ -0,0 +1,83 @@
+import pytest
+
+from src.openapi.contract_index import ContractIndex, ContractIndexer, IndexedSearcher
+
+
+class _Pager:
+    """按 page_token 分页返回预设条目，fail_at 指定的页返回 500。"""
+
+    def __init__(self, pages, fail_at=None):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.bodies = []
+
+    def _request(self, body):
+        self.bodies.append(dict(body))
+        page = int(body.get("page_token") or 0)
+        if page == self.fail_at:
+            self.fail_at = None
+            return 500, None, 0
+        has_more = page + 1 < len(self.pages)
+        items = [{"contract_number": cn, "contract_id": cid, "update_time": ts} for cn, cid, ts in self.pages[page]]
+        return 200, {"code": 0, "data": {"items": items, "has_more": has_more, "page_token": str(page + 1)}}, 0
+
+
+PAGES = [
+    [("A", "1", 1700000000000), ("B", "2", 1700000001000)],
+    [("C", "3", "2023-11-14T22:13:25Z"), ("B", "9", 1700000002000)],
+]
+
+
+def _indexer(index, pager):
+    return ContractIndexer(pager, index, "update_time_start", "update_time", page_size=2, overlap_s=300)
+
+
+def test_full_refresh_and_ambiguous_numbers(tmp_path):
+    index = ContractIndex(str(tmp_path / "idx.sqlite3"))
+    try:
+        result = _indexer(index, _Pager(PAGES)).refresh()
+        assert result["mode"] == "full" and result["pages"] == 2 and result["index_size"] == 3
+        assert index.lookup("A") == "1" and index.lookup("C") == "3"
+        # 同一编号对应两个 contract_id：按未命中处理
+        assert index.lookup("B") is None
+        assert float(index.get_meta("watermark")) == pytest.approx(1700000005.0)
+    finally:
+        index.close()
+
+
+def test_resume_after_failed_page_then_incremental(tmp_path):
+    index = ContractIndex(str(tmp_path / "idx.sqlite3"))
+    try:
+        with pytest.raises(RuntimeError):
+            _indexer(index, _Pager(PAGES, fail_at=1)).refresh()
+        assert index.lookup("A") == "1" and index.get_meta("sync_page_token") == "1"
+
+        pager = _Pager(PAGES)
+        result = _indexer(index, pager).refresh()
+        assert result["resumed"] and pager.bodies[0]["page_token"] == "1"
+        assert index.lookup("C") == "3" and index.get_meta("sync_page_token") is None
+
+        pager = _Pager([[("D", "4", 1700000010000)]])
+        result = _indexer(index, pager).refresh()
+        # 增量：从水位减去 overlap 开始拉取
+        assert result["mode"] == "incremental"
+        assert pager.bodies[0]["update_time_start"] == str(int((1700000005 - 300) * 1000))
+        assert index.lookup("D") == "4"
+    finally:
+        index.close()
+
+
+def test_indexed_searcher_falls_back_on_miss(tmp_path):
+    class _Inner:
+        def search_contract_id(self, cn):
+            return "remote-" + cn, 1, None, None
+
+    index = ContractIndex(str(tmp_path / "idx.sqlite3"))
+    try:
+        index.upsert_page([("A", "1", None)], {})
+        searcher = IndexedSearcher(index, _Inner())
+        assert searcher.search_contract_id("A") == ("1", 0, None, None)
+        assert searcher.search_contract_id("Z") == ("remote-Z", 1, None, None)
+        assert index.stats() == {"hits": 1, "misses": 1}
+    finally:
+        index.close()
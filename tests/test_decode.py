@@ -0,0 +1,13 @@
+import json
+
+from src.http.decode import decode_body
+
+
+def test_decode_body_json():
+    assert decode_body(b'{"code":0,"data":{"openChatId":"a"}}', 200, json.loads) == {"code": 0, "data": {"openChatId": "a"}}
+    assert decode_body(b'{"code":99991400}', 429, json.loads) == {"code": 99991400}
+
+
+def test_decode_body_non_json():
+    assert decode_body(b"<html>", 200, json.loads) is None
+    assert decode_body(b"bad gateway", 502, json.loads) == "bad gateway"
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.models import Status
+from src.pipeline.async_runner import run_async_pool
+from src.pipeline.pool import run_pool
+from src.pipeline.staged import Stage, run_staged
+from src.pipeline.steps import ContractTask
+
+
+def _tasks(defer_s):
+    now = time.time()
+    tasks = [ContractTask(index=i, contract_number=f"C{i}") for i in range(4)]
+    tasks.append(ContractTask(index=4, contract_number="DEFERRED", not_before=now + defer_s))
+    return tasks
+
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = {}
+        self.results = []
+
+    def step(self, task):
+        with self.lock:
+            self.started[task.contract_number] = time.time()
+        task.status = Status.SUCCESS
+        return False
+
+    def process(self, task):
+        self.step(task)
+        return task.to_row()
+
+    def on_result(self, task, row):
+        self.results.append(row.contract_number)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_pool_waits_for_not_before_outside_workers(concurrency):
+    tasks = _tasks(0.3)
+    rec = _Recorder()
+    started = time.time()
+    run_pool(tasks, rec.process, concurrency, rec.on_result)
+    assert sorted(rec.results) == sorted(t.contract_number for t in tasks)
+    assert rec.started["DEFERRED"] >= tasks[-1].not_before
+    # 未延后的合同不受影响
+    assert max(rec.started[f"C{i}"] for i in range(4)) - started < 0.2
+
+
+def test_async_pool_waits_for_not_before():
+    tasks = _tasks(0.3)
+    rec = _Recorder()
+
+    async def process(task):
+        return rec.process(task)
+
+    asyncio.run(run_async_pool(tasks, process, 4, rec.on_result))
+    assert len(rec.results) == 5
+    assert rec.started["DEFERRED"] >= tasks[-1].not_before
+
+
+def test_async_pool_keeps_blocking_calls_off_the_loop():
+    loop_threads, io_threads = set(), set()
+
+    def tasks():
+        for t in _tasks(0):
+            io_threads.add(threading.get_ident())
+            yield t
+
+    async def process(task):
+        loop_threads.add(threading.get_ident())
+        task.status = Status.SUCCESS
+        return task.to_row()
+
+    def on_result(task, row):
+        io_threads.add(threading.get_ident())
+
+    asyncio.run(run_async_pool(tasks(), process, 4, on_result))
+    assert len(loop_threads) == 1 and not loop_threads & io_threads
+
+
+def test_staged_feed_waits_for_not_before():
+    tasks = _tasks(0.3)
+    rec = _Recorder()
+    run_staged(tasks, [Stage("SEARCH", rec.step, 2)], 4, rec.on_result)
+    assert len(rec.results) == 5
+    assert rec.started["DEFERRED"] >= tasks[-1].not_before
@@ -0,0 +1,39 @@
+from src.io.journal import CheckpointJournal, replay_journal
+from src.io.merge import JournalIndex
+from src.models import ResultRow, Status
+
+
+def _row(cn):
+    return ResultRow(cn, "id-" + cn, "coop-" + cn, "oc-" + cn, Status.SUCCESS, None, None)
+
+
+def _append(path, *numbers):
+    journal = CheckpointJournal(str(path))
+    for cn in numbers:
+        journal.append(_row(cn))
+    journal.close()
+
+
+def test_resume_after_torn_write(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    _append(path, "A")
+    # 模拟写入中途崩溃：第二条记录只写了一半
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"contract_number":"X","contract_id":"id-')
+    _append(path, "B", "C")
+    index = JournalIndex(str(path))
+    try:
+        assert list(index) == ["A", "B", "C"]
+        assert index["B"].openChatId == "oc-B"
+    finally:
+        index.close()
+    assert replay_journal(str(path))[0] == ["A", "B", "C"]
+
+
+def test_torn_first_line_and_clean_file(tmp_path):
+    path = tmp_path / "run.journal.jsonl"
+    path.write_text('{"contract_number":"X"', encoding="utf-8")
+    _append(path, "A")
+    assert path.read_text(encoding="utf-8").count("\n") == 1
+    _append(path, "B")
+    assert replay_journal(str(path))[0] == ["A", "B"]
@@ -0,0 +1,69 @@
+import threading
+
+from src.logger import LogSink
+
+
+def _lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_async_sink_flushes_on_close(tmp_path):
+    path = tmp_path / "run.log"
+    sink = LogSink(str(path), async_mode=True, queue_size=4, console="off")
+    for i in range(100):
+        sink.write("INFO", f"line-{i}")
+    sink.close()
+    assert _lines(path) == [f"line-{i}" for i in range(100)]
+
+
+def test_write_after_close_is_not_lost(tmp_path):
+    path = tmp_path / "run.log"
+    sink = LogSink(str(path), async_mode=True, console="off")
+    sink.write("INFO", "before")
+    sink.close()
+    sink.write("INFO", "after")
+    assert _lines(path) == ["before", "after"]
+
+
+def test_concurrent_writes_racing_close(tmp_path):
+    path = tmp_path / "run.log"
+    sink = LogSink(str(path), async_mode=True, queue_size=8, console="off")
+    start = threading.Event()
+
+    def writer(n):
+        start.wait()
+        for i in range(500):
+            sink.write("INFO", f"{n}-{i}")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    start.set()
+    sink.close()
+    for t in threads:
+        t.join()
+    assert sorted(_lines(path)) == sorted(f"{n}-{i}" for n in range(4) for i in range(500))
+
+
+def test_write_failure_drops_records_without_blocking(tmp_path):
+    class _BrokenFile:
+        closed = False
+
+        def write(self, data):
+            raise OSError("No space left on device")
+
+        def flush(self):
+            pass
+
+        def close(self):
+            self.closed = True
+
+    sink = LogSink(str(tmp_path / "run.log"), async_mode=True, queue_size=2, console="off")
+    sink._file.close()
+    sink._file = _BrokenFile()
+    writer = threading.Thread(target=lambda: [sink.write("INFO", f"line-{i}") for i in range(200)])
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+    sink.close()
+    assert sink.dropped == 200
@@ -0,0 +1,63 @@
+from src.io.merge import ResultIndex, ResultMerger
+from src.models import ResultRow, Status
+
+
+def _row(cn: str, chat: str = "", status: Status = Status.SUCCESS) -> ResultRow:
+    return ResultRow(cn, "id-" + cn, "coop-" + cn, chat or None, status, None, None, search_ms=5)
+
+
+def _merged(existing, new, input_order=()):
+    merger = ResultMerger(new)
+    rows = [(r.contract_number, r.openChatId) for r in merger.merge(existing, input_order)]
+    return rows, merger.stats()
+
+
+def test_index_keeps_last_duplicate_at_first_position(tmp_path):
+    rows = [_row("A", "a1"), _row("B", "b1"), _row("A", "a2"), _row("C", "c1"), _row("A", "a3")]
+    index = ResultIndex(rows, str(tmp_path))
+    try:
+        assert list(index) == ["A", "B", "C"]
+        assert index["A"].openChatId == "a3"
+        assert index["A"].search_ms == 5 and index["A"].status is Status.SUCCESS
+        assert index.duplicates == 2
+        assert index.get("Z") is None
+    finally:
+        index.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_merge_matches_dict_upsert(tmp_path):
+    existing_rows = [_row("A", "a1"), _row("B", "b1"), _row("A", "a2"), _row("C", "c1")]
+    new = {"B": _row("B", "b2"), "D": _row("D", "d1"), "E": _row("E", "e1")}
+    # 基线语义：历史与本次结果依次写入同一个字典
+    baseline = {}
+    for r in existing_rows:
+        baseline[r.contract_number] = r
+    for cn in ("E", "D"):
+        baseline[cn] = new[cn]
+    baseline["B"] = new["B"]
+
+    index = ResultIndex(existing_rows, str(tmp_path))
+    try:
+        rows, stats = _merged(index, new, ["E", "D", "E"])
+    finally:
+        index.close()
+    assert rows == [(cn, r.openChatId) for cn, r in baseline.items()]
+    assert stats == {"kept": 2, "replaced": 1, "appended": 2, "duplicates": 1}
+
+
+def test_merge_appends_unlisted_new_in_result_order():
+    rows, stats = _merged({"A": _row("A", "a1")}, {"C": _row("C"), "A": _row("A", "a2"), "B": _row("B")}, ["B"])
+    assert [cn for cn, _ in rows] == ["A", "B", "C"]
+    assert rows[0] == ("A", "a2")
+    assert stats["appended"] == 2 and stats["duplicates"] == 0
+
+
+def test_empty_existing(tmp_path):
+    index = ResultIndex([], str(tmp_path))
+    try:
+        rows, stats = _merged(index, {"A": _row("A")})
+    finally:
+        index.close()
+    assert [cn for cn, _ in rows] == ["A"]
+    assert stats == {"kept": 0, "replaced": 0, "appended": 1, "duplicates": 0}
@@ -0,0 +1,56 @@
+import cProfile
+import pstats
+import sys
+import threading
+
+import pytest
+
+from src import profiling
+from src.models import ResultRow, Status
+from src.pipeline.pool import run_pool
+from src.pipeline.steps import ContractTask
+
+
+def _work(task):
+    sum(i * i for i in range(2000))
+    return ResultRow(task.contract_number, None, None, None, Status.SUCCESS, None, None)
+
+
+@pytest.mark.parametrize("per_thread", [profiling._PER_THREAD, False])
+def test_call_profile_with_threaded_pool(tmp_path, monkeypatch, per_thread):
+    monkeypatch.setattr(profiling, "_PER_THREAD", per_thread)
+    out = tmp_path / "run.prof"
+    done = []
+    prof = profiling.CallProfile()
+    prof.start()
+    try:
+        tasks = [ContractTask(index=i, contract_number=f"HT{i}") for i in range(50)]
+        run_pool(tasks, _work, 4, lambda task, row: done.append(row.contract_number))
+    finally:
+        prof.stop(str(out))
+    assert len(done) == 50
+    stats = pstats.Stats(str(out))
+    # 3.12 以下只有逐线程启用时才能采到工作线程
+    if per_thread or sys.version_info >= (3, 12):
+        assert any(func[2] == "_work" for func in stats.stats)
+
+
+def test_thread_survives_profiler_enable_failure(tmp_path, monkeypatch):
+    class _Busy(cProfile.Profile):
+        # 模拟 3.12+ 上其他 profiler 已启用时的报错
+        def enable(self, *args, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("Another profiling tool is already active")
+            super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(profiling, "_PER_THREAD", True)
+    monkeypatch.setattr(profiling.cProfile, "Profile", _Busy)
+    done = []
+    prof = profiling.CallProfile()
+    prof.start()
+    try:
+        tasks = [ContractTask(index=i, contract_number=f"HT{i}") for i in range(20)]
+        run_pool(tasks, _work, 4, lambda task, row: done.append(row.contract_number))
+    finally:
+        prof.stop(str(tmp_path / "run.prof"))
+    assert len(done) == 20
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from src.http.rate_limiter import RateLimiter
+
+
+def test_burst_then_interval():
+    limiter = RateLimiter({"global": 60}, burst=2)
+    assert limiter.reserve(("global",)) == 0.0
+    assert limiter.reserve(("global",)) == 0.0
+    # 突发额度用完后需等待约一个间隔（1s）
+    assert 0.9 < limiter.reserve(("global",)) <= 1.0
+
+
+def test_not_ready_reserves_nothing():
+    limiter = RateLimiter({"global": 600, "contract_search": 60})
+    assert limiter.reserve(("global", "contract_search")) == 0.0
+    wait = limiter.reserve(("global", "contract_search"))
+    assert wait > 0.9
+    # 未就绪时不占用 global 令牌
+    assert limiter.stats()["global"]["acquires"] == 1
+
+
+def test_search_backlog_does_not_delay_other_endpoints():
+    limiter = RateLimiter({"global": 600, "contract_search": 60, "contract_info": 600})
+    for _ in range(16):
+        limiter.reserve(("global", "contract_search"))
+    # global 与 contract_info 配额几乎空闲，不应排在合同搜索的积压之后
+    assert limiter.reserve(("global", "contract_info")) < 0.2
+
+
+def test_acquire_many_waits_until_all_ready():
+    limiter = RateLimiter({"global": 60000, "contract_info": 600})
+    limiter.acquire_many(("global", "contract_info"))
+    started = time.monotonic()
+    limiter.acquire_many(("global", "contract_info"))
+    assert 0.08 < time.monotonic() - started < 0.3
+    stats = limiter.stats()
+    assert stats["contract_info"]["acquires"] == 2
+    assert stats["contract_info"]["blocked"] == 1
+    # 等待由 contract_info 造成，不计入 global
+    assert stats["global"]["wait_total_ms"] < 5
+
+
+def test_acquire_many_async():
+    limiter = RateLimiter({"global": 600})
+
+    async def go():
+        for _ in range(3):
+            await limiter.acquire_many_async(("global",))
+
+    started = time.monotonic()
+    asyncio.run(go())
+    assert 0.15 < time.monotonic() - started < 0.5
@@ -0,0 +1,66 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from src.logger import JsonLogger
+from src.models import ResultRow, Status
+from src.service import LookupService, serve_lookup
+
+
+class _Runner:
+    def process(self, task):
+        if task.contract_number == "BOOM":
+            raise RuntimeError("boom")
+        return ResultRow(task.contract_number, "1", "c", "oc", Status.SUCCESS, None, None)
+
+
+@pytest.fixture
+def server(tmp_path):
+    log_file = tmp_path / "run.log"
+    logger = JsonLogger(str(log_file), module="service")
+    service = LookupService(_Runner(), concurrency=2)
+    srv = serve_lookup(service, "127.0.0.1", 0, logger=logger)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, log_file
+    srv.shutdown()
+    srv.server_close()
+    service.close()
+    logger.close()
+
+
+def _request(srv, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=5)
+    conn.request(method, path, body=body)
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    conn.close()
+    return resp.status, data
+
+
+def test_resolve_ok(server):
+    srv, _ = server
+    status, data = _request(srv, "GET", "/resolve?contract_number=HT1")
+    assert status == 200 and data["openChatId"] == "oc"
+
+
+def test_bad_requests_return_400(server):
+    srv, _ = server
+    assert _request(srv, "GET", "/resolve")[0] == 400
+    assert _request(srv, "POST", "/resolve", b"{not json")[0] == 400
+    assert _request(srv, "POST", "/resolve", b'{"contract_numbers": "HT1"}')[0] == 400
+    assert _request(srv, "POST", "/resolve", b"[1]")[0] == 400
+
+
+def test_handler_error_returns_500_and_is_logged(server):
+    srv, log_file = server
+    status, data = _request(srv, "GET", "/resolve?contract_number=BOOM")
+    assert status == 500 and "RuntimeError" in data["error"]
+    status, _ = _request(srv, "POST", "/resolve", b'{"contract_numbers": ["HT1", "BOOM"]}')
+    assert status == 500
+    # 服务仍可继续处理请求
+    assert _request(srv, "GET", "/resolve?contract_number=HT2")[0] == 200
+    records = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    errors = [r for r in records if r.get("message") == "serve_error"]
+    assert len(errors) == 2 and errors[0]["level"] == "ERROR"
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.singleflight import CoalescingCLMClient, SingleFlight, reusable_result
+
+
+def _run_concurrently(n, fn):
+    results, errors = [], []
+    start = threading.Barrier(n)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return "v"
+
+    results, errors = _run_concurrently(5, lambda: flight.do(("k", 1), fn))
+    assert not errors and len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats()["k"] == {"calls": 5, "shared": 4, "reused": 0, "hit_rate": 0.8}
+
+
+def test_error_propagates_to_all_waiters_and_is_not_cached():
+    flight = SingleFlight(ttl_s=60, max_entries=10)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    results, errors = _run_concurrently(4, lambda: flight.do(("k", 1), fail))
+    assert not results and len(errors) == 4 and len(calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    # 失败不进入复用缓存，下一次调用重新执行
+    assert flight.do(("k", 1), lambda: "ok") == ("ok", False)
+
+
+def test_async_error_propagates_to_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async(("k", 1), fail) for _ in range(3)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+
+def test_reuse_only_reusable_results_within_ttl():
+    flight = SingleFlight(ttl_s=60, max_entries=1, reusable=reusable_result)
+    ok = ("cid", 2, None, None)
+    assert flight.do(("contract_info", "a"), lambda: ok) == (ok, False)
+    assert flight.do(("contract_info", "a"), lambda: pytest.fail("不应再次调用")) == (ok, True)
+    # 重试超限不复用
+    throttled = (None, 3, 429, "RETRY_EXCEEDED")
+    assert flight.do(("contract_info", "b"), lambda: throttled) == (throttled, False)
+    assert flight.do(("contract_info", "b"), lambda: ok) == (ok, False)
+    # max_entries=1：写入 b 后 a 被淘汰
+    assert flight.do(("contract_info", "a"), lambda: ok)[1] is False
+
+
+def test_coalescing_client_reports_zero_retries_for_shared_results():
+    class _Clm:
+        base = "http://clm"
+
+        def get_cooperation_id(self, contract_id):
+            return "coop", 2, None, None
+
+    client = CoalescingCLMClient(_Clm(), SingleFlight(ttl_s=60, max_entries=10, reusable=reusable_result))
+    assert client.get_cooperation_id("c1") == ("coop", 2, None, None)
+    assert client.get_cooperation_id("c1") == ("coop", 0, None, None)